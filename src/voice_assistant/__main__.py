@@ -0,0 +1,10 @@
+"""
+支持以 python -m voice_assistant 运行
+Support running as python -m voice_assistant
+"""
+import sys
+
+from .main import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+asyncio音频处理流程，从上传、转录、读取结果到Bedrock优化全程不阻塞事件循环
+asyncio audio processing pipeline, from upload, transcription and result fetch through Bedrock optimization
+without blocking the event loop
+
+这是唯一的处理流程实现，aws_services.process_audio 等同步入口在私有事件循环中驱动它。
+This is the only implementation of the pipeline; synchronous entry points such as aws_services.process_audio
+drive it on a private event loop.
+
+等待（排队、转录任务轮询）使用 asyncio.sleep，一个进程可以同时挂起数百个请求而不需要数百个线程；
+boto3 的阻塞调用都很短，通过 asyncio.to_thread 桥接到线程池。
+Waits (queuing, job polling) use asyncio.sleep so one process can hold hundreds of in-flight requests without
+hundreds of threads; the short blocking boto3 calls are bridged to the thread pool with asyncio.to_thread.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from .aws_services import (
+    PipelineStageError,
+    bedrock_error_output,
+    build_job_params,
+    build_transcription_result,
+    fetch_job_transcript,
+    get_client,
+    get_completion_sources,
+    iter_optimized_text,
+    lookup_cached_transcription,
+    pool_size_hint,
+    preprocess_audio,
+    release_job_completion,
+    resolve_audio_input,
+    restore_original_timeline,
+    stage_error_output,
+    track_job_completion,
+    transcription_cache,
+    transcription_flight_key,
+    transcription_flights,
+    upload_to_s3,
+    validate_upload,
+)
+from .job_scheduler import job_scheduler
+from .logger import log_service_call, logger
+from .long_audio import merge_transcripts, pick_language_status, remove_chunks, split_audio
+from .output_formatter import format_combined_output
+from .regional_pool import regional_pool
+from .transcribe_polling import wait_for_transcription_job_async
+
+# 迭代结束标记 | End-of-iteration marker
+_DONE = object()
+
+
+@asynccontextmanager
+async def unlimited_stage(stage):
+    """
+    默认的阶段入口，不限制并发也不计时
+    Default stage gate, neither bounding concurrency nor timing
+    """
+    yield
+
+
+async def iterate_in_thread(iterable):
+    """
+    在线程池中逐项推进同步迭代器，作为异步迭代器产出
+    Advance a synchronous iterator item by item on the thread pool and yield it as an async iterator
+    """
+    iterator = iter(iterable)
+    while True:
+        item = await asyncio.to_thread(next, iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+async def run_transcription_job_async(
+    s3_uri, audio_path, enable_speaker_diarization=False, region_name=None, progress=None
+):
+    """
+    提交转录任务、等待完成并读取Transcribe原始JSON结果
+    Submit a transcription job, wait for it and read the raw Transcribe JSON result
+
+    Returns:
+        tuple: (get_transcription_job 响应, 转录结果JSON) | (get_transcription_job response, transcript JSON)
+    """
+    job_params, expected_seconds = await asyncio.to_thread(
+        build_job_params, s3_uri, audio_path, enable_speaker_diarization
+    )
+    listener, poller = get_completion_sources()
+
+    # 调度器限制区域内的并发任务数，排队等待名额时不占用线程 | The scheduler caps concurrent jobs per region, waiting in the queue holds no thread
+    async with job_scheduler.admit_async(region_name):
+        # 启动转录任务，任务名冲突时调度器会换名并更换输出位置 | Start transcription job, on a conflict the scheduler renames it and moves its output
+        transcribe_client = get_client("transcribe", region_name=region_name)
+        job_params = await asyncio.to_thread(job_scheduler.start_job, transcribe_client, job_params)
+        job_name = job_params["TranscriptionJobName"]
+        completion = track_job_completion(job_name, region_name, listener, poller)
+
+        try:
+            status = await wait_for_transcription_job_async(
+                transcribe_client, job_name, expected_seconds, on_progress=progress, completion=completion
+            )
+        finally:
+            release_job_completion(job_name, listener, poller)
+
+    transcript_data = await asyncio.to_thread(fetch_job_transcript, status, job_params, region_name)
+    return status, transcript_data
+
+
+@log_service_call("transcribe")
+async def transcribe_audio_async(
+    s3_uri, audio_path, enable_speaker_diarization=False, region_name=None, progress=None
+):
+    """
+    使用AWS Transcribe转录音频并返回转录文本和元数据
+    Transcribe audio using AWS Transcribe and return transcription text and metadata
+
+    Args:
+        s3_uri: S3音频文件URI
+        audio_path: 本地音频文件路径
+        enable_speaker_diarization: 是否启用发言者划分
+        region_name: Transcribe客户端区域，必须与音频所在存储桶的区域一致
+        progress: 可选的进度回调，签名同 gr.Progress
+
+    Returns:
+        dict: 包含转录文本、识别语言、发言者信息等的字典
+    """
+    try:
+        status, transcript_data = await run_transcription_job_async(
+            s3_uri, audio_path, enable_speaker_diarization, region_name=region_name, progress=progress
+        )
+        return build_transcription_result(status, transcript_data, enable_speaker_diarization)
+    except Exception as e:
+        logger.error(f"转录音频失败: {str(e)} | Failed to transcribe audio: {str(e)}")
+        raise Exception(f"转录音频失败: {str(e)} | Failed to transcribe audio: {str(e)}")
+
+
+async def run_in_pool_async(
+    upload_path, transcriber, enable_speaker_diarization=False, progress=None, stage_gate=unlimited_stage
+):
+    """
+    通过区域池上传音频并调用 transcriber 转录，某个区域限流时切换到其他区域
+    Upload audio and run `transcriber` on it through the regional pool, failing over when a region throttles
+
+    Args:
+        transcriber: 转录协程函数 | Transcription coroutine function
+        stage_gate: 以阶段名调用、返回异步上下文管理器的函数，批量处理用它限制并统计各阶段
+                    Called with a stage name and returning an async context manager; batch processing
+                    uses it to bound and time each stage
+    """
+
+    async def run_in_region(slot):
+        try:
+            async with stage_gate("upload"):
+                s3_uri = await asyncio.to_thread(
+                    upload_to_s3, upload_path, region_name=slot.region, bucket_name=slot.bucket, progress=progress
+                )
+        except Exception as upload_error:
+            raise PipelineStageError("upload", str(upload_error))
+        try:
+            async with stage_gate("transcribe"):
+                return await transcriber(
+                    s3_uri, upload_path, enable_speaker_diarization, region_name=slot.region, progress=progress
+                )
+        except Exception as transcribe_error:
+            raise PipelineStageError("transcribe", str(transcribe_error))
+
+    size_hint = await asyncio.to_thread(pool_size_hint, upload_path)
+    return await regional_pool.run_async(run_in_region, size_hint=size_hint)
+
+
+async def transcribe_long_audio_async(
+    audio_path, enable_speaker_diarization=False, progress=None, stage_gate=unlimited_stage
+):
+    """
+    在静音处切分长音频，各片段并行上传和转录后合并，总耗时接近单个片段的耗时
+    Split long audio at silences, upload and transcribe the chunks in parallel and merge them,
+    so the total time approaches the time of a single chunk
+
+    Returns:
+        dict: 与 transcribe_audio_async 相同的转录结果字典
+    """
+    chunks = await asyncio.to_thread(split_audio, audio_path)
+    finished = 0
+
+    async def transcribe_chunk(chunk):
+        nonlocal finished
+        output = await run_in_pool_async(
+            chunk["path"], run_transcription_job_async, enable_speaker_diarization, stage_gate=stage_gate
+        )
+        finished += 1
+        if progress is not None:
+            try:
+                progress(finished / len(chunks), desc=f"已转录 {finished}/{len(chunks)} 段 | Transcribed {finished}/{len(chunks)} chunks")
+            except Exception:
+                pass
+        return output
+
+    # 片段数已由 split_audio 限制在 LONG_AUDIO_MAX_CHUNKS 以内；等所有片段结束后再删除文件
+    # split_audio already caps the chunks at LONG_AUDIO_MAX_CHUNKS; files are removed only once every chunk is done
+    try:
+        outputs = await asyncio.gather(*(transcribe_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    finally:
+        remove_chunks(chunks)
+    for output in outputs:
+        if isinstance(output, BaseException):
+            raise output
+
+    statuses = [status for status, _ in outputs]
+    chunk_results = [(chunk, transcript_data) for chunk, (_, transcript_data) in zip(chunks, outputs)]
+    status = pick_language_status(statuses, chunk_results)
+    merged = merge_transcripts(chunk_results, status["TranscriptionJob"].get("LanguageCode"))
+    return build_transcription_result(status, merged, enable_speaker_diarization)
+
+
+async def upload_and_transcribe_async(
+    audio_path, enable_speaker_diarization=False, progress=None, stage_gate=unlimited_stage
+):
+    """
+    通过区域池上传并转录音频，某个区域限流时切换到其他区域
+    Upload and transcribe audio through the regional pool, failing over when a region throttles
+
+    相同内容和设置的音频直接返回缓存的转录结果，跳过上传和Transcribe任务；同时进行中的重复请求共享同一次转录
+    Audio with the same content and settings returns the cached result, skipping upload and the Transcribe job;
+    concurrent duplicates share a single transcription
+
+    Args:
+        stage_gate: 见 run_in_pool_async；预处理和校验属于 "prepare" 阶段
+                    See run_in_pool_async; preprocessing and validation form the "prepare" stage
+
+    Returns:
+        dict: 与 transcribe_audio_async 相同的转录结果字典
+    """
+    audio_hash, cached_result = await asyncio.to_thread(
+        lookup_cached_transcription, audio_path, enable_speaker_diarization
+    )
+    if cached_result is not None:
+        return cached_result
+
+    # 同时进行中的重复请求共享同一次转录 | Concurrent duplicates share a single transcription
+    flight_key = await asyncio.to_thread(
+        transcription_flight_key, audio_path, audio_hash, enable_speaker_diarization
+    )
+    return await transcription_flights.do_async(
+        flight_key,
+        transcribe_uncached_async,
+        audio_path,
+        audio_hash,
+        enable_speaker_diarization,
+        progress,
+        stage_gate,
+    )
+
+
+async def transcribe_uncached_async(
+    audio_path, audio_hash=None, enable_speaker_diarization=False, progress=None, stage_gate=unlimited_stage
+):
+    """
+    预处理、上传并转录音频，结果写入转录缓存
+    Preprocess, upload and transcribe audio, storing the result in the transcription cache
+    """
+    async with stage_gate("prepare"):
+        upload_path, offset_map = await asyncio.to_thread(preprocess_audio, audio_path)
+        try:
+            long_audio = await asyncio.to_thread(validate_upload, upload_path)
+        except Exception:
+            if upload_path != audio_path:
+                os.remove(upload_path)
+            raise
+
+    try:
+        if long_audio:
+            result = await transcribe_long_audio_async(
+                upload_path, enable_speaker_diarization, progress=progress, stage_gate=stage_gate
+            )
+        else:
+            result = await run_in_pool_async(
+                upload_path,
+                transcribe_audio_async,
+                enable_speaker_diarization,
+                progress=progress,
+                stage_gate=stage_gate,
+            )
+        result = restore_original_timeline(result, offset_map)
+    finally:
+        if upload_path != audio_path:
+            os.remove(upload_path)
+
+    if audio_hash:
+        await asyncio.to_thread(transcription_cache.set, audio_hash, enable_speaker_diarization, result)
+    return result
+
+
+@log_service_call("process_audio")
+async def iter_process_audio_async(
+    audio_file,
+    model_id=None,
+    custom_prompt=None,
+    enable_speaker_diarization=False,
+    stream=True,
+    progress=None,
+    transcriber=None,
+):
+    """
+    处理音频文件，逐步产出 (转录文本, 优化文本, 语言信息, 发言者信息)
+    Process audio file, progressively yielding (transcript, optimized text, language info, speaker info)
+
+    转录完成后立即产出一次；stream=True 时优化文本随Bedrock流式输出不断更新，最后产出的是最终结果。
+    Yields once as soon as the transcription is ready; with stream=True the optimized text is updated as
+    Bedrock streams it. The last yielded tuple is the final result.
+
+    Args:
+        transcriber: 转录协程函数，默认 upload_and_transcribe_async
+    """
+    transcriber = transcriber or upload_and_transcribe_async
+    try:
+        audio_path, error_output = resolve_audio_input(audio_file, enable_speaker_diarization)
+        if error_output:
+            yield error_output
+            return
+
+        # 上传到S3并转录音频 | Upload to S3 and transcribe audio
+        try:
+            transcribe_result = await transcriber(audio_path, enable_speaker_diarization, progress=progress)
+        except PipelineStageError as stage_error:
+            yield stage_error_output(stage_error)
+            return
+
+        transcript_text = transcribe_result["transcript"]
+        language_info, speaker_info = format_combined_output(transcribe_result, enable_speaker_diarization)
+
+        # 转录完成后先显示转录结果 | Show the transcription as soon as it is ready
+        yield transcript_text, "", language_info, speaker_info
+
+        # 使用Bedrock优化，流式输出逐块交回事件循环 | Optimize using Bedrock, streamed output is handed back to the loop piece by piece
+        try:
+            optimized_text = ""
+            async for optimized_text in iterate_in_thread(
+                iter_optimized_text(transcript_text, model_id, custom_prompt, transcribe_result.get("segments"), stream)
+            ):
+                if stream:
+                    yield transcript_text, optimized_text, language_info, speaker_info
+        except Exception as bedrock_error:
+            yield bedrock_error_output(bedrock_error, transcript_text, language_info, speaker_info)
+            return
+
+        logger.info("音频处理完成 | Audio processing completed")
+        yield transcript_text, optimized_text, language_info, speaker_info
+
+    except Exception as e:
+        logger.error(f"处理音频失败: {str(e)} | Failed to process audio: {str(e)}")
+        yield f"处理错误: {str(e)} | Processing error: {str(e)}", "", "", ""
+
+
+async def process_audio_async(audio_file, model_id=None, custom_prompt=None, enable_speaker_diarization=False):
+    """
+    处理音频文件并返回转录和优化结果
+    Process audio file and return transcription and optimization results
+
+    Returns:
+        tuple: (转录文本, 优化文本, 语言信息, 发言者信息)
+    """
+    outputs = ("", "", "", "")
+    async for outputs in iter_process_audio_async(
+        audio_file, model_id, custom_prompt, enable_speaker_diarization, stream=False
+    ):
+        pass
+    return outputs
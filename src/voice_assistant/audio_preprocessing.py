@@ -0,0 +1,382 @@
+"""
+音频预处理模块，上传前将WAV音频混为单声道、重采样到16 kHz、可选裁剪静音并重新编码为16位PCM
+Audio preprocessing module, downmixes WAV audio to mono, resamples it to 16 kHz, optionally trims
+silence and re-encodes it as 16-bit PCM before upload
+"""
+import math
+import os
+import struct
+import tempfile
+import time
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+from .config import AUDIO_TARGET_SAMPLE_RATE
+from .logger import logger, log_transfer_stats
+from .voice_activity import frame_rms_db, plan_compaction, speech_mask, vad_frame_size
+
+# WAV格式标签 | WAV format tags
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# 重采样滤波器每侧的过零点数，越大越陡 | Zero crossings per side of the resampling filter, larger is steeper
+RESAMPLE_ZERO_CROSSINGS = 8
+# 截止频率相对于目标奈奎斯特频率的比例 | Cutoff relative to the target Nyquist frequency
+RESAMPLE_ROLLOFF = 0.95
+# 多相滤波表的最大相位数，超过时逐样本计算插值核 | Maximum polyphase table size, above it kernels are computed per sample
+MAX_POLYPHASE_PHASES = 4096
+# 每次向量化处理的输出样本数，限制内存占用 | Output samples processed per vectorized block, bounds memory use
+RESAMPLE_BLOCK = 32768
+# 逐块读取WAV时每块的帧数 | Frames per block when reading WAV files block by block
+WAV_BLOCK_FRAMES = 1 << 20
+
+
+# WAV文件的格式参数和data块位置 | Format parameters and data chunk location of a WAV file
+WavInfo = namedtuple("WavInfo", "format_tag channels sample_rate bits data_offset frames")
+
+
+def _is_supported(format_tag, width):
+    return (format_tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8)) or (
+        format_tag == WAVE_FORMAT_PCM and width in (1, 2, 3, 4)
+    )
+
+
+def read_wav_info(path):
+    """
+    只读取WAV块头，返回 WavInfo；data块不会被读入内存
+    Read only the WAV chunk headers and return a WavInfo; the data chunk is not read into memory
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("不是有效的WAV文件 | Not a valid WAV file")
+
+        file_size = os.fstat(f.fileno()).st_size
+        fmt = None
+        data_offset = data_size = None
+        offset = 12
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+            elif chunk_id == b"data":
+                data_offset = offset + 8
+                data_size = min(chunk_size, file_size - data_offset)
+            offset += 8 + chunk_size + (chunk_size & 1)
+    if fmt is None or data_offset is None:
+        raise ValueError("WAV文件缺少fmt或data块 | WAV file is missing the fmt or data chunk")
+
+    format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    if not channels or not _is_supported(format_tag, bits // 8):
+        raise ValueError(
+            f"不支持的WAV编码: 格式 {format_tag}, {bits} 位 | Unsupported WAV encoding: format {format_tag}, {bits} bits"
+        )
+    return WavInfo(format_tag, channels, sample_rate, bits, data_offset, data_size // (bits // 8 * channels))
+
+
+def _decode_frames(payload, info):
+    width = info.bits // 8
+    payload = payload[: len(payload) - len(payload) % (width * info.channels)]
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(payload, dtype=f"<f{width}").astype(np.float32)
+    elif width == 1:
+        samples = (np.frombuffer(payload, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width in (2, 4):
+        samples = np.frombuffer(payload, dtype=f"<i{width}").astype(np.float32) / float(2 ** (info.bits - 1))
+    else:
+        raw = np.frombuffer(payload, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        samples = values.astype(np.float32) / float(1 << 23)
+    return samples.reshape(-1, info.channels)
+
+
+def read_wav_frames(f, info, start, stop):
+    """
+    从已打开的WAV文件中定位并解码 [start, stop) 帧，返回float32数组 [帧数, 声道数]
+    Seek into an open WAV file and decode frames [start, stop) as a float32 array [frames, channels]
+    """
+    start, stop = max(0, start), min(stop, info.frames)
+    if stop <= start:
+        return np.zeros((0, info.channels), dtype=np.float32)
+    frame_bytes = info.bits // 8 * info.channels
+    f.seek(info.data_offset + start * frame_bytes)
+    return _decode_frames(f.read((stop - start) * frame_bytes), info)
+
+
+def read_wav(path):
+    """
+    解析WAV文件，返回 (float32样本数组 [帧数, 声道数]，采样率)，支持8/16/24/32位整数和32/64位浮点
+    Parse a WAV file and return (float32 samples [frames, channels], sample rate),
+    supporting 8/16/24/32-bit integer and 32/64-bit float
+
+    整个文件会被解码到内存中，大文件请使用 iter_mono_blocks。
+    The whole file is decoded into memory; use iter_mono_blocks for large files.
+    """
+    info = read_wav_info(path)
+    with open(path, "rb") as f:
+        return read_wav_frames(f, info, 0, info.frames), info.sample_rate
+
+
+def iter_mono_blocks(path, info=None, start=0, stop=None, block_frames=None):
+    """
+    按固定大小的块读取 [start, stop) 帧并混为单声道，内存占用与文件大小无关
+    Read frames [start, stop) in fixed-size blocks downmixed to mono, so memory use does not grow with the file
+    """
+    info = info or read_wav_info(path)
+    stop = info.frames if stop is None else min(stop, info.frames)
+    block_frames = block_frames or WAV_BLOCK_FRAMES
+    with open(path, "rb") as f:
+        for block_start in range(start, stop, block_frames):
+            yield downmix(read_wav_frames(f, info, block_start, min(block_start + block_frames, stop)))
+
+
+def frame_energy_db(path, frame_size, info=None):
+    """
+    逐块计算单声道每帧RMS能量（dBFS），结果与对整个文件调用 frame_rms_db 相同
+    Compute the per-frame mono RMS energy (dBFS) block by block, matching frame_rms_db over the whole file
+    """
+    block_frames = max(1, WAV_BLOCK_FRAMES // frame_size) * frame_size
+    energies = [frame_rms_db(block, frame_size) for block in iter_mono_blocks(path, info, block_frames=block_frames)]
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def downmix(samples):
+    """
+    多声道取平均混为单声道
+    Average all channels into mono
+    """
+    return samples.mean(axis=1) if samples.ndim > 1 else samples
+
+
+def _resample_kernel(distance, cutoff, half_width):
+    window = 0.5 + 0.5 * np.cos(np.pi * np.clip(distance / half_width, -1.0, 1.0))
+    return (cutoff * np.sinc(cutoff * distance) * window).astype(np.float32)
+
+
+class Resampler:
+    """
+    带限窗函数sinc插值重采样，分块向量化计算；降采样时截止频率随之降低以抗混叠
+    Band-limited windowed-sinc resampling, vectorized in blocks; the cutoff drops with the rate when
+    downsampling to prevent aliasing
+
+    采样率之比为有理数 up/down 时，插值核只有 up 种相位，预先计算成表（多相滤波）。
+    每个输出块只需要源信号中对应的一小段，因此源信号可以边读边处理。
+    With a rational rate ratio up/down the kernel has only `up` distinct phases, which are tabulated up front
+    (polyphase filtering). Each output block needs only its own stretch of the source, so the source can be
+    read as it is processed.
+    """
+
+    def __init__(self, source_rate, target_rate):
+        common = math.gcd(int(source_rate), int(target_rate))
+        self.up, self.down = int(target_rate) // common, int(source_rate) // common
+        ratio = self.down / self.up
+        self.cutoff = min(1.0, 1.0 / ratio) * RESAMPLE_ROLLOFF
+        self.half_width = int(np.ceil(RESAMPLE_ZERO_CROSSINGS / self.cutoff))
+        self.taps = np.arange(-self.half_width + 1, self.half_width + 1)
+        self.table = None
+        if self.up <= MAX_POLYPHASE_PHASES:
+            self.table = _resample_kernel(
+                np.arange(self.up)[:, None] / self.up - self.taps[None, :], self.cutoff, self.half_width
+            )
+
+    def iter_blocks(self, fetch, source_length):
+        """
+        逐块产出重采样结果；fetch(start, stop) 返回源信号 [start, stop) 段（范围已限制在信号内）
+        Yield the resampled output block by block; fetch(start, stop) returns source samples [start, stop)
+        (the range is already clamped to the signal)
+        """
+        output_length = (source_length * self.up) // self.down
+        for start in range(0, output_length, RESAMPLE_BLOCK):
+            numerators = np.arange(start, min(start + RESAMPLE_BLOCK, output_length), dtype=np.int64) * self.down
+            base = numerators // self.up
+            indices = base[:, None] + self.taps[None, :]
+
+            # 超出信号范围的部分补零 | Positions outside the signal are zero
+            first, last = int(base[0]) - self.half_width + 1, int(base[-1]) + self.half_width + 1
+            low, high = max(first, 0), min(last, source_length)
+            source = np.zeros(last - first, dtype=np.float32)
+            if high > low:
+                source[low - first : high - first] = fetch(low, high)
+
+            if self.table is not None:
+                kernel = self.table[numerators % self.up]
+            else:
+                kernel = _resample_kernel(numerators[:, None] / self.up - indices, self.cutoff, self.half_width)
+            yield np.einsum("ij,ij->i", source[indices - first], kernel)
+
+
+def resample(samples, source_rate, target_rate):
+    """
+    在内存中重采样整段信号，见 Resampler
+    Resample a whole in-memory signal, see Resampler
+    """
+    if source_rate == target_rate or len(samples) == 0:
+        return samples.astype(np.float32)
+    blocks = list(Resampler(source_rate, target_rate).iter_blocks(lambda start, stop: samples[start:stop], len(samples)))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+def _to_pcm16(samples):
+    return np.round(np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def write_wav16_blocks(path, blocks, sample_rate):
+    """
+    将逐块产出的单声道浮点样本写为16位PCM WAV，返回写入的帧数
+    Write mono float samples produced block by block as a 16-bit PCM WAV, returning the number of frames written
+    """
+    frames = 0
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        for block in blocks:
+            wav_file.writeframes(_to_pcm16(block))
+            frames += len(block)
+    return frames
+
+
+def write_wav16(path, samples, sample_rate):
+    """
+    将单声道浮点样本写为16位PCM WAV
+    Write mono float samples as a 16-bit PCM WAV
+    """
+    write_wav16_blocks(path, [samples], sample_rate)
+
+
+def needs_normalization(path, target_rate=None, trim_silence=False):
+    """
+    判断文件是否是需要处理的WAV（多声道、高于目标采样率、非16位，或需要裁剪静音）
+    Whether the file is a WAV that needs work (multi-channel, above the target rate, not 16-bit, or silence trimming)
+    """
+    target_rate = target_rate or AUDIO_TARGET_SAMPLE_RATE
+    try:
+        with wave.open(path, "rb") as wav_file:
+            return (
+                trim_silence
+                or wav_file.getnchannels() > 1
+                or wav_file.getframerate() > target_rate
+                or wav_file.getsampwidth() != 2
+            )
+    except wave.Error:
+        # 浮点或扩展格式的WAV无法被wave读取，交给 read_wav 判断 | Float/extensible WAVs are left to read_wav
+        return os.path.splitext(path)[1].lower() == ".wav"
+    except (EOFError, OSError):
+        return False
+
+
+def _iter_normalized_blocks(path, info, output_rate):
+    """
+    逐块产出混为单声道并重采样到 output_rate 的样本
+    Yield samples downmixed to mono and resampled to output_rate, block by block
+    """
+    with open(path, "rb") as f:
+
+        def fetch(start, stop):
+            return downmix(read_wav_frames(f, info, start, stop))
+
+        if info.sample_rate == output_rate:
+            for start in range(0, info.frames, WAV_BLOCK_FRAMES):
+                yield fetch(start, start + WAV_BLOCK_FRAMES)
+        else:
+            yield from Resampler(info.sample_rate, output_rate).iter_blocks(fetch, info.frames)
+
+
+def _compact_wav16(staged_path, output_path, collapse_pauses=False):
+    """
+    对16位单声道中间文件做静音检测，只把保留的区间按原始字节复制到输出文件
+    Run voice activity detection over a 16-bit mono staged file and copy only the kept ranges, byte for byte,
+    into the output file
+
+    Returns:
+        tuple: (输出帧数, OffsetMap) | (output frames, OffsetMap)
+    """
+    info = read_wav_info(staged_path)
+    frame_size = vad_frame_size(info.sample_rate)
+    mask = speech_mask(frame_energy_db(staged_path, frame_size, info))
+    kept, offset_map = plan_compaction(mask, frame_size, info.frames, info.sample_rate, collapse_pauses=collapse_pauses)
+
+    frames = 0
+    with open(staged_path, "rb") as source, wave.open(output_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(info.sample_rate)
+        for start, end in kept:
+            for block_start in range(start, end, WAV_BLOCK_FRAMES):
+                block_end = min(block_start + WAV_BLOCK_FRAMES, end)
+                source.seek(info.data_offset + block_start * 2)
+                wav_file.writeframes(source.read((block_end - block_start) * 2))
+            frames += end - start
+    return frames, offset_map
+
+
+def normalize_audio(path, target_rate=None, output_dir=None, trim_silence=False, collapse_pauses=False):
+    """
+    将WAV音频规范化为目标采样率的16位单声道文件，可选裁剪静音和压缩长停顿
+    Normalize WAV audio into a 16-bit mono file at the target sample rate, optionally trimming silence
+    and collapsing long pauses
+
+    音频按固定大小的块读取、重采样和写出，内存占用与文件大小无关。
+    Audio is read, resampled and written in fixed-size blocks, so memory use does not grow with the file.
+
+    Returns:
+        tuple: (输出文件路径, 统计信息, OffsetMap或None)；无需处理时返回 (None, None, None)，调用方负责删除输出文件
+               (output path, stats, OffsetMap or None); (None, None, None) when nothing needs doing,
+               the caller deletes the output file
+    """
+    target_rate = target_rate or AUDIO_TARGET_SAMPLE_RATE
+    if not needs_normalization(path, target_rate, trim_silence):
+        return None, None, None
+
+    start_time = time.time()
+    info = read_wav_info(path)
+    source_rate = info.sample_rate
+    output_rate = min(source_rate, target_rate)
+
+    fd, output_path = tempfile.mkstemp(suffix=".wav", prefix="normalized-", dir=output_dir)
+    os.close(fd)
+    staged_path = None
+    offset_map = None
+    try:
+        if trim_silence:
+            # 静音检测需要完整的能量曲线，先把重采样结果写入中间文件 | VAD needs the whole energy curve, so stage the resampled audio first
+            fd, staged_path = tempfile.mkstemp(suffix=".wav", prefix="resampled-", dir=output_dir)
+            os.close(fd)
+        output_frames = write_wav16_blocks(
+            staged_path or output_path, _iter_normalized_blocks(path, info, output_rate), output_rate
+        )
+        if trim_silence:
+            output_frames, offset_map = _compact_wav16(staged_path, output_path, collapse_pauses)
+    except BaseException:
+        os.remove(output_path)
+        raise
+    finally:
+        if staged_path and os.path.exists(staged_path):
+            os.remove(staged_path)
+
+    original_bytes = os.path.getsize(path)
+    output_bytes = os.path.getsize(output_path)
+    stats = {
+        "file_name": os.path.basename(path),
+        "source_rate": source_rate,
+        "source_channels": info.channels,
+        "target_rate": output_rate,
+        "duration_seconds": round(info.frames / float(source_rate), 3),
+        "output_duration_seconds": round(output_frames / float(output_rate), 3),
+        "original_bytes": original_bytes,
+        "output_bytes": output_bytes,
+        "bytes_saved": original_bytes - output_bytes,
+        "reduction_ratio": round(original_bytes / output_bytes, 2) if output_bytes else None,
+        "processing_seconds": round(time.time() - start_time, 3),
+    }
+    log_transfer_stats("normalize", stats)
+    logger.info(
+        f"音频已规范化: {source_rate} Hz/{info.channels} 声道 → {output_rate} Hz 单声道，{original_bytes} → {output_bytes} 字节 | Audio normalized: {source_rate} Hz/{info.channels} ch → {output_rate} Hz mono, {original_bytes} → {output_bytes} bytes"
+    )
+    return output_path, stats, offset_map
@@ -0,0 +1,461 @@
+"""
+音频探测模块，直接解析容器头得到真实格式、时长、采样率和声道数，无需解码
+Audio probe module, parses container headers directly to get the real format, duration, sample rate
+and channel count without decoding
+
+支持 WAV (RIFF)、FLAC (STREAMINFO)、MP3 (帧扫描及Xing/VBRI头)、Ogg (Opus/Vorbis/FLAC页)、MP4 (atom)、WebM (EBML) 和 AMR。
+Supports WAV (RIFF), FLAC (STREAMINFO), MP3 (frame scan plus Xing/VBRI headers), Ogg (Opus/Vorbis/FLAC pages),
+MP4 (atoms), WebM (EBML) and AMR.
+"""
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from .logger import logger
+
+# 探测时读取的文件头字节数 | Bytes read from the start of the file for probing
+PROBE_HEAD_BYTES = 1024 * 1024
+# Ogg 从文件尾部查找最后一页时读取的字节数 | Bytes read from the end of an Ogg file to find the last page
+OGG_TAIL_BYTES = 64 * 1024
+# 记忆化的探测结果数量上限 | Maximum number of memoized probe results
+PROBE_MEMO_SIZE = 256
+
+# Transcribe批量任务的限制 | Limits of Transcribe batch jobs
+TRANSCRIBE_MAX_DURATION = 4 * 60 * 60
+TRANSCRIBE_MIN_SAMPLE_RATE = 8000
+TRANSCRIBE_MAX_SAMPLE_RATE = 48000
+
+# MP3帧头表 | MP3 frame header tables
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+# AMR每种帧类型的字节数（含1字节帧头），None表示保留值 | AMR frame bytes per frame type (including the header byte), None is reserved
+AMR_NB_FRAME_BYTES = [13, 14, 16, 18, 20, 21, 27, 32, 6, None, None, None, None, None, None, 1]
+AMR_WB_FRAME_BYTES = [18, 24, 33, 37, 41, 47, 51, 59, 61, 6, None, None, None, None, 1, 1]
+AMR_FRAME_SECONDS = 0.02
+
+# WebM/Matroska元素ID | WebM/Matroska element IDs
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_CLUSTER = 0x1F43B675
+MKV_AUDIO_TRACK = 2
+
+# 需要递归进入的MP4容器atom | MP4 container atoms descended into
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+_probe_memo = OrderedDict()
+_probe_memo_lock = threading.Lock()
+
+
+class AudioProbeError(ValueError):
+    """
+    无法识别或不能被Transcribe接受的音频
+    Raised for audio that cannot be recognized or would not be accepted by Transcribe
+    """
+
+
+class AudioInfo:
+    """
+    探测得到的音频信息，未知字段为None
+    Probed audio information, unknown fields are None
+    """
+
+    def __init__(self, media_format, duration=None, sample_rate=None, channels=None):
+        self.media_format = media_format
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def to_dict(self):
+        return {
+            "media_format": self.media_format,
+            "duration": self.duration,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+        }
+
+    def __repr__(self):
+        return (
+            f"AudioInfo({self.media_format}, duration={self.duration}, "
+            f"sample_rate={self.sample_rate}, channels={self.channels})"
+        )
+
+
+def _skip_id3(head):
+    """返回ID3v2标签之后的偏移 | Return the offset past an ID3v2 tag"""
+    if len(head) < 10 or head[:3] != b"ID3":
+        return 0
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _probe_wav(f, head, file_size):
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+    channels = sample_rate = block_align = None
+    offset = 12
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, block_align = struct.unpack("<HHIIH", f.read(14))
+        elif chunk_id == b"data":
+            # 流式写入的WAV数据大小可能为0或0xFFFFFFFF | Streamed WAVs may report a data size of 0 or 0xFFFFFFFF
+            if chunk_size in (0, 0xFFFFFFFF) or offset + 8 + chunk_size > file_size:
+                chunk_size = file_size - offset - 8
+            duration = chunk_size / float(block_align * sample_rate) if block_align and sample_rate else None
+            return AudioInfo("wav", duration, sample_rate, channels)
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return AudioInfo("wav", None, sample_rate, channels)
+
+
+def _parse_streaminfo(block):
+    packed = int.from_bytes(block[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    duration = total_samples / float(sample_rate) if total_samples and sample_rate else None
+    return duration, sample_rate, channels
+
+
+def _probe_flac(head, start):
+    if head[start : start + 4] != b"fLaC" or len(head) < start + 8 + 34:
+        return None
+    if head[start + 4] & 0x7F != 0:
+        raise AudioProbeError("FLAC文件缺少STREAMINFO块 | FLAC file is missing the STREAMINFO block")
+    return AudioInfo("flac", *_parse_streaminfo(head[start + 8 : start + 8 + 34]))
+
+
+def _parse_mp3_header(head, offset):
+    """解析MP3帧头，返回 (版本, 码率, 采样率, 声道数, 帧长, 每帧样本数) | Parse an MP3 frame header"""
+    if offset + 4 > len(head) or head[offset] != 0xFF or head[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((head[offset + 1] >> 3) & 0x3)
+    layer = {1: 3, 2: 2, 3: 1}.get((head[offset + 1] >> 1) & 0x3)
+    bitrate_index = head[offset + 2] >> 4
+    rate_index = (head[offset + 2] >> 2) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (head[offset + 2] >> 1) & 0x1
+    channels = 1 if head[offset + 3] >> 6 == 3 else 2
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return version, bitrate, sample_rate, channels, frame_length, samples_per_frame
+
+
+def _probe_mp3(head, start, file_size):
+    # 要求连续两个有效帧头，避免把数据误认为同步字 | Require two consecutive valid headers to avoid false syncs
+    offset = head.find(b"\xff", start)
+    while True:
+        if offset < 0:
+            return None
+        header = _parse_mp3_header(head, offset)
+        if header is not None:
+            version, bitrate, sample_rate, channels, frame_length, samples_per_frame = header
+            next_frame = offset + frame_length
+            if next_frame + 4 > len(head) or _parse_mp3_header(head, next_frame) is not None:
+                break
+        offset = head.find(b"\xff", offset + 1)
+
+    # VBR文件的Xing/Info或VBRI头记录了总帧数 | The Xing/Info or VBRI header of VBR files records the frame count
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    frames = None
+    xing = offset + 4 + side_info
+    if head[xing : xing + 4] in (b"Xing", b"Info") and struct.unpack(">I", head[xing + 4 : xing + 8])[0] & 0x1:
+        frames = struct.unpack(">I", head[xing + 8 : xing + 12])[0]
+    elif head[offset + 36 : offset + 40] == b"VBRI":
+        frames = struct.unpack(">I", head[offset + 50 : offset + 54])[0]
+
+    if frames:
+        duration = frames * samples_per_frame / float(sample_rate)
+    else:
+        duration = (file_size - offset) * 8 / float(bitrate)
+    return AudioInfo("mp3", duration, sample_rate, channels)
+
+
+def _probe_ogg(f, head, file_size):
+    if head[:4] != b"OggS" or len(head) < 28:
+        return None
+    payload = 27 + head[26]
+    packet = head[payload : payload + 64]
+    serial = head[14:18]
+
+    if packet.startswith(b"OpusHead"):
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        sample_rate = struct.unpack("<I", packet[12:16])[0] or 48000
+        # Opus的granule位置总是48 kHz | Opus granule positions are always at 48 kHz
+        granule_rate, granule_offset = 48000, pre_skip
+    elif packet.startswith(b"\x01vorbis"):
+        channels = packet[11]
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        granule_rate, granule_offset = sample_rate, 0
+    elif packet.startswith(b"\x7fFLAC") and packet[9:13] == b"fLaC":
+        _, sample_rate, channels = _parse_streaminfo(packet[17:51])
+        granule_rate, granule_offset = sample_rate, 0
+    else:
+        return AudioInfo("ogg")
+
+    f.seek(max(0, file_size - OGG_TAIL_BYTES))
+    tail = f.read()
+    position = len(tail)
+    while True:
+        position = tail.rfind(b"OggS", 0, position)
+        if position < 0 or position + 27 > len(tail):
+            return AudioInfo("ogg", None, sample_rate, channels)
+        granule = struct.unpack("<q", tail[position + 6 : position + 14])[0]
+        if tail[position + 14 : position + 18] == serial and granule >= 0:
+            break
+    duration = max(0, granule - granule_offset) / float(granule_rate) if granule_rate else None
+    return AudioInfo("ogg", duration, sample_rate, channels)
+
+
+def _iter_atoms(f, start, end):
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _probe_mp4(f, head, file_size):
+    if head[4:8] not in (b"ftyp", b"moov"):
+        return None
+    movie_duration = None
+    sound = {}
+
+    def walk(start, end, track):
+        nonlocal movie_duration
+        for kind, body, body_end in _iter_atoms(f, start, end):
+            if kind in MP4_CONTAINERS:
+                child = {} if kind == b"trak" else track
+                walk(body, body_end, child)
+                if kind == b"trak" and child.get("handler") == b"soun" and not sound:
+                    sound.update(child)
+            elif kind in (b"mvhd", b"mdhd"):
+                f.seek(body)
+                data = f.read(32)
+                if data[0] == 1:
+                    timescale, duration = struct.unpack(">IQ", data[20:32])
+                else:
+                    timescale, duration = struct.unpack(">II", data[12:20])
+                seconds = duration / float(timescale) if timescale else None
+                if kind == b"mvhd":
+                    movie_duration = seconds
+                else:
+                    track["duration"] = seconds
+            elif kind == b"hdlr":
+                f.seek(body + 8)
+                track["handler"] = f.read(4)
+            elif kind == b"stsd":
+                f.seek(body + 8)
+                entry = f.read(36)
+                if len(entry) == 36:
+                    track["channels"] = struct.unpack(">H", entry[24:26])[0]
+                    track["sample_rate"] = struct.unpack(">I", entry[32:36])[0] >> 16
+
+    walk(0, file_size, {})
+    if movie_duration is None and not sound:
+        return AudioInfo("mp4")
+    if not sound:
+        raise AudioProbeError("MP4文件中没有音频轨道 | MP4 file has no audio track")
+    return AudioInfo("mp4", sound.get("duration") or movie_duration, sound.get("sample_rate"), sound.get("channels"))
+
+
+def _read_vint(data, offset, keep_marker=False):
+    """读取EBML变长整数，返回 (值, 长度)；全1表示未知大小，返回None | Read an EBML variable-length integer"""
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or offset + length > len(data):
+        raise AudioProbeError("EBML数据损坏 | Corrupt EBML data")
+    value = int.from_bytes(data[offset : offset + length], "big")
+    if keep_marker:
+        return value, length
+    value &= (1 << (7 * length)) - 1
+    return (None if value == (1 << (7 * length)) - 1 else value), length
+
+
+def _iter_ebml(data, start, end):
+    offset = start
+    while offset < min(end, len(data)) - 1:
+        element_id, id_length = _read_vint(data, offset, keep_marker=True)
+        size, size_length = _read_vint(data, offset + id_length)
+        body = offset + id_length + size_length
+        body_end = len(data) if size is None else body + size
+        yield element_id, body, min(body_end, len(data))
+        if size is None and element_id != MKV_SEGMENT:
+            return
+        offset = body_end if element_id != MKV_SEGMENT else body
+
+
+def _ebml_number(data, element_id, start, end):
+    raw = data[start:end]
+    if element_id in (MKV_DURATION, MKV_SAMPLING_FREQUENCY):
+        return struct.unpack(">f" if len(raw) == 4 else ">d", raw)[0]
+    return int.from_bytes(raw, "big")
+
+
+def _probe_webm(head):
+    if head[:4] != b"\x1a\x45\xdf\xa3":
+        return None
+    timecode_scale = 1000000
+    duration = sample_rate = channels = None
+    for element_id, body, body_end in _iter_ebml(head, 0, len(head)):
+        if element_id == EBML_HEADER:
+            doc_types = [head[b:e] for i, b, e in _iter_ebml(head, body, body_end) if i == EBML_DOCTYPE]
+            if doc_types and doc_types[0].rstrip(b"\x00") not in (b"webm", b"matroska"):
+                return None
+        elif element_id == MKV_INFO:
+            for child, child_body, child_end in _iter_ebml(head, body, body_end):
+                if child == MKV_TIMECODE_SCALE:
+                    timecode_scale = _ebml_number(head, child, child_body, child_end)
+                elif child == MKV_DURATION:
+                    duration = _ebml_number(head, child, child_body, child_end)
+        elif element_id == MKV_TRACKS:
+            for entry, entry_body, entry_end in _iter_ebml(head, body, body_end):
+                if entry != MKV_TRACK_ENTRY or sample_rate:
+                    continue
+                fields = {child: (child_body, child_end) for child, child_body, child_end in _iter_ebml(head, entry_body, entry_end)}
+                if MKV_TRACK_TYPE in fields and _ebml_number(head, MKV_TRACK_TYPE, *fields[MKV_TRACK_TYPE]) != MKV_AUDIO_TRACK:
+                    continue
+                if MKV_AUDIO in fields:
+                    audio = {child: (b, e) for child, b, e in _iter_ebml(head, *fields[MKV_AUDIO])}
+                    if MKV_SAMPLING_FREQUENCY in audio:
+                        sample_rate = int(_ebml_number(head, MKV_SAMPLING_FREQUENCY, *audio[MKV_SAMPLING_FREQUENCY]))
+                    channels = _ebml_number(head, MKV_CHANNELS, *audio[MKV_CHANNELS]) if MKV_CHANNELS in audio else 1
+        elif element_id == MKV_CLUSTER:
+            break
+    # 浏览器MediaRecorder录制的WebM通常没有Duration | WebM from browser MediaRecorder usually has no Duration
+    seconds = duration * timecode_scale / 1e9 if duration else None
+    return AudioInfo("webm", seconds, sample_rate, channels)
+
+
+def _probe_amr(f, head):
+    if head.startswith(b"#!AMR-WB\n"):
+        frame_bytes, sample_rate, offset = AMR_WB_FRAME_BYTES, 16000, 9
+    elif head.startswith(b"#!AMR\n"):
+        frame_bytes, sample_rate, offset = AMR_NB_FRAME_BYTES, 8000, 6
+    else:
+        return None
+    f.seek(0)
+    data = f.read()
+    frames = 0
+    while offset < len(data):
+        size = frame_bytes[(data[offset] >> 3) & 0xF]
+        if size is None:
+            break
+        offset += size
+        frames += 1
+    return AudioInfo("amr", frames * AMR_FRAME_SECONDS, sample_rate, 1)
+
+
+def _probe(path):
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(PROBE_HEAD_BYTES)
+        start = _skip_id3(head)
+        info = (
+            _probe_wav(f, head, file_size)
+            or _probe_flac(head, start)
+            or _probe_ogg(f, head, file_size)
+            or _probe_mp4(f, head, file_size)
+            or _probe_webm(head)
+            or _probe_amr(f, head)
+            or _probe_mp3(head, start, file_size)
+        )
+    if info is None:
+        raise AudioProbeError(
+            f"无法识别的音频格式: {os.path.basename(path)} | Unrecognized audio format: {os.path.basename(path)}"
+        )
+    return info
+
+
+def probe_audio(path):
+    """
+    探测音频文件，按 (路径, 大小, 修改时间) 记忆化；无法识别时抛出 AudioProbeError
+    Probe an audio file, memoized by (path, size, mtime); raises AudioProbeError when it cannot be recognized
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _probe_memo_lock:
+        if memo_key in _probe_memo:
+            _probe_memo.move_to_end(memo_key)
+            return _probe_memo[memo_key]
+
+    try:
+        info = _probe(path)
+    except (struct.error, IndexError) as e:
+        raise AudioProbeError(f"音频文件头损坏: {str(e)} | Corrupt audio header: {str(e)}")
+
+    with _probe_memo_lock:
+        _probe_memo[memo_key] = info
+        while len(_probe_memo) > PROBE_MEMO_SIZE:
+            _probe_memo.popitem(last=False)
+    return info
+
+
+def validate_audio(path, max_duration=TRANSCRIBE_MAX_DURATION):
+    """
+    在上传前检查音频能否被Transcribe接受，不能时抛出 AudioProbeError
+    Check before upload that Transcribe will accept the audio, raising AudioProbeError when it will not
+
+    Args:
+        path: 音频文件路径
+        max_duration: 时长上限（秒），切分为多个任务的长音频传None
+
+    Returns:
+        AudioInfo: 探测结果
+    """
+    info = probe_audio(path)
+    extension = os.path.splitext(path)[1][1:].lower()
+    if extension and extension != info.media_format and not (extension == "m4a" and info.media_format == "mp4"):
+        logger.warning(
+            f"文件扩展名 .{extension} 与实际格式 {info.media_format} 不符，按实际格式处理 | File extension .{extension} does not match the actual format {info.media_format}, using the actual format"
+        )
+    if info.duration is not None and info.duration <= 0:
+        raise AudioProbeError("音频文件没有内容 | Audio file is empty")
+    if info.duration is not None and max_duration and info.duration > max_duration:
+        raise AudioProbeError(
+            f"音频时长 {info.duration / 3600:.1f} 小时超过 {max_duration / 3600:.1f} 小时的限制 | Audio duration of {info.duration / 3600:.1f} hours exceeds the {max_duration / 3600:.1f}-hour limit"
+        )
+    if info.sample_rate and not TRANSCRIBE_MIN_SAMPLE_RATE <= info.sample_rate <= TRANSCRIBE_MAX_SAMPLE_RATE:
+        raise AudioProbeError(
+            f"不支持的采样率 {info.sample_rate} Hz，Transcribe支持 8-48 kHz | Unsupported sample rate {info.sample_rate} Hz, Transcribe supports 8-48 kHz"
+        )
+    return info
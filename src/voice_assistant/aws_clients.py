@@ -0,0 +1,172 @@
+"""
+AWS客户端工厂模块，负责按需创建并复用带连接池的boto3客户端
+AWS client factory module, responsible for lazily creating and reusing pooled boto3 clients
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+from .config import (
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_CONNECT_TIMEOUT,
+    AWS_READ_TIMEOUT,
+    AWS_RETRY_MODE,
+    AWS_MAX_ATTEMPTS,
+    AWS_ENDPOINT_URL,
+)
+from .logger import logger
+
+
+def get_boto3_session(profile_name=None):
+    """
+    获取boto3会话，支持AWS Profile
+    Get boto3 session, supports AWS Profile
+    """
+    aws_profile = profile_name or os.getenv("AWS_PROFILE")
+    if aws_profile:
+        logger.info(f"使用AWS Profile: {aws_profile} | Using AWS Profile: {aws_profile}")
+        return boto3.Session(profile_name=aws_profile)
+    else:
+        logger.info("使用默认AWS凭证 | Using default AWS credentials")
+        return boto3.Session()
+
+
+def build_client_config(**overrides):
+    """
+    构建带连接池、超时和重试设置的botocore配置
+    Build botocore config with connection pool, timeout and retry settings
+    """
+    settings = {
+        "max_pool_connections": AWS_MAX_POOL_CONNECTIONS,
+        "connect_timeout": AWS_CONNECT_TIMEOUT,
+        "read_timeout": AWS_READ_TIMEOUT,
+        "retries": {"mode": AWS_RETRY_MODE, "max_attempts": AWS_MAX_ATTEMPTS},
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+class ClientRegistry:
+    """
+    线程安全的AWS客户端注册表，按 (服务, 区域, Profile) 懒加载并缓存客户端
+    Thread-safe AWS client registry, lazily creates and caches clients per (service, region, profile)
+
+    boto3会话不是线程安全的，因此会话和客户端的创建都在锁内完成；
+    创建好的客户端本身是线程安全的，可以在Gradio工作线程之间共享。
+    boto3 sessions are not thread-safe, so session and client creation happen under the lock;
+    the created clients are thread-safe and can be shared across Gradio worker threads.
+    """
+
+    def __init__(self, client_config=None, endpoint_overrides=None):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._clients = {}
+        self._client_config = client_config
+        self._endpoint_overrides = dict(endpoint_overrides or {})
+
+    def configure(self, client_config=None, endpoint_overrides=None):
+        """
+        更新客户端配置或端点覆盖，已创建的客户端会被丢弃
+        Update client config or endpoint overrides, already created clients are discarded
+        """
+        with self._lock:
+            if client_config is not None:
+                self._client_config = client_config
+            if endpoint_overrides is not None:
+                self._endpoint_overrides = dict(endpoint_overrides)
+            self._clients.clear()
+
+    def set_endpoint(self, service_name, endpoint_url):
+        """
+        为指定服务设置端点覆盖（例如本地替身服务）
+        Set endpoint override for a service (e.g. a local stand-in)
+        """
+        with self._lock:
+            if endpoint_url:
+                self._endpoint_overrides[service_name] = endpoint_url
+            else:
+                self._endpoint_overrides.pop(service_name, None)
+            self._clients = {
+                key: client
+                for key, client in self._clients.items()
+                if key[0] != service_name
+            }
+
+    def _get_session(self, profile_name):
+        # 调用方必须持有锁 | Caller must hold the lock
+        session = self._sessions.get(profile_name)
+        if session is None:
+            session = get_boto3_session(profile_name)
+            self._sessions[profile_name] = session
+        return session
+
+    def get_session(self, profile_name=None):
+        """
+        获取（并缓存）指定Profile的boto3会话
+        Get (and cache) the boto3 session for a profile
+        """
+        profile_name = profile_name or os.getenv("AWS_PROFILE")
+        with self._lock:
+            return self._get_session(profile_name)
+
+    def get_client(self, service_name, region_name=None, profile_name=None, endpoint_url=None):
+        """
+        获取指定服务的客户端，首次调用时创建
+        Get client for a service, created on first use
+        """
+        profile_name = profile_name or os.getenv("AWS_PROFILE")
+        key = (service_name, region_name, profile_name, endpoint_url)
+
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                session = self._get_session(profile_name)
+                resolved_endpoint = (
+                    endpoint_url
+                    or self._endpoint_overrides.get(service_name)
+                    or AWS_ENDPOINT_URL
+                )
+                client_kwargs = {"config": self._client_config or build_client_config()}
+                if region_name:
+                    client_kwargs["region_name"] = region_name
+                if resolved_endpoint:
+                    client_kwargs["endpoint_url"] = resolved_endpoint
+
+                client = session.client(service_name, **client_kwargs)
+                self._clients[key] = client
+                logger.info(
+                    f"创建AWS客户端: {service_name} (区域: {client.meta.region_name}, 端点: {resolved_endpoint or '默认'}) | Created AWS client: {service_name} (region: {client.meta.region_name}, endpoint: {resolved_endpoint or 'default'})"
+                )
+            return client
+
+    def clear(self):
+        """
+        清除所有缓存的会话和客户端
+        Clear all cached sessions and clients
+        """
+        with self._lock:
+            self._clients.clear()
+            self._sessions.clear()
+
+
+# 进程级客户端注册表 | Process-wide client registry
+client_registry = ClientRegistry()
+
+
+def get_client(service_name, region_name=None, profile_name=None, endpoint_url=None):
+    """
+    从进程级注册表获取AWS客户端
+    Get AWS client from the process-wide registry
+    """
+    return client_registry.get_client(
+        service_name,
+        region_name=region_name,
+        profile_name=profile_name,
+        endpoint_url=endpoint_url,
+    )
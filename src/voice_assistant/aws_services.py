@@ -2,13 +2,13 @@
 AWS服务模块，负责与AWS Transcribe和Bedrock交互
 AWS Services module, responsible for interacting with AWS Transcribe and Bedrock
 """
+import asyncio
 import json
 import time
-import urllib.request
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
-import boto3
 import mimetypes
+from urllib.parse import urlparse, unquote
 
 from .config import (
     S3_BUCKET_NAME,
@@ -17,6 +17,27 @@ from .config import (
     BEDROCK_MODEL_ID,
     BEDROCK_MAX_TOKENS,
     OPTIMIZATION_PROMPT,
+    CACHE_DIR,
+    MODEL_CATALOG_TTL,
+    BEDROCK_ROUTE_CACHE_PERSIST,
+    INFERENCE_PROFILE_REFRESH_INTERVAL,
+    BEDROCK_CHUNKING,
+    BEDROCK_CHUNK_TOKENS,
+    BEDROCK_CHUNK_OVERLAP_TOKENS,
+    BEDROCK_CHUNK_WORKERS,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_DISK,
+    LLM_CACHE_TTL,
+    TRANSCRIPTION_CACHE_ENABLED,
+    TRANSCRIPTION_CACHE_S3_BUCKET,
+    TRANSCRIPTION_CACHE_S3_PREFIX,
+    SINGLE_FLIGHT_ENABLED,
+    TRANSCRIBE_BATCH_POLLING,
+    TRANSCRIBE_OUTPUT_PREFIX,
+    AUDIO_NORMALIZATION_ENABLED,
+    VAD_TRIM_SILENCE,
+    VAD_COLLAPSE_PAUSES,
 )
 
 # 导入日志模块 | Import logging module
@@ -27,91 +48,192 @@ from .logger import (
     log_llm_response,
 )
 
-# 导入输出格式化模块 | Import output formatting module
-from .output_formatter import format_combined_output
-
 # 导入发言者文本提取模块 | Import speaker text extraction module
 from .speaker_text_extractor import extract_speaker_segments
 
-# 初始化AWS客户端 | Initialize AWS clients
-# 支持AWS Profile配置 | Support AWS Profile configuration
-def get_boto3_session():
-    """获取boto3会话，支持AWS Profile"""
-    aws_profile = os.getenv("AWS_PROFILE")
-    if aws_profile:
-        logger.info(f"使用AWS Profile: {aws_profile} | Using AWS Profile: {aws_profile}")
-        return boto3.Session(profile_name=aws_profile)
-    else:
-        logger.info("使用默认AWS凭证 | Using default AWS credentials")
-        return boto3.Session()
+# 导入模型目录缓存模块 | Import model catalog cache module
+from .model_catalog import ModelCatalog, filter_text_models
+
+# 导入转录文本分块模块 | Import transcript chunking module
+from .transcript_chunker import chunk_transcript, estimate_tokens, stitch_chunks
+
+# 导入LLM响应缓存模块 | Import LLM response cache module
+from .response_cache import ResponseCache, LRUCache, SQLiteCache, make_cache_key
+
+# 导入转录结果缓存模块 | Import transcription result cache module
+from .transcription_cache import TranscriptionCache, hash_file
+
+# 导入单飞合并模块 | Import single-flight module
+from .single_flight import SingleFlight
+
+# 导入转录任务轮询模块 | Import transcription job polling module
+from .transcribe_polling import estimate_audio_duration, estimate_job_duration
+# 导入音频探测模块 | Import audio probe module
+from .audio_probe import AudioProbeError, probe_audio, validate_audio, TRANSCRIBE_MAX_DURATION
+
+# 导入转录任务事件模块 | Import transcription job events module
+from .job_events import get_event_listener, job_registry
+
+# 导入转录任务调度模块 | Import transcription job scheduler module
+from .job_scheduler import make_job_name
+
+# 导入批量任务轮询模块 | Import batched job polling module
+from .job_poller import get_job_poller
+
+# 导入音频预处理模块 | Import audio preprocessing module
+from .audio_preprocessing import normalize_audio
+# 导入长音频切分合并模块 | Import long audio split/merge module
+from .long_audio import should_split
+
+# 导入S3传输模块 | Import S3 transfer module
+from .s3_transfer import build_transfer_config, UploadProgress, fetch_object
+
+# 导入区域池模块 | Import regional pool module
+from .regional_pool import regional_pool, is_throttling_error
+
+# 导入Bedrock调用路由模块 | Import Bedrock invocation routing module
+from .bedrock_routing import (
+    RouteCache,
+    InferenceProfileResolver,
+    STATIC_PROFILE_MAPPING,
+    is_inference_profile_id,
+    is_route_error,
+)
+
+# 导入AWS客户端工厂 | Import AWS client factory
+from .aws_clients import get_boto3_session, get_client, client_registry  # noqa: F401
+
+# 兼容旧的模块级客户端属性，首次访问时才创建 | Keep legacy module-level client attributes, created on first access
+_LEGACY_CLIENTS = {
+    "s3_client": "s3",
+    "transcribe_client": "transcribe",
+    "bedrock_client": "bedrock-runtime",
+    "bedrock_management": "bedrock",
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_CLIENTS:
+        return get_client(_LEGACY_CLIENTS[name])
+    if name == "session":
+        return client_registry.get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def list_inference_profiles():
+    """
+    分页获取账户中系统定义的inference profile
+    List the account's system-defined inference profiles, following pagination
+    """
+    bedrock_management = get_client("bedrock")
+    summaries = []
+    kwargs = {"typeEquals": "SYSTEM_DEFINED"}
+    while True:
+        response = bedrock_management.list_inference_profiles(**kwargs)
+        summaries.extend(response.get("inferenceProfileSummaries", []))
+        next_token = response.get("nextToken")
+        if not next_token:
+            return summaries
+        kwargs["nextToken"] = next_token
+
+
+_profile_resolvers = {}
+
+
+def get_profile_resolver():
+    """
+    获取当前区域的inference profile解析器
+    Get the inference profile resolver for the current region
+    """
+    region_name = get_client("bedrock").meta.region_name
+    resolver = _profile_resolvers.get(region_name)
+    if resolver is None:
+        resolver = _profile_resolvers.setdefault(
+            region_name,
+            InferenceProfileResolver(
+                list_inference_profiles,
+                region_name=region_name,
+                refresh_interval=INFERENCE_PROFILE_REFRESH_INTERVAL,
+            ),
+        )
+    return resolver
 
-# 创建AWS客户端 | Create AWS clients
-session = get_boto3_session()
-s3_client = session.client("s3")
-transcribe_client = session.client("transcribe")
-bedrock_client = session.client("bedrock-runtime")
-bedrock_management = session.client("bedrock")
 
 # 模型ID到inference profile ID的映射 | Mapping from model ID to inference profile ID
 def get_inference_profile_id(model_id):
     """
     将模型ID转换为对应的inference profile ID
     Convert model ID to corresponding inference profile ID
+
+    从账户的profile列表中选择与客户端区域匹配的profile（us./eu./apac.等）
+    Picks the profile matching the client region (us./eu./apac. etc.) from the account's profile list
     """
-    # 基础模型ID到inference profile ID的映射
-    model_to_profile_mapping = {
-        # Claude 模型
-        "anthropic.claude-3-5-sonnet-20241022-v2:0": "us.anthropic.claude-3-5-sonnet-20241022-v2:0",
-        "anthropic.claude-3-5-sonnet-20240620-v1:0": "us.anthropic.claude-3-5-sonnet-20240620-v1:0",
-        "anthropic.claude-3-7-sonnet-20250219-v1:0": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-        "anthropic.claude-3-5-haiku-20241022-v1:0": "us.anthropic.claude-3-5-haiku-20241022-v1:0",
-        "anthropic.claude-3-haiku-20240307-v1:0": "us.anthropic.claude-3-haiku-20240307-v1:0",
-        "anthropic.claude-3-opus-20240229-v1:0": "us.anthropic.claude-3-opus-20240229-v1:0",
-        "anthropic.claude-3-sonnet-20240229-v1:0": "us.anthropic.claude-3-sonnet-20240229-v1:0",
-        "anthropic.claude-opus-4-20250514-v1:0": "us.anthropic.claude-opus-4-20250514-v1:0",
-        "anthropic.claude-sonnet-4-20250514-v1:0": "us.anthropic.claude-sonnet-4-20250514-v1:0",
-        
-        # Nova 模型
-        "amazon.nova-pro-v1:0": "us.amazon.nova-pro-v1:0",
-        "amazon.nova-lite-v1:0": "us.amazon.nova-lite-v1:0",
-        "amazon.nova-micro-v1:0": "us.amazon.nova-micro-v1:0",
-        "amazon.nova-premier-v1:0": "us.amazon.nova-premier-v1:0",
-        
-        # Meta Llama 模型
-        "meta.llama3-1-405b-instruct-v1:0": "us.meta.llama3-1-405b-instruct-v1:0",
-        "meta.llama3-1-70b-instruct-v1:0": "us.meta.llama3-1-70b-instruct-v1:0",
-        "meta.llama3-1-8b-instruct-v1:0": "us.meta.llama3-1-8b-instruct-v1:0",
-        
-        # DeepSeek 模型
-        "deepseek.r1-v1:0": "us.deepseek.r1-v1:0",
-    }
-    
-    # 如果有直接映射，返回inference profile ID
-    if model_id in model_to_profile_mapping:
-        return model_to_profile_mapping[model_id]
-    
     # 如果已经是inference profile ID格式，直接返回
-    if model_id.startswith("us."):
+    if is_inference_profile_id(model_id):
         return model_id
-    
+
+    try:
+        profile_id = get_profile_resolver().resolve(model_id)
+    except Exception as e:
+        logger.warning(f"解析inference profile失败: {str(e)} | Failed to resolve inference profile: {str(e)}")
+        profile_id = STATIC_PROFILE_MAPPING.get(model_id)
+
     # 对于其他模型，尝试直接使用（可能支持直接调用）
-    return model_id
+    return profile_id or model_id
 
 
-def try_model_with_fallback(model_id, bedrock_client, messages, inference_config):
+# 进程级模型调用路由缓存 | Process-wide model invocation route cache
+route_cache = RouteCache(
+    persist_path=os.path.join(CACHE_DIR, "bedrock_routes.json") if BEDROCK_ROUTE_CACHE_PERSIST else None
+)
+
+
+def try_model_with_fallback(model_id, bedrock_client, messages, inference_config, operation="converse"):
     """
     尝试使用模型调用，如果失败则尝试inference profile
     Try to call model, fallback to inference profile if failed
+
+    已知可用的调用ID会被缓存，后续调用直接使用，省去一次失败的往返
+    The working invocation ID is cached so later calls use it directly, saving a failed round-trip
+
+    Args:
+        operation: 调用的客户端方法，"converse" 或 "converse_stream"
     """
+    invoke = getattr(bedrock_client, operation)
+
+    # 优先使用已学习的调用路由 | Prefer the learned invocation route
+    cached_id = route_cache.get(model_id)
+    if cached_id:
+        try:
+            logger.debug(f"使用缓存的调用路由: {model_id} -> {cached_id} | Using cached invocation route: {model_id} -> {cached_id}")
+            response = invoke(
+                modelId=cached_id,
+                messages=messages,
+                inferenceConfig=inference_config,
+            )
+            if cached_id != model_id:
+                route_cache.record_saved_round_trips()
+            return response, cached_id
+        except Exception as e:
+            if is_throttling_error(e) or not is_route_error(e):
+                # 限流和请求错误（如输入过长）与路由无关，保留缓存直接抛出，不重新探测
+                # Throttling and request errors (e.g. input too long) do not implicate the route, keep the cache and re-raise without re-probing
+                raise
+            logger.warning(
+                f"缓存的调用路由 {cached_id} 失败，重新探测: {str(e)} | Cached invocation route {cached_id} failed, re-discovering: {str(e)}"
+            )
+            route_cache.invalidate(model_id)
+
     # 首先尝试直接调用模型
     try:
         logger.debug(f"尝试直接调用模型: {model_id} | Trying direct model call: {model_id}")
-        response = bedrock_client.converse(
+        response = invoke(
             modelId=model_id,
             messages=messages,
             inferenceConfig=inference_config,
         )
         logger.info(f"直接模型调用成功: {model_id} | Direct model call successful: {model_id}")
+        route_cache.record(model_id, model_id)
         return response, model_id
     except Exception as e:
         error_str = str(e)
@@ -125,12 +247,13 @@ def try_model_with_fallback(model_id, bedrock_client, messages, inference_config
             if profile_id != model_id:  # 如果有不同的profile ID
                 try:
                     logger.debug(f"尝试使用inference profile: {profile_id} | Trying inference profile: {profile_id}")
-                    response = bedrock_client.converse(
+                    response = invoke(
                         modelId=profile_id,
                         messages=messages,
                         inferenceConfig=inference_config,
                     )
                     logger.info(f"Inference profile调用成功: {profile_id} | Inference profile call successful: {profile_id}")
+                    route_cache.record(model_id, profile_id)
                     return response, profile_id
                 except Exception as profile_error:
                     logger.warning(f"Inference profile {profile_id} 调用也失败: {str(profile_error)} | Inference profile {profile_id} call also failed: {str(profile_error)}")
@@ -145,112 +268,61 @@ def try_model_with_fallback(model_id, bedrock_client, messages, inference_config
 
 
 @log_service_call("list_models")
-def get_available_models():
+def fetch_available_models():
     """
-    获取账户中可用的Claude和Nova系列Bedrock模型列表
-    Get available Claude and Nova series Bedrock models in the account
+    从Bedrock控制面获取Claude和Nova系列文本模型（服务端按输出模态过滤）
+    Fetch Claude and Nova series text models from the Bedrock control plane (server-side output modality filter)
     """
-    try:
-        # 获取所有可用的基础模型 | Get all available foundation models
-        response = bedrock_management.list_foundation_models()
-
-        # 过滤出Claude和Nova系列的文本生成模型 | Filter Claude and Nova series text generation models
-        filtered_models = []
-        for model in response.get("modelSummaries", []):
-            model_id = model.get("modelId", "")
-            model_name = model.get("modelName", "")
-            provider_name = model.get("providerName", "")
-
-            # 只包含支持文本生成的模型 | Only include models that support text generation
-            if model.get("outputModalities", []) == ["TEXT"]:
-                # 检查是否是Claude或Nova系列模型 | Check if it's Claude or Nova series model
-                is_claude = (
-                    "claude" in model_id.lower()
-                    or "claude" in model_name.lower()
-                    or provider_name.lower() == "anthropic"
-                )
+    bedrock_management = get_client("bedrock")
+    response = bedrock_management.list_foundation_models(byOutputModality="TEXT")
+    filtered_models = filter_text_models(response.get("modelSummaries", []))
 
-                is_nova = "nova" in model_id.lower() or "nova" in model_name.lower()
-
-                if is_claude or is_nova:
-                    # 创建友好的显示名称 | Create friendly display name
-                    if is_claude:
-                        # Claude模型的友好名称 | Friendly name for Claude models
-                        if "claude-3-5-sonnet" in model_id.lower():
-                            display_name = "Claude 3.5 Sonnet"
-                        elif "claude-3-sonnet" in model_id.lower():
-                            display_name = "Claude 3 Sonnet"
-                        elif "claude-3-haiku" in model_id.lower():
-                            display_name = "Claude 3 Haiku"
-                        elif "claude-3-opus" in model_id.lower():
-                            display_name = "Claude 3 Opus"
-                        elif "claude-2" in model_id.lower():
-                            display_name = "Claude 2"
-                        else:
-                            display_name = f"Claude - {model_name}"
-                    else:
-                        # Nova模型的友好名称 | Friendly name for Nova models
-                        if "nova-pro" in model_id.lower():
-                            display_name = "Nova Pro"
-                        elif "nova-lite" in model_id.lower():
-                            display_name = "Nova Lite"
-                        elif "nova-micro" in model_id.lower():
-                            display_name = "Nova Micro"
-                        else:
-                            display_name = f"Nova - {model_name}"
-
-                    filtered_models.append(
-                        {
-                            "id": model_id,
-                            "name": display_name,
-                            "provider": provider_name,
-                            "model_name": model_name,
-                        }
-                    )
+    logger.info(
+        f"获取到 {len(filtered_models)} 个可用的Claude和Nova模型 | Got {len(filtered_models)} available Claude and Nova models"
+    )
 
-        # 按模型系列和名称排序：Claude优先，然后是Nova | Sort by model series and name: Claude first, then Nova
-        def sort_key(model):
-            name = model["name"].lower()
-            if "claude" in name:
-                # Claude模型排序：3.5 Sonnet > 3 Opus > 3 Sonnet > 3 Haiku > 2
-                if "3.5 sonnet" in name:
-                    return (0, 0)
-                elif "3 opus" in name:
-                    return (0, 1)
-                elif "3 sonnet" in name:
-                    return (0, 2)
-                elif "3 haiku" in name:
-                    return (0, 3)
-                elif "2" in name:
-                    return (0, 4)
-                else:
-                    return (0, 5)
-            elif "nova" in name:
-                # Nova模型排序：Pro > Lite > Micro
-                if "pro" in name:
-                    return (1, 0)
-                elif "lite" in name:
-                    return (1, 1)
-                elif "micro" in name:
-                    return (1, 2)
-                else:
-                    return (1, 3)
-            else:
-                return (2, 0)
+    # 记录找到的模型 | Log found models
+    for model in filtered_models:
+        logger.debug(
+            f"可用模型: {model['name']} ({model['id']}) | Available model: {model['name']} ({model['id']})"
+        )
 
-        filtered_models.sort(key=sort_key)
+    return filtered_models
 
-        logger.info(
-            f"获取到 {len(filtered_models)} 个可用的Claude和Nova模型 | Got {len(filtered_models)} available Claude and Nova models"
+
+def _model_catalog_path():
+    region = get_client("bedrock").meta.region_name or "default"
+    return os.path.join(CACHE_DIR, f"model_catalog_{region}.json")
+
+
+_model_catalogs = {}
+
+
+def get_model_catalog():
+    """
+    获取当前区域的模型目录缓存
+    Get the model catalog cache for the current region
+    """
+    cache_path = _model_catalog_path()
+    catalog = _model_catalogs.get(cache_path)
+    if catalog is None:
+        catalog = _model_catalogs.setdefault(
+            cache_path,
+            ModelCatalog(fetch_available_models, cache_path=cache_path, ttl=MODEL_CATALOG_TTL),
         )
+    return catalog
 
-        # 记录找到的模型 | Log found models
-        for model in filtered_models:
-            logger.debug(
-                f"可用模型: {model['name']} ({model['id']}) | Available model: {model['name']} ({model['id']})"
-            )
 
-        return filtered_models
+def get_available_models():
+    """
+    获取账户中可用的Claude和Nova系列Bedrock模型列表
+    Get available Claude and Nova series Bedrock models in the account
+
+    优先使用模型目录缓存，过期数据会在后台刷新
+    Served from the model catalog cache, stale data is refreshed in the background
+    """
+    try:
+        return get_model_catalog().get_models()
 
     except Exception as e:
         logger.error(f"获取模型列表失败: {str(e)} | Failed to get model list: {str(e)}")
@@ -289,9 +361,14 @@ def get_file_extension(file_path):
 
 def get_media_format(file_path):
     """
-    根据文件路径确定媒体格式
-    Determine media format based on file path
+    确定媒体格式，优先按文件头识别真实格式，无法识别时按文件路径判断
+    Determine media format, preferring the real format sniffed from the file header and falling back to the file path
     """
+    try:
+        return probe_audio(file_path).media_format
+    except (AudioProbeError, OSError):
+        pass
+
     extension = get_file_extension(file_path)
 
     # 检查是否是支持的格式 | Check if it's a supported format
@@ -313,12 +390,42 @@ def get_media_format(file_path):
     return DEFAULT_AUDIO_FORMAT
 
 
+def build_audio_key(audio_path):
+    """
+    根据音频内容哈希生成S3对象键
+    Build the S3 object key from the audio content hash
+    """
+    return f"audio/{hash_file(audio_path)}.{get_media_format(audio_path)}"
+
+
+def s3_object_exists(s3, bucket_name, s3_key):
+    """
+    检查S3对象是否已存在，无法确认时按不存在处理
+    Check whether an S3 object already exists, treated as missing when it cannot be confirmed
+    """
+    try:
+        s3.head_object(Bucket=bucket_name, Key=s3_key)
+        return True
+    except Exception as e:
+        # 没有ListBucket权限时缺失对象返回403而不是404 | Missing objects return 403 instead of 404 without ListBucket permission
+        if not any(marker in str(e) for marker in ("404", "403", "NoSuchKey", "Not Found", "Forbidden")):
+            logger.warning(f"检查S3对象失败: {str(e)} | Failed to check S3 object: {str(e)}")
+        return False
+
+
 @log_service_call("s3_upload")
-def upload_to_s3(audio_path):
+def upload_to_s3(audio_path, region_name=None, bucket_name=None, progress=None):
     """
     上传音频文件到S3并返回S3 URI
     Upload audio file to S3 and return S3 URI
+
+    Args:
+        audio_path: 本地音频文件路径
+        region_name: S3客户端区域，默认使用会话区域
+        bucket_name: 目标存储桶，默认使用 S3_BUCKET_NAME
+        progress: 可选的进度回调，签名同 gr.Progress，即 progress(fraction, desc=...)
     """
+    bucket_name = bucket_name or S3_BUCKET_NAME
     try:
         # 验证输入参数 | Validate input parameters
         if not audio_path:
@@ -348,7 +455,7 @@ def upload_to_s3(audio_path):
             raise ValueError(error_msg)
 
         # 检查S3存储桶名称是否配置 | Check if S3 bucket name is configured
-        if not S3_BUCKET_NAME:
+        if not bucket_name:
             error_msg = "S3存储桶名称未配置，请检查环境变量 S3_BUCKET_NAME | S3 bucket name not configured, please check environment variable S3_BUCKET_NAME"
             logger.error(error_msg)
             raise ValueError(error_msg)
@@ -370,12 +477,28 @@ def upload_to_s3(audio_path):
             raise ValueError(error_msg)
 
         logger.info(
-            f"开始上传文件 '{file_name}' ({file_size} 字节) 到 S3 存储桶 '{S3_BUCKET_NAME}' | Start uploading file '{file_name}' ({file_size} bytes) to S3 bucket '{S3_BUCKET_NAME}'"
+            f"开始上传文件 '{file_name}' ({file_size} 字节) 到 S3 存储桶 '{bucket_name}' | Start uploading file '{file_name}' ({file_size} bytes) to S3 bucket '{bucket_name}'"
         )
 
-        s3_key = f"audio/{file_name}"
-        s3_client.upload_file(audio_path, S3_BUCKET_NAME, s3_key)
-        s3_uri = f"s3://{S3_BUCKET_NAME}/{s3_key}"
+        # 按内容哈希命名对象，相同音频只上传一次，并发用户也不会互相覆盖
+        # Name objects by content hash so identical audio is uploaded once and concurrent users never overwrite each other
+        s3_key = build_audio_key(audio_path)
+        s3_uri = f"s3://{bucket_name}/{s3_key}"
+        s3 = get_client("s3", region_name=region_name)
+
+        if s3_object_exists(s3, bucket_name, s3_key):
+            logger.info(
+                f"S3中已存在相同内容的音频，跳过上传: {s3_uri} | Audio with identical content already in S3, skipping upload: {s3_uri}"
+            )
+            return s3_uri
+
+        transfer_config, parts = build_transfer_config(file_size)
+        upload_progress = UploadProgress(file_name, file_size, parts=parts, progress=progress)
+        s3.upload_file(audio_path, bucket_name, s3_key, Config=transfer_config, Callback=upload_progress)
+        upload_stats = upload_progress.finish()
+        logger.info(
+            f"上传吞吐量: {upload_stats['bytes_per_second'] / (1024 * 1024):.2f} MB/s, {parts} 个分段 | Upload throughput: {upload_stats['bytes_per_second'] / (1024 * 1024):.2f} MB/s, {parts} parts"
+        )
 
         logger.info(f"文件上传成功: {s3_uri} | File upload successful: {s3_uri}")
         return s3_uri
@@ -392,154 +515,403 @@ def upload_to_s3(audio_path):
             )
         elif "NoSuchBucket" in str(e):
             raise Exception(
-                f"上传到S3失败: S3存储桶 '{S3_BUCKET_NAME}' 不存在 | Upload to S3 failed: S3 bucket '{S3_BUCKET_NAME}' does not exist"
+                f"上传到S3失败: S3存储桶 '{bucket_name}' 不存在 | Upload to S3 failed: S3 bucket '{bucket_name}' does not exist"
             )
         else:
             raise Exception(f"上传到S3失败: {str(e)} | Upload to S3 failed: {str(e)}")
 
 
-@log_service_call("transcribe")
-def transcribe_audio(s3_uri, audio_path, enable_speaker_diarization=False):
+def parse_s3_uri(s3_uri):
+    """
+    将 s3://bucket/key 解析为 (bucket, key)
+    Parse s3://bucket/key into (bucket, key)
+    """
+    bucket, _, key = s3_uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def parse_transcript_location(transcript_uri, default_bucket, default_key):
     """
-    使用AWS Transcribe转录音频并返回转录文本和元数据
-    Transcribe audio using AWS Transcribe and return transcription text and metadata
+    从Transcribe返回的输出URI中解析存储桶和对象键，支持路径风格和虚拟主机风格，无法解析时使用请求的位置
+    Parse bucket and key from the output URI returned by Transcribe, path-style or virtual-hosted,
+    falling back to the requested location
+    """
+    parsed = urlparse(transcript_uri or "")
+    path = unquote(parsed.path.lstrip("/"))
+    host = parsed.netloc
+    if not path:
+        return default_bucket, default_key
+    if host.startswith("s3.") or host.startswith("s3-") or host == "s3.amazonaws.com":
+        bucket, _, key = path.partition("/")
+        return bucket, key
+    if ".s3." in host or ".s3-" in host:
+        return host.split(".s3", 1)[0], path
+    return default_bucket, default_key
+
+
+@log_service_call("transcript_fetch")
+def fetch_transcript(bucket_name, key, region_name=None):
+    """
+    通过连接池中的S3客户端读取转录结果JSON，作为独立阶段记录耗时
+    Read the transcript JSON through the pooled S3 client, timed as its own stage
+    """
+    data = fetch_object(get_client("s3", region_name=region_name), bucket_name, key)
+    logger.info(
+        f"已读取转录结果 s3://{bucket_name}/{key} ({len(data)} 字节) | Fetched transcript s3://{bucket_name}/{key} ({len(data)} bytes)"
+    )
+    return json.loads(data.decode("utf-8"))
+
+
+def build_job_params(s3_uri, audio_path, enable_speaker_diarization=False):
+    """
+    构建转录任务参数并估计任务耗时
+    Build the transcription job parameters and estimate the job duration
+
+    Returns:
+        tuple: (任务参数, 预计耗时秒数) | (job parameters, expected seconds)
+    """
+    # 创建转录任务 | Create transcription job
+    job_name = make_job_name()
+
+    # 确定媒体格式 | Determine media format
+    media_format = get_media_format(audio_path)
+
+    logger.info(
+        f"开始转录任务 {job_name}，媒体格式: {media_format}，发言者划分: {enable_speaker_diarization} | Starting transcription job {job_name}, media format: {media_format}, speaker diarization: {enable_speaker_diarization}"
+    )
+
+    # 构建转录任务参数 | Build transcription job parameters
+    job_params = {
+        "TranscriptionJobName": job_name,
+        "Media": {"MediaFileUri": s3_uri},
+        "MediaFormat": media_format,
+        "IdentifyLanguage": True,  # 启用自动语言识别 | Enable automatic language identification
+        # 结果直接写入音频所在的存储桶，之后通过连接池读取 | Output goes straight to the audio bucket and is read back through the pooled client
+        "OutputBucketName": parse_s3_uri(s3_uri)[0],
+        "OutputKey": f"{TRANSCRIBE_OUTPUT_PREFIX}{job_name}.json",
+    }
+
+    # 如果启用发言者划分，添加相关设置 | If speaker diarization is enabled, add related settings
+    if enable_speaker_diarization:
+        job_params["Settings"] = {
+            "ShowSpeakerLabels": True,
+            "MaxSpeakerLabels": 10,  # 最多识别10个发言者 | Maximum 10 speakers
+        }
+
+    # 按音频时长估计任务耗时，接近完成时再开始轮询 | Estimate job duration from audio length, start polling near the finish
+    expected_seconds = estimate_job_duration(
+        estimate_audio_duration(audio_path, media_format), enable_speaker_diarization
+    )
+    return job_params, expected_seconds
+
+
+def get_completion_sources():
+    """
+    返回任务完成事件监听器和批量轮询器，未启用时为None
+    Return the job completion event listener and batched poller, None when not enabled
+    """
+    listener = get_event_listener(lambda region: get_client("sqs", region_name=region))
+    poller = get_job_poller(lambda region: get_client("transcribe", region_name=region)) if TRANSCRIBE_BATCH_POLLING else None
+    return listener, poller
+
+
+def track_job_completion(job_name, region_name, listener, poller):
+    """
+    注册任务完成future；先于注册到达的完成通知由注册表暂存
+    Register a job completion future; completion signals arriving before registration are kept by the registry
+    """
+    completion = job_registry.register(job_name) if listener or poller else None
+    if poller and not poller.track(job_name, region_name) and not listener:
+        completion = None
+    return completion
+
+
+def release_job_completion(job_name, listener, poller):
+    if listener or poller:
+        job_registry.discard(job_name)
+    if poller:
+        poller.untrack(job_name)
+
+
+def fetch_job_transcript(status, job_params, region_name=None):
+    """
+    检查任务状态并读取转录结果JSON，任务失败时抛出异常
+    Check the job status and read the transcript JSON, raising when the job failed
+    """
+    if status["TranscriptionJob"]["TranscriptionJobStatus"] != "COMPLETED":
+        error_reason = status["TranscriptionJob"].get(
+            "FailureReason", "未知原因 | Unknown reason"
+        )
+        logger.error(f"转录失败: {error_reason} | Transcription failed: {error_reason}")
+        raise Exception(
+            f"转录失败: {error_reason} | Transcription failed: {error_reason}"
+        )
+
+    transcript_uri = status["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]
+
+    # 获取转录结果 | Get transcription result
+    output_bucket, output_key = parse_transcript_location(
+        transcript_uri, job_params["OutputBucketName"], job_params["OutputKey"]
+    )
+    return fetch_transcript(output_bucket, output_key, region_name=region_name)
+
+
+def build_transcription_result(status, transcript_data, enable_speaker_diarization=False):
+    """
+    将任务状态和Transcribe原始JSON整理为转录结果字典
+    Shape the job status and raw Transcribe JSON into the transcription result dict
+
+    Returns:
+        dict: 包含转录文本、识别语言、发言者信息等的字典
+    """
+    # 获取识别的语言 | Get identified language
+    identified_language = status["TranscriptionJob"].get(
+        "LanguageCode", "unknown"
+    )
     
-    Args:
-        s3_uri: S3音频文件URI
-        audio_path: 本地音频文件路径
-        enable_speaker_diarization: 是否启用发言者划分
+    # 获取语言置信度 | Get language confidence
+    language_identification = status["TranscriptionJob"].get(
+        "LanguageIdentification", []
+    )
+    language_confidence = 0.0
+    if language_identification:
+        for lang_info in language_identification:
+            if lang_info.get("LanguageCode") == identified_language:
+                language_confidence = lang_info.get("Score", 0.0)
+                break
+
+    logger.info(
+        f"转录完成，识别的语言: {identified_language} (置信度: {language_confidence:.2f}) | Transcription completed, identified language: {identified_language} (confidence: {language_confidence:.2f})"
+    )
+
+    # 获取基本转录文本 | Get basic transcription text
+    transcript_text = transcript_data["results"]["transcripts"][0]["transcript"]
     
+    # 构建返回结果 | Build return result
+    result = {
+        "transcript": transcript_text,
+        "language_code": identified_language,
+        "language_confidence": language_confidence,
+        "speaker_labels": None,
+        "segments": None
+    }
+
+    # 如枟启用了发言者划分，处理发言者信息 | If speaker diarization is enabled, process speaker information
+    if enable_speaker_diarization:
+        # 使用专门的文本提取模块处理发言者文本 | Use specialized text extraction module to process speaker text
+        speaker_segments = extract_speaker_segments(transcript_data, enable_speaker_diarization)
+        
+        if speaker_segments:
+            result["speaker_labels"] = transcript_data["results"].get("speaker_labels")
+            result["segments"] = speaker_segments
+            
+            logger.info(
+                f"发言者划分完成，识别到 {len(set(seg['speaker'] for seg in speaker_segments))} 个发言者，共 {len(speaker_segments)} 个片段 | Speaker diarization completed, identified {len(set(seg['speaker'] for seg in speaker_segments))} speakers with {len(speaker_segments)} segments"
+            )
+            
+            # 记录每个片段的详细信息用于调试
+            for i, seg in enumerate(speaker_segments[:3]):  # 只记录前3个片段
+                logger.debug(
+                    f"片段 {i+1}: {seg['speaker']} ({seg['start_time']:.1f}s-{seg['end_time']:.1f}s) - '{seg['text'][:50]}...' | Segment {i+1}: {seg['speaker']} ({seg['start_time']:.1f}s-{seg['end_time']:.1f}s) - '{seg['text'][:50]}...'"
+                )
+        else:
+            logger.warning("发言者划分已启用但未能提取到有效的发言者片段 | Speaker diarization enabled but failed to extract valid speaker segments")
+
+    logger.info(
+        f"转录文本长度: {len(transcript_text)} 字符 | Transcription text length: {len(transcript_text)} characters"
+    )
+
+    return result
+
+
+class PipelineStageError(Exception):
+    """
+    带有失败阶段名称的处理流程错误
+    Pipeline error carrying the name of the failed stage
+    """
+
+    def __init__(self, stage, message):
+        super().__init__(message)
+        self.stage = stage
+
+
+# 进程级转录结果缓存 | Process-wide transcription result cache
+transcription_cache = TranscriptionCache(
+    os.path.join(CACHE_DIR, "transcriptions"),
+    s3_bucket=TRANSCRIPTION_CACHE_S3_BUCKET or None,
+    s3_prefix=TRANSCRIPTION_CACHE_S3_PREFIX,
+    s3_client_factory=lambda: get_client("s3"),
+)
+
+
+# 进行中的转录按音频内容和设置合并 | In-flight transcriptions are coalesced by audio content and settings
+transcription_flights = SingleFlight("transcription")
+
+
+def transcription_flight_key(audio_path, audio_hash=None, enable_speaker_diarization=False):
+    """
+    转录单飞键：音频内容哈希 + 转录设置；未启用或不是本地文件时返回None
+    Transcription single-flight key: audio content hash + transcription settings; None when disabled or not a local file
+    """
+    if not SINGLE_FLIGHT_ENABLED or not os.path.isfile(audio_path):
+        return None
+    return make_cache_key("transcription", audio_hash or hash_file(audio_path), bool(enable_speaker_diarization))
+
+
+def preprocess_audio(audio_path):
+    """
+    上传前规范化音频（单声道、16 kHz、16位）并裁剪静音，不需要或失败时返回原文件路径
+    Normalize audio before upload (mono, 16 kHz, 16-bit) and trim silence, returning the original path
+    when not needed or on failure
+
     Returns:
-        dict: 包含转录文本、识别语言、发言者信息等的字典
+        tuple: (上传文件路径, OffsetMap或None)
     """
+    if not AUDIO_NORMALIZATION_ENABLED or not os.path.isfile(audio_path):
+        return audio_path, None
     try:
-        # 创建转录任务 | Create transcription job
-        job_name = f"transcription-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        normalized_path, _, offset_map = normalize_audio(
+            audio_path, trim_silence=VAD_TRIM_SILENCE, collapse_pauses=VAD_COLLAPSE_PAUSES
+        )
+    except Exception as e:
+        logger.warning(f"音频规范化失败，上传原始文件: {str(e)} | Audio normalization failed, uploading the original file: {str(e)}")
+        return audio_path, None
+    return normalized_path or audio_path, offset_map
+
+
+def restore_original_timeline(result, offset_map):
+    """
+    将裁剪静音后得到的转录时间戳换算回原始音频时间轴
+    Translate transcript timestamps obtained from silence-trimmed audio back to the original timeline
+    """
+    if offset_map is None:
+        return result
+    result = dict(result)
+    result["segments"] = offset_map.translate_segments(result.get("segments"))
+    speaker_labels = result.get("speaker_labels")
+    if isinstance(speaker_labels, dict) and speaker_labels.get("segments"):
+        result["speaker_labels"] = dict(
+            speaker_labels, segments=offset_map.translate_segments(speaker_labels["segments"])
+        )
+    return result
 
-        # 确定媒体格式 | Determine media format
-        media_format = get_media_format(audio_path)
 
+def pool_size_hint(upload_path):
+    """
+    区域池延迟归一化用的规模：音频分钟数，任务耗时与时长而非文件大小成正比
+    Size used to normalize regional pool latency: audio minutes, as job time scales with duration rather than file size
+    """
+    duration = estimate_audio_duration(upload_path) if os.path.isfile(upload_path) else None
+    return duration / 60.0 if duration else 1.0
+
+
+def lookup_cached_transcription(audio_path, enable_speaker_diarization=False):
+    """
+    按音频内容哈希查找转录缓存
+    Look up the transcription cache by audio content hash
+
+    Returns:
+        tuple: (音频哈希或None, 缓存结果或None) | (audio hash or None, cached result or None)
+    """
+    if not TRANSCRIPTION_CACHE_ENABLED or not os.path.isfile(audio_path):
+        return None, None
+    audio_hash = hash_file(audio_path)
+    cached_result = transcription_cache.get(audio_hash, enable_speaker_diarization)
+    if cached_result is not None:
         logger.info(
-            f"开始转录任务 {job_name}，媒体格式: {media_format}，发言者划分: {enable_speaker_diarization} | Starting transcription job {job_name}, media format: {media_format}, speaker diarization: {enable_speaker_diarization}"
+            f"命中转录缓存，跳过上传和转录: {audio_hash[:12]} | Transcription cache hit, skipping upload and transcription: {audio_hash[:12]}"
         )
+    return audio_hash, cached_result
 
-        # 构建转录任务参数 | Build transcription job parameters
-        job_params = {
-            "TranscriptionJobName": job_name,
-            "Media": {"MediaFileUri": s3_uri},
-            "MediaFormat": media_format,
-            "IdentifyLanguage": True,  # 启用自动语言识别 | Enable automatic language identification
-        }
 
-        # 如果启用发言者划分，添加相关设置 | If speaker diarization is enabled, add related settings
-        if enable_speaker_diarization:
-            job_params["Settings"] = {
-                "ShowSpeakerLabels": True,
-                "MaxSpeakerLabels": 10,  # 最多识别10个发言者 | Maximum 10 speakers
-            }
+def validate_upload(upload_path):
+    """
+    上传前拒绝无法识别或超出限制的音频，避免浪费上传和排队；返回是否按长音频模式切分
+    Reject unrecognized or out-of-limit audio before the upload and queue; returns whether long-audio mode applies
+    """
+    long_audio = should_split(upload_path)
+    if os.path.isfile(upload_path):
+        try:
+            validate_audio(upload_path, max_duration=None if long_audio else TRANSCRIBE_MAX_DURATION)
+        except AudioProbeError as probe_error:
+            raise PipelineStageError("validate", str(probe_error))
+    return long_audio
 
-        # 启动转录任务 | Start transcription job
-        transcribe_client.start_transcription_job(**job_params)
 
-        # 等待转录完成 | Wait for transcription to complete
-        start_time = time.time()
-        while True:
-            status = transcribe_client.get_transcription_job(
-                TranscriptionJobName=job_name
-            )
-            job_status = status["TranscriptionJob"]["TranscriptionJobStatus"]
+def build_optimization_prompt(text, custom_prompt=None):
+    """
+    构建用于优化文本的提示词
+    Build the prompt used to optimize text
+    """
+    # 如果没有指定自定义提示词，使用默认提示词 | If no custom prompt is specified, use the default prompt
+    if not custom_prompt:
+        return OPTIMIZATION_PROMPT.format(text=text)
+    # 确保自定义提示词中包含{text}占位符 | Ensure custom prompt contains {text} placeholder
+    if "{text}" in custom_prompt:
+        return custom_prompt.format(text=text)
+    # 如果没有占位符，将文本附加到提示词后面 | If no placeholder, append text to the prompt
+    return f"{custom_prompt}\n\n{text}"
 
-            if job_status in ["COMPLETED", "FAILED"]:
-                break
 
-            # 每30秒记录一次等待状态 | Log waiting status every 30 seconds
-            elapsed = time.time() - start_time
-            if int(elapsed) % 30 == 0:
-                logger.info(
-                    f"转录任务 {job_name} 正在进行中，已等待 {int(elapsed)} 秒 | Transcription job {job_name} in progress, waited for {int(elapsed)} seconds"
-                )
+def build_inference_config():
+    """
+    构建Bedrock推理参数
+    Build Bedrock inference parameters
+    """
+    return {
+        "maxTokens": BEDROCK_MAX_TOKENS,
+        "temperature": 0.0,
+        "topP": 1.0,
+    }
 
-            time.sleep(1)
 
-        if status["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED":
-            transcript_uri = status["TranscriptionJob"]["Transcript"][
-                "TranscriptFileUri"
-            ]
+# 进程级LLM响应缓存 | Process-wide LLM response cache
+llm_response_cache = ResponseCache(
+    "llm_responses",
+    LRUCache(LLM_CACHE_MAX_BYTES),
+    SQLiteCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"), LLM_CACHE_TTL) if LLM_CACHE_DISK else None,
+)
 
-            # 获取转录结果 | Get transcription result
-            response = urllib.request.urlopen(transcript_uri)
-            transcript_data = json.loads(response.read().decode("utf-8"))
 
-            # 获取识别的语言 | Get identified language
-            identified_language = status["TranscriptionJob"].get(
-                "LanguageCode", "unknown"
-            )
-            
-            # 获取语言置信度 | Get language confidence
-            language_identification = status["TranscriptionJob"].get(
-                "LanguageIdentification", []
-            )
-            language_confidence = 0.0
-            if language_identification:
-                for lang_info in language_identification:
-                    if lang_info.get("LanguageCode") == identified_language:
-                        language_confidence = lang_info.get("Score", 0.0)
-                        break
+# 进行中的Bedrock调用按提示词合并 | In-flight Bedrock calls are coalesced by prompt
+llm_flights = SingleFlight("llm")
 
-            logger.info(
-                f"转录完成，识别的语言: {identified_language} (置信度: {language_confidence:.2f}) | Transcription completed, identified language: {identified_language} (confidence: {language_confidence:.2f})"
-            )
 
-            # 获取基本转录文本 | Get basic transcription text
-            transcript_text = transcript_data["results"]["transcripts"][0]["transcript"]
-            
-            # 构建返回结果 | Build return result
-            result = {
-                "transcript": transcript_text,
-                "language_code": identified_language,
-                "language_confidence": language_confidence,
-                "speaker_labels": None,
-                "segments": None
-            }
-
-            # 如枟启用了发言者划分，处理发言者信息 | If speaker diarization is enabled, process speaker information
-            if enable_speaker_diarization:
-                # 使用专门的文本提取模块处理发言者文本 | Use specialized text extraction module to process speaker text
-                speaker_segments = extract_speaker_segments(transcript_data, enable_speaker_diarization)
-                
-                if speaker_segments:
-                    result["speaker_labels"] = transcript_data["results"].get("speaker_labels")
-                    result["segments"] = speaker_segments
-                    
-                    logger.info(
-                        f"发言者划分完成，识别到 {len(set(seg['speaker'] for seg in speaker_segments))} 个发言者，共 {len(speaker_segments)} 个片段 | Speaker diarization completed, identified {len(set(seg['speaker'] for seg in speaker_segments))} speakers with {len(speaker_segments)} segments"
-                    )
-                    
-                    # 记录每个片段的详细信息用于调试
-                    for i, seg in enumerate(speaker_segments[:3]):  # 只记录前3个片段
-                        logger.debug(
-                            f"片段 {i+1}: {seg['speaker']} ({seg['start_time']:.1f}s-{seg['end_time']:.1f}s) - '{seg['text'][:50]}...' | Segment {i+1}: {seg['speaker']} ({seg['start_time']:.1f}s-{seg['end_time']:.1f}s) - '{seg['text'][:50]}...'"
-                        )
-                else:
-                    logger.warning("发言者划分已启用但未能提取到有效的发言者片段 | Speaker diarization enabled but failed to extract valid speaker segments")
+def llm_flight_key(model_id, inference_config, prompt):
+    """
+    Bedrock单飞键：(模型ID, 推理参数, 提示词) 的哈希；未启用时返回None
+    Bedrock single-flight key: hash of (model ID, inference config, prompt); None when disabled
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return None
+    return make_cache_key("llm", model_id, inference_config, prompt)
 
-            logger.info(
-                f"转录文本长度: {len(transcript_text)} 字符 | Transcription text length: {len(transcript_text)} characters"
-            )
 
-            return result
-        else:
-            error_reason = status["TranscriptionJob"].get(
-                "FailureReason", "未知原因 | Unknown reason"
-            )
-            logger.error(f"转录失败: {error_reason} | Transcription failed: {error_reason}")
-            raise Exception(
-                f"转录失败: {error_reason} | Transcription failed: {error_reason}"
-            )
+def _is_cacheable(inference_config):
+    # 只有温度为0的确定性调用才缓存 | Only deterministic calls with temperature 0 are cached
+    return LLM_CACHE_ENABLED and inference_config.get("temperature") == 0.0
 
-    except Exception as e:
-        logger.error(f"转录音频失败: {str(e)} | Failed to transcribe audio: {str(e)}")
-        raise Exception(f"转录音频失败: {str(e)} | Failed to transcribe audio: {str(e)}")
+
+def get_cached_response(model_id, inference_config, prompt):
+    """
+    按 (解析后的模型ID, 推理参数, 提示词) 查找缓存的LLM响应
+    Look up a cached LLM response by (resolved model ID, inference config, prompt)
+    """
+    if not _is_cacheable(inference_config):
+        return None
+    resolved_model_id = route_cache.peek(model_id) or model_id
+    return llm_response_cache.get(make_cache_key(resolved_model_id, inference_config, prompt))
+
+
+def store_cached_response(model_id, actual_model_id, inference_config, prompt, result_text):
+    """
+    缓存LLM响应，同时以请求的和实际使用的模型ID为键
+    Cache an LLM response under both the requested and the actually used model ID
+    """
+    if not result_text or not _is_cacheable(inference_config):
+        return
+    for key_model_id in {model_id, actual_model_id}:
+        llm_response_cache.set(make_cache_key(key_model_id, inference_config, prompt), result_text)
 
 
 def optimize_with_bedrock(text, model_id=None, custom_prompt=None):
@@ -552,17 +924,31 @@ def optimize_with_bedrock(text, model_id=None, custom_prompt=None):
         model_id = BEDROCK_MODEL_ID
         logger.info(f"未指定模型，使用默认模型: {model_id} | No model specified, using default model: {model_id}")
 
-    # 如果没有指定自定义提示词，使用默认提示词 | If no custom prompt is specified, use the default prompt
-    if not custom_prompt:
-        prompt = OPTIMIZATION_PROMPT.format(text=text)
-    else:
-        # 确保自定义提示词中包含{text}占位符 | Ensure custom prompt contains {text} placeholder
-        if "{text}" in custom_prompt:
-            prompt = custom_prompt.format(text=text)
-        else:
-            # 如果没有占位符，将文本附加到提示词后面 | If no placeholder, append text to the prompt
-            prompt = f"{custom_prompt}\n\n{text}"
+    prompt = build_optimization_prompt(text, custom_prompt)
+    inference_config = build_inference_config()
+
+    # 命中缓存时跳过Bedrock调用 | Skip the Bedrock call on a cache hit
+    cached_text = get_cached_response(model_id, inference_config, prompt)
+    if cached_text is not None:
+        logger.info(f"命中LLM响应缓存: {model_id} | LLM response cache hit: {model_id}")
+        return cached_text
+
+    # 相同提示词的并发请求共享一次调用 | Concurrent requests with the same prompt share one call
+    return llm_flights.do(
+        llm_flight_key(model_id, inference_config, prompt),
+        converse_uncached,
+        model_id,
+        prompt,
+        inference_config,
+        custom_prompt,
+    )
 
+
+def converse_uncached(model_id, prompt, inference_config, custom_prompt=None):
+    """
+    调用Bedrock converse API并缓存响应
+    Call the Bedrock converse API and cache the response
+    """
     # 记录LLM调用开始 | Record LLM call start
     call_id = log_llm_call(model_id, prompt=prompt, custom_prompt=custom_prompt)
     start_time = time.time()
@@ -574,15 +960,10 @@ def optimize_with_bedrock(text, model_id=None, custom_prompt=None):
 
         # 准备调用参数
         messages = [{"role": "user", "content": [{"text": prompt}]}]
-        inference_config = {
-            "maxTokens": BEDROCK_MAX_TOKENS,
-            "temperature": 0.0,
-            "topP": 1.0,
-        }
 
         # 使用新的fallback机制调用模型
         response, actual_model_id = try_model_with_fallback(
-            model_id, bedrock_client, messages, inference_config
+            model_id, get_client("bedrock-runtime"), messages, inference_config
         )
 
         # 从响应中提取文本 | Extract text from response
@@ -598,7 +979,13 @@ def optimize_with_bedrock(text, model_id=None, custom_prompt=None):
 
         # 记录LLM响应 | Record LLM response
         duration = time.time() - start_time
-        log_llm_response(call_id, result_text, duration)
+        log_llm_response(
+            call_id,
+            result_text,
+            duration,
+            output_tokens=response.get("usage", {}).get("outputTokens"),
+        )
+        store_cached_response(model_id, actual_model_id, inference_config, prompt, result_text)
 
         # 如果实际使用的模型与请求的不同，记录日志
         if actual_model_id != model_id:
@@ -626,104 +1013,423 @@ def optimize_with_bedrock(text, model_id=None, custom_prompt=None):
         )
 
 
-@log_service_call("process_audio")
-def process_audio(audio_file, model_id=None, custom_prompt=None, enable_speaker_diarization=False):
+def optimize_with_bedrock_stream(text, model_id=None, custom_prompt=None):
     """
-    处理音频文件并返回转录和优化结果
-    Process audio file and return transcription and optimization results
-    
-    Args:
-        audio_file: 音频文件
-        model_id: Bedrock模型ID
-        custom_prompt: 自定义提示词
-        enable_speaker_diarization: 是否启用发言者划分
-    
-    Returns:
-        tuple: (转录结果字典, 优化文本, 语言信息, 发言者信息)
+    使用AWS Bedrock的converse_stream API流式优化文本，逐步产出累计的文本
+    Optimize text using AWS Bedrock's converse_stream API, yielding the accumulated text as it arrives
     """
+    # 如果没有指定模型，使用默认模型
+    if not model_id:
+        model_id = BEDROCK_MODEL_ID
+        logger.info(f"未指定模型，使用默认模型: {model_id} | No model specified, using default model: {model_id}")
+
+    prompt = build_optimization_prompt(text, custom_prompt)
+    inference_config = build_inference_config()
+
+    # 命中缓存时直接产出完整结果 | Yield the full result directly on a cache hit
+    cached_text = get_cached_response(model_id, inference_config, prompt)
+    if cached_text is not None:
+        logger.info(f"命中LLM响应缓存: {model_id} | LLM response cache hit: {model_id}")
+        yield cached_text
+        return
+
+    # 相同提示词的并发请求共享一次调用，跟随者得到完整结果 | Concurrent requests with the same prompt share one call, followers get the full result
+    flight = llm_flights.claim(llm_flight_key(model_id, inference_config, prompt))
+    if not flight.leader:
+        yield flight.result
+        return
+
+    result_text = ""
     try:
-        # 增强输入验证 | Enhanced input validation
-        if not audio_file:
-            error_msg = "未提供音频文件 | No audio file provided"
-            logger.warning(error_msg)
-            return f"输入错误: {error_msg} | Input error: {error_msg}", "", "", ""
-
-        # 检查音频文件类型 | Check audio file type
-        if isinstance(audio_file, str):
-            audio_path = audio_file
-        elif hasattr(audio_file, "name"):
-            # Gradio文件对象 | Gradio file object
-            audio_path = audio_file.name
-        else:
-            error_msg = f"不支持的音频文件类型: {type(audio_file)} | Unsupported audio file type: {type(audio_file)}"
-            logger.error(error_msg)
-            return f"输入错误: {error_msg} | Input error: {error_msg}", "", "", ""
+        for result_text in converse_stream_uncached(model_id, prompt, inference_config, custom_prompt):
+            yield result_text
+        flight.resolve(result_text)
+    except Exception as e:
+        flight.reject(e)
+        raise
+    finally:
+        flight.abandon()
 
-        # 验证音频文件路径 | Validate audio file path
-        if not audio_path or audio_path.strip() == "":
-            error_msg = "音频文件路径为空 | Audio file path is empty"
-            logger.warning(error_msg)
-            return f"输入错误: {error_msg} | Input error: {error_msg}", "", "", ""
 
+def converse_stream_uncached(model_id, prompt, inference_config, custom_prompt=None):
+    """
+    调用Bedrock converse_stream API，逐步产出累计的文本并缓存完整响应
+    Call the Bedrock converse_stream API, yielding the accumulated text and caching the full response
+    """
+    # 记录LLM调用开始 | Record LLM call start
+    call_id = log_llm_call(model_id, prompt=prompt, custom_prompt=custom_prompt)
+    start_time = time.time()
+    first_token_time = None
+    output_tokens = None
+    result_text = ""
+
+    try:
         logger.info(
-            f"开始处理音频文件: {audio_path} (类型: {type(audio_file)})，发言者划分: {enable_speaker_diarization} | Start processing audio file: {audio_path} (type: {type(audio_file)}), speaker diarization: {enable_speaker_diarization}"
+            f"开始使用模型 {model_id} 流式优化文本 | Start streaming text optimization using model {model_id}"
         )
 
-        # 检查环境配置 | Check environment configuration
-        if not S3_BUCKET_NAME:
-            error_msg = "S3存储桶名称未配置，请检查 .env 文件中的 S3_BUCKET_NAME | S3 bucket name not configured, please check S3_BUCKET_NAME in .env file"
-            logger.error(error_msg)
-            return f"配置错误: {error_msg} | Configuration error: {error_msg}", "", "", ""
+        messages = [{"role": "user", "content": [{"text": prompt}]}]
+        response, actual_model_id = try_model_with_fallback(
+            model_id,
+            get_client("bedrock-runtime"),
+            messages,
+            inference_config,
+            operation="converse_stream",
+        )
 
-        # 上传到S3 | Upload to S3
-        try:
-            s3_uri = upload_to_s3(audio_path)
-        except Exception as upload_error:
-            logger.error(
-                f"S3上传失败: {str(upload_error)} | S3 upload failed: {str(upload_error)}"
+        for event in response["stream"]:
+            if "contentBlockDelta" in event:
+                delta = event["contentBlockDelta"].get("delta", {}).get("text", "")
+                if not delta:
+                    continue
+                if first_token_time is None:
+                    first_token_time = time.time()
+                result_text += delta
+                yield result_text
+            elif "metadata" in event:
+                output_tokens = event["metadata"].get("usage", {}).get("outputTokens")
+
+        # 记录LLM响应 | Record LLM response
+        duration = time.time() - start_time
+        log_llm_response(
+            call_id,
+            result_text,
+            duration,
+            time_to_first_token=(first_token_time - start_time) if first_token_time else None,
+            output_tokens=output_tokens,
+        )
+        store_cached_response(model_id, actual_model_id, inference_config, prompt, result_text)
+
+        if actual_model_id != model_id:
+            logger.info(
+                f"实际使用的模型: {actual_model_id} (请求的模型: {model_id}) | Actually used model: {actual_model_id} (requested model: {model_id})"
             )
-            return f"上传错误: {str(upload_error)} | Upload error: {str(upload_error)}", "", "", ""
 
-        # 转录音频 | Transcribe audio
+        logger.info(
+            f"流式文本优化完成，响应长度: {len(result_text)} 字符，耗时: {duration:.2f} 秒 | Streaming text optimization completed, response length: {len(result_text)} characters, time taken: {duration:.2f} seconds"
+        )
+        if not result_text:
+            yield "无法获取优化文本 | Unable to get optimized text"
+
+    except Exception as e:
+        # 记录失败的LLM调用 | Record failed LLM call
+        duration = time.time() - start_time
+        log_llm_response(
+            call_id, f"错误: {str(e)} | Error: {str(e)}", duration
+        )
+
+        logger.error(
+            f"使用Bedrock流式优化文本失败: {str(e)} | Failed to stream text optimization using Bedrock: {str(e)}"
+        )
+        raise Exception(
+            f"使用Bedrock优化文本失败: {str(e)} | Failed to optimize text using Bedrock: {str(e)}"
+        )
+
+
+def needs_chunking(text):
+    """
+    判断文本是否超过单次调用的token预算，需要分块优化
+    Check whether text exceeds the single-call token budget and needs chunked optimization
+    """
+    return BEDROCK_CHUNKING and estimate_tokens(text) > BEDROCK_CHUNK_TOKENS
+
+
+def optimization_chunks(text, segments=None):
+    """
+    返回优化时逐块发送的文本：不需要分块时为 [text]，否则与 iter_optimize_with_bedrock_chunked 的切分相同
+    Return the pieces of text sent for optimization: [text] when no chunking is needed, otherwise the same
+    split iter_optimize_with_bedrock_chunked uses
+    """
+    if not needs_chunking(text):
+        return [text]
+    chunks = chunk_transcript(text, BEDROCK_CHUNK_TOKENS, BEDROCK_CHUNK_OVERLAP_TOKENS, segments=segments)
+    return chunks if len(chunks) > 1 else [text]
+
+
+def iter_optimize_with_bedrock_chunked(text, model_id=None, custom_prompt=None, segments=None):
+    """
+    将长文本分块后在有界线程池中并发优化，按顺序逐步产出已拼接的结果
+    Split long text into chunks, optimize them concurrently on a bounded thread pool,
+    and progressively yield the in-order stitched result
+
+    总耗时取决于最慢的块而不是文本总长度；最后产出的是完整结果。
+    Wall-clock time follows the slowest chunk rather than the total length; the last value yielded is the full result.
+    """
+    chunks = chunk_transcript(
+        text, BEDROCK_CHUNK_TOKENS, BEDROCK_CHUNK_OVERLAP_TOKENS, segments=segments
+    )
+    logger.info(
+        f"长文本分为 {len(chunks)} 块并发优化 | Long text split into {len(chunks)} chunks for concurrent optimization"
+    )
+    if len(chunks) <= 1:
+        yield optimize_with_bedrock(text, model_id, custom_prompt)
+        return
+
+    with ThreadPoolExecutor(
+        max_workers=min(BEDROCK_CHUNK_WORKERS, len(chunks)), thread_name_prefix="bedrock-chunk"
+    ) as executor:
+        futures = [
+            executor.submit(optimize_with_bedrock, chunk, model_id, custom_prompt)
+            for chunk in chunks
+        ]
+        outputs = []
         try:
-            transcribe_result = transcribe_audio(s3_uri, audio_path, enable_speaker_diarization)
-        except Exception as transcribe_error:
-            logger.error(
-                f"转录失败: {str(transcribe_error)} | Transcription failed: {str(transcribe_error)}"
-            )
-            return (
-                f"转录错误: {str(transcribe_error)} | Transcription error: {str(transcribe_error)}",
-                "",
-                "",
-                ""
-            )
+            for future in futures:
+                outputs.append(future.result())
+                yield stitch_chunks(outputs)
+        finally:
+            # 出错或调用方停止迭代时取消尚未开始的块 | Cancel chunks not yet started on error or when the caller stops
+            for future in futures:
+                future.cancel()
 
-        # 提取转录文本 | Extract transcription text
-        transcript_text = transcribe_result["transcript"]
-        
-        # 使用新的格式化模块生成优化的输出 | Use new formatting module to generate optimized output
-        language_info, speaker_info = format_combined_output(transcribe_result, enable_speaker_diarization)
 
-        # 使用Bedrock优化 | Optimize using Bedrock
+def optimize_with_bedrock_chunked(text, model_id=None, custom_prompt=None, segments=None):
+    """
+    分块优化长文本并返回拼接后的完整结果
+    Optimize long text in chunks and return the full stitched result
+    """
+    result_text = ""
+    for result_text in iter_optimize_with_bedrock_chunked(text, model_id, custom_prompt, segments):
+        pass
+    return result_text
+
+
+def resolve_audio_input(audio_file, enable_speaker_diarization=False):
+    """
+    校验音频输入和环境配置，返回 (音频路径, 错误输出)；校验通过时错误输出为None
+    Validate the audio input and environment configuration, returning (audio path, error output);
+    the error output is None when validation passes
+    """
+    # 增强输入验证 | Enhanced input validation
+    if not audio_file:
+        error_msg = "未提供音频文件 | No audio file provided"
+        logger.warning(error_msg)
+        return None, (f"输入错误: {error_msg} | Input error: {error_msg}", "", "", "")
+
+    # 检查音频文件类型 | Check audio file type
+    if isinstance(audio_file, str):
+        audio_path = audio_file
+    elif hasattr(audio_file, "name"):
+        # Gradio文件对象 | Gradio file object
+        audio_path = audio_file.name
+    else:
+        error_msg = f"不支持的音频文件类型: {type(audio_file)} | Unsupported audio file type: {type(audio_file)}"
+        logger.error(error_msg)
+        return None, (f"输入错误: {error_msg} | Input error: {error_msg}", "", "", "")
+
+    # 验证音频文件路径 | Validate audio file path
+    if not audio_path or audio_path.strip() == "":
+        error_msg = "音频文件路径为空 | Audio file path is empty"
+        logger.warning(error_msg)
+        return None, (f"输入错误: {error_msg} | Input error: {error_msg}", "", "", "")
+
+    logger.info(
+        f"开始处理音频文件: {audio_path} (类型: {type(audio_file)})，发言者划分: {enable_speaker_diarization} | Start processing audio file: {audio_path} (type: {type(audio_file)}), speaker diarization: {enable_speaker_diarization}"
+    )
+
+    # 检查环境配置 | Check environment configuration
+    if not any(slot.bucket for slot in regional_pool.slots):
+        error_msg = "S3存储桶名称未配置，请检查 .env 文件中的 S3_BUCKET_NAME | S3 bucket name not configured, please check S3_BUCKET_NAME in .env file"
+        logger.error(error_msg)
+        return None, (f"配置错误: {error_msg} | Configuration error: {error_msg}", "", "", "")
+
+    return audio_path, None
+
+
+def stage_error_output(stage_error):
+    """
+    将处理阶段错误转换为界面输出
+    Turn a pipeline stage error into UI output
+    """
+    if stage_error.stage == "validate":
+        logger.warning(f"音频校验失败: {str(stage_error)} | Audio validation failed: {str(stage_error)}")
+        return f"输入错误: {str(stage_error)} | Input error: {str(stage_error)}", "", "", ""
+    if stage_error.stage == "upload":
+        logger.error(
+            f"S3上传失败: {str(stage_error)} | S3 upload failed: {str(stage_error)}"
+        )
+        return f"上传错误: {str(stage_error)} | Upload error: {str(stage_error)}", "", "", ""
+    logger.error(
+        f"转录失败: {str(stage_error)} | Transcription failed: {str(stage_error)}"
+    )
+    return (
+        f"转录错误: {str(stage_error)} | Transcription error: {str(stage_error)}",
+        "",
+        "",
+        ""
+    )
+
+
+def iter_optimized_text(transcript_text, model_id=None, custom_prompt=None, segments=None, stream=True):
+    """
+    产出Bedrock优化文本；stream=True 时逐步产出累计文本，否则只产出最终结果
+    Yield the Bedrock-optimized text; with stream=True the accumulated text is yielded as it grows,
+    otherwise only the final result
+    """
+    if needs_chunking(transcript_text):
+        optimized_text = ""
+        for optimized_text in iter_optimize_with_bedrock_chunked(transcript_text, model_id, custom_prompt, segments):
+            if stream:
+                yield optimized_text
+        if not stream:
+            yield optimized_text
+    elif stream:
+        yield from optimize_with_bedrock_stream(transcript_text, model_id, custom_prompt)
+    else:
+        yield optimize_with_bedrock(transcript_text, model_id, custom_prompt)
+
+
+def bedrock_error_output(bedrock_error, transcript_text, language_info, speaker_info):
+    """
+    优化失败时仍返回转录文本
+    Still return the transcription text when optimization fails
+    """
+    logger.error(
+        f"Bedrock优化失败: {str(bedrock_error)} | Bedrock optimization failed: {str(bedrock_error)}"
+    )
+    return (
+        transcript_text,
+        f"优化错误: {str(bedrock_error)} | Optimization error: {str(bedrock_error)}",
+        language_info,
+        speaker_info
+    )
+
+
+def iterate_blocking(async_iterable):
+    """
+    在调用线程的私有事件循环中推进异步迭代器，作为同步生成器逐项产出
+    Drive an async iterator on a private event loop in the calling thread, yielding its items as a sync generator
+    """
+    loop = asyncio.new_event_loop()
+    iterator = aiter(async_iterable)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(anext(iterator))
+            except StopAsyncIteration:
+                return
+    finally:
+        # 调用方提前停止迭代时也要关闭异步生成器，释放单飞和区域名额 | Close the async generator even when the caller stops early, releasing single-flight and region slots
         try:
-            optimized_text = optimize_with_bedrock(
-                transcript_text, model_id, custom_prompt
-            )
-        except Exception as bedrock_error:
-            logger.error(
-                f"Bedrock优化失败: {str(bedrock_error)} | Bedrock optimization failed: {str(bedrock_error)}"
-            )
-            # 即使优化失败，也返回转录文本 | Even if optimization fails, return transcription text
-            return (
-                transcript_text,
-                f"优化错误: {str(bedrock_error)} | Optimization error: {str(bedrock_error)}",
-                language_info,
-                speaker_info
-            )
+            loop.run_until_complete(iterator.aclose())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
 
-        logger.info("音频处理完成 | Audio processing completed")
-        return transcript_text, optimized_text, language_info, speaker_info
 
-    except Exception as e:
-        logger.error(f"处理音频失败: {str(e)} | Failed to process audio: {str(e)}")
-        return f"处理错误: {str(e)} | Processing error: {str(e)}", "", "", ""
+def run_transcription_job(s3_uri, audio_path, enable_speaker_diarization=False, region_name=None, progress=None):
+    """
+    提交转录任务、等待完成并读取Transcribe原始JSON结果；run_transcription_job_async 的同步入口
+    Submit a transcription job, wait for it and read the raw Transcribe JSON result;
+    synchronous entry point for run_transcription_job_async
+
+    Returns:
+        tuple: (get_transcription_job 响应, 转录结果JSON) | (get_transcription_job response, transcript JSON)
+    """
+    # async_pipeline 依赖本模块，在调用时导入 | async_pipeline depends on this module, so import it at call time
+    from .async_pipeline import run_transcription_job_async
+
+    return asyncio.run(
+        run_transcription_job_async(
+            s3_uri, audio_path, enable_speaker_diarization, region_name=region_name, progress=progress
+        )
+    )
+
+
+def transcribe_audio(s3_uri, audio_path, enable_speaker_diarization=False, region_name=None, progress=None):
+    """
+    使用AWS Transcribe转录音频并返回转录文本和元数据；transcribe_audio_async 的同步入口
+    Transcribe audio using AWS Transcribe and return transcription text and metadata;
+    synchronous entry point for transcribe_audio_async
+
+    Args:
+        s3_uri: S3音频文件URI
+        audio_path: 本地音频文件路径
+        enable_speaker_diarization: 是否启用发言者划分
+        region_name: Transcribe客户端区域，必须与音频所在存储桶的区域一致
+        progress: 可选的进度回调，签名同 gr.Progress
+
+    Returns:
+        dict: 包含转录文本、识别语言、发言者信息等的字典
+    """
+    from .async_pipeline import transcribe_audio_async
+
+    return asyncio.run(
+        transcribe_audio_async(
+            s3_uri, audio_path, enable_speaker_diarization, region_name=region_name, progress=progress
+        )
+    )
+
+
+def transcribe_long_audio(audio_path, enable_speaker_diarization=False, progress=None):
+    """
+    切分长音频并行转录后合并；transcribe_long_audio_async 的同步入口
+    Split long audio, transcribe the chunks in parallel and merge them;
+    synchronous entry point for transcribe_long_audio_async
+
+    Returns:
+        dict: 与 transcribe_audio 相同的转录结果字典
+    """
+    from .async_pipeline import transcribe_long_audio_async
+
+    return asyncio.run(transcribe_long_audio_async(audio_path, enable_speaker_diarization, progress=progress))
+
+
+def upload_and_transcribe(audio_path, enable_speaker_diarization=False, progress=None):
+    """
+    通过区域池上传并转录音频，命中缓存时跳过；upload_and_transcribe_async 的同步入口
+    Upload and transcribe audio through the regional pool, skipping both on a cache hit;
+    synchronous entry point for upload_and_transcribe_async
+
+    Returns:
+        dict: 与 transcribe_audio 相同的转录结果字典
+    """
+    from .async_pipeline import upload_and_transcribe_async
+
+    return asyncio.run(upload_and_transcribe_async(audio_path, enable_speaker_diarization, progress=progress))
+
+
+def iter_process_audio(
+    audio_file, model_id=None, custom_prompt=None, enable_speaker_diarization=False, stream=True, progress=None
+):
+    """
+    处理音频文件，逐步产出 (转录文本, 优化文本, 语言信息, 发言者信息)
+    Process audio file, progressively yielding (transcript, optimized text, language info, speaker info)
+
+    转录完成后立即产出一次；stream=True 时优化文本随Bedrock流式输出不断更新。
+    Yields once as soon as the transcription is ready; with stream=True the optimized text
+    is updated as Bedrock streams it. The last yielded tuple is the final result.
+
+    iter_process_audio_async 的同步入口，流程只在 async_pipeline 中实现一次。
+    Synchronous entry point for iter_process_audio_async; the pipeline is implemented once in async_pipeline.
+    """
+    # async_pipeline 依赖本模块，在调用时导入 | async_pipeline depends on this module, so import it at call time
+    from .async_pipeline import iter_process_audio_async
+
+    yield from iterate_blocking(
+        iter_process_audio_async(
+            audio_file, model_id, custom_prompt, enable_speaker_diarization, stream=stream, progress=progress
+        )
+    )
+
+
+def process_audio(audio_file, model_id=None, custom_prompt=None, enable_speaker_diarization=False):
+    """
+    处理音频文件并返回转录和优化结果
+    Process audio file and return transcription and optimization results
+    
+    Args:
+        audio_file: 音频文件
+        model_id: Bedrock模型ID
+        custom_prompt: 自定义提示词
+        enable_speaker_diarization: 是否启用发言者划分
+    
+    Returns:
+        tuple: (转录结果字典, 优化文本, 语言信息, 发言者信息)
+    """
+    outputs = ("", "", "", "")
+    for outputs in iter_process_audio(
+        audio_file, model_id, custom_prompt, enable_speaker_diarization, stream=False
+    ):
+        pass
+    return outputs
@@ -0,0 +1,488 @@
+"""
+批量处理：对目录或清单中的音频执行 上传→转录→优化，结果写入JSONL，中断后可从断点继续
+Batch processing: run upload → transcribe → optimize over a directory or manifest of audio files,
+writing results as JSONL and resuming where an interrupted run stopped
+
+输出文件同时是检查点：每个文件处理完立即追加一行并刷新，重新运行时跳过已成功的ID，失败的会重试；
+同一ID出现多次时以最后一行为准。
+The output file doubles as the checkpoint: a line is appended and flushed as each file finishes, a rerun
+skips IDs that already succeeded and retries failed ones; when an ID appears more than once the last line wins.
+"""
+import asyncio
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from .async_pipeline import upload_and_transcribe_async
+from .aws_services import PipelineStageError, get_file_extension, iter_optimized_text
+from .bedrock_batch import optimize_batch
+from .config import (
+    SUPPORTED_AUDIO_FORMATS,
+    BATCH_CONCURRENCY,
+    BATCH_PREPARE_CONCURRENCY,
+    BATCH_UPLOAD_CONCURRENCY,
+    BATCH_TRANSCRIBE_CONCURRENCY,
+    BATCH_OPTIMIZE_CONCURRENCY,
+)
+from .logger import logger
+from .transcribe_polling import estimate_audio_duration
+
+# 处理阶段，顺序即报告顺序 | Pipeline stages, in report order
+STAGES = ("prepare", "upload", "transcribe", "optimize")
+
+DEFAULT_STAGE_LIMITS = {
+    "prepare": BATCH_PREPARE_CONCURRENCY,
+    "upload": BATCH_UPLOAD_CONCURRENCY,
+    "transcribe": BATCH_TRANSCRIBE_CONCURRENCY,
+    "optimize": BATCH_OPTIMIZE_CONCURRENCY,
+}
+
+_TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+def _parse_flag(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def collect_directory(directory):
+    """
+    递归收集目录中扩展名受支持的音频，ID为相对路径
+    Recursively collect audio with a supported extension from a directory, using the relative path as ID
+    """
+    items = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if get_file_extension(name) in SUPPORTED_AUDIO_FORMATS:
+                path = os.path.join(root, name)
+                items.append({"id": os.path.relpath(path, directory), "path": os.path.abspath(path)})
+    return items
+
+
+def read_manifest(manifest_path):
+    """
+    读取CSV或JSONL清单，每行需要 path 字段，可选 id、model_id、custom_prompt、speaker_diarization；
+    相对路径相对于清单所在目录
+    Read a CSV or JSONL manifest; each row needs `path` and may carry id, model_id, custom_prompt
+    and speaker_diarization. Relative paths are resolved against the manifest's directory
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if get_file_extension(manifest_path) == "csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items = []
+    for line_number, row in enumerate(rows, 1):
+        path = (row.get("path") or "").strip()
+        if not path:
+            raise ValueError(
+                f"清单第 {line_number} 行缺少 path 字段 | Manifest row {line_number} is missing the path field"
+            )
+        item = {
+            "id": str(row.get("id") or path),
+            "path": path if os.path.isabs(path) else os.path.join(base_dir, path),
+        }
+        for key in ("model_id", "custom_prompt"):
+            if row.get(key):
+                item[key] = row[key]
+        if row.get("speaker_diarization") not in (None, ""):
+            item["speaker_diarization"] = _parse_flag(row["speaker_diarization"])
+        items.append(item)
+    return items
+
+
+def collect_inputs(source):
+    """
+    目录按文件扫描，文件按清单读取；重复ID只保留第一次出现
+    Scan a directory for files or read a file as a manifest; duplicate IDs keep their first occurrence
+    """
+    if os.path.isdir(source):
+        items = collect_directory(source)
+    elif os.path.isfile(source):
+        items = read_manifest(source)
+    else:
+        raise ValueError(f"输入不存在: {source} | Input does not exist: {source}")
+
+    seen = set()
+    unique = []
+    for item in items:
+        if item["id"] not in seen:
+            seen.add(item["id"])
+            unique.append(item)
+    return unique
+
+
+def load_latest_records(output_path):
+    """
+    读取已有输出中每个ID的最后一条记录；中断时写了一半的最后一行会被忽略
+    Read the last record per ID from existing output; a half-written last line from an interrupt is ignored
+    """
+    latest = {}
+    if not os.path.isfile(output_path):
+        return latest
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                latest[record["id"]] = record
+    return latest
+
+
+def load_checkpoint(output_path, offline_optimize=False):
+    """
+    从已有输出中读取已完成的ID；只转录未优化的记录仅在离线优化模式下算作完成，
+    因为该模式会由 optimize_records_offline 补上优化
+    Read the IDs that already finished from existing output; a record that was transcribed but not
+    optimized only counts as finished in offline-optimize mode, where optimize_records_offline picks it up
+
+    Args:
+        offline_optimize: 本次运行是否使用离线批量优化 | Whether this run optimizes offline in batch
+    """
+    return {
+        item_id
+        for item_id, record in load_latest_records(output_path).items()
+        if record.get("status") == "ok" and (offline_optimize or "optimized_text" in record)
+    }
+
+
+def percentile(values, fraction):
+    """
+    最近秩百分位数，空列表返回None
+    Nearest-rank percentile, None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class StageLimiter:
+    """
+    按阶段限制并发并记录每次阶段耗时（不含排队时间）
+    Bound concurrency per stage and record how long each stage run took (excluding time spent queued)
+    """
+
+    def __init__(self, limits):
+        self.semaphores = {stage: asyncio.Semaphore(max(1, limits[stage])) for stage in STAGES}
+        self.timings = {stage: [] for stage in STAGES}
+
+    @asynccontextmanager
+    async def stage(self, name):
+        async with self.semaphores[name]:
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.timings[name].append(time.perf_counter() - started)
+
+
+class ResultWriter:
+    """
+    逐行追加JSONL结果并立即刷新，使输出随时可作为检查点
+    Append JSONL results line by line and flush at once, so the output is a usable checkpoint at any moment
+    """
+
+    def __init__(self, output_path):
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        needs_newline = False
+        if os.path.isfile(output_path) and os.path.getsize(output_path) > 0:
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(output_path, "a", encoding="utf-8")
+        if needs_newline:
+            # 截断的最后一行单独成行，不与新记录拼接 | Keep a truncated last line apart from new records
+            self._file.write("\n")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def optimize_transcript(transcript_text, model_id=None, custom_prompt=None, segments=None):
+    """
+    非流式地优化转录文本，返回最终结果
+    Optimize the transcript without streaming and return the final result
+    """
+    optimized_text = ""
+    for optimized_text in iter_optimized_text(transcript_text, model_id, custom_prompt, segments, stream=False):
+        pass
+    return optimized_text
+
+
+async def process_item(
+    item, limiter, model_id=None, custom_prompt=None, enable_speaker_diarization=False, transcriber=None, optimize=True
+):
+    """
+    处理单个文件，返回要写入的结果记录；失败时记录失败阶段而不抛出
+    Process one file and return the record to write; failures are recorded with their stage instead of raised
+
+    Args:
+        optimize: False 时只转录，留给 optimize_records_offline 通过批量推理优化
+                  When False only transcribe, leaving optimization to optimize_records_offline via batch inference
+    """
+    transcriber = transcriber or upload_and_transcribe_async
+    model_id = item.get("model_id", model_id)
+    custom_prompt = item.get("custom_prompt", custom_prompt)
+    diarization = item.get("speaker_diarization", enable_speaker_diarization)
+    record = {"id": item["id"], "path": item["path"], "status": "error"}
+    # 清单中的逐条设置随记录保存，离线优化时使用 | Per-row manifest settings are kept on the record for offline optimization
+    for key in ("model_id", "custom_prompt"):
+        if key in item:
+            record[key] = item[key]
+    started = time.perf_counter()
+
+    try:
+        record["duration"] = await asyncio.to_thread(estimate_audio_duration, item["path"])
+        try:
+            result = await transcriber(item["path"], diarization, stage_gate=limiter.stage)
+        except PipelineStageError as stage_error:
+            record.update(stage=stage_error.stage, error=str(stage_error))
+            return record
+        record.update(result)
+        if not optimize:
+            record["status"] = "ok"
+            return record
+
+        try:
+            async with limiter.stage("optimize"):
+                record["optimized_text"] = await asyncio.to_thread(
+                    optimize_transcript, result["transcript"], model_id, custom_prompt, result.get("segments")
+                )
+        except Exception as bedrock_error:
+            # 转录结果已进入缓存，重试时只需重新优化 | The transcription is cached, so a retry only redoes optimization
+            record.update(stage="optimize", error=str(bedrock_error))
+            return record
+
+        record["status"] = "ok"
+        return record
+    except Exception as e:
+        record.update(stage=record.get("stage", "process"), error=str(e))
+        return record
+    finally:
+        record["elapsed"] = round(time.perf_counter() - started, 3)
+
+
+def optimize_records_offline(output_path, model_id=None, custom_prompt=None, backend=None):
+    """
+    对输出中已转录但尚未优化的记录提交Bedrock批量推理，并将优化结果作为新行追加
+    Submit Bedrock batch inference for records in the output that are transcribed but not yet optimized,
+    appending the optimized results as new lines
+
+    Returns:
+        tuple: (成功数, 失败数) | (succeeded, failed)
+    """
+    groups = {}
+    for record in load_latest_records(output_path).values():
+        if record.get("status") == "ok" and "optimized_text" not in record:
+            groups.setdefault(record.get("model_id") or model_id, []).append(record)
+    if not groups:
+        return 0, 0
+
+    succeeded = failed = 0
+    writer = ResultWriter(output_path)
+    try:
+        for group_model_id, records in groups.items():
+            results = optimize_batch(
+                [
+                    {
+                        "id": record["id"],
+                        "text": record["transcript"],
+                        "custom_prompt": record.get("custom_prompt"),
+                        "segments": record.get("segments"),
+                    }
+                    for record in records
+                ],
+                group_model_id,
+                custom_prompt,
+                backend=backend,
+            )
+            for record in records:
+                outcome = results[record["id"]]
+                if "optimized_text" in outcome:
+                    writer.write(dict(record, optimized_text=outcome["optimized_text"]))
+                    succeeded += 1
+                else:
+                    # 转录结果已缓存，重新运行时只需再次优化 | The transcription is cached, so a rerun only redoes optimization
+                    writer.write(dict(record, status="error", stage="optimize", error=outcome["error"]))
+                    failed += 1
+    finally:
+        writer.close()
+    return succeeded, failed
+
+
+def build_report(records, timings, elapsed, skipped=0, batch_inference=None):
+    """
+    汇总吞吐量：文件/分钟、音频小时/小时以及各阶段 p50/p95 耗时
+    Summarize throughput: files/min, audio-hours/hour and per-stage p50/p95 latency
+
+    Args:
+        batch_inference: 离线优化时的批量推理耗时和记录数，单独报告而不计入逐文件的阶段耗时
+                         Batch inference wall time and record counts for offline optimization, reported on their
+                         own rather than as a per-file stage
+    """
+    succeeded = [record for record in records if record["status"] == "ok"]
+    audio_seconds = sum(record.get("duration") or 0.0 for record in succeeded)
+    stages = {}
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        stages[stage] = {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+    return {
+        "total": len(records) + skipped,
+        "succeeded": len(succeeded),
+        "failed": len(records) - len(succeeded),
+        "skipped": skipped,
+        "elapsed": elapsed,
+        "files_per_minute": len(succeeded) / (elapsed / 60.0) if elapsed > 0 else 0.0,
+        "audio_hours": audio_seconds / 3600.0,
+        "audio_hours_per_hour": audio_seconds / elapsed if elapsed > 0 else 0.0,
+        "stages": stages,
+        "batch_inference": batch_inference,
+    }
+
+
+def format_report(report):
+    """
+    将吞吐量报告格式化为多行文本
+    Format the throughput report as multi-line text
+    """
+
+    def seconds(value):
+        return "-" if value is None else f"{value:.2f}s"
+
+    lines = [
+        "📊 批量处理报告 | Batch processing report",
+        f"  文件 | Files: {report['total']} "
+        f"(成功 ok {report['succeeded']}, 失败 failed {report['failed']}, 已跳过 skipped {report['skipped']})",
+        f"  耗时 | Elapsed: {report['elapsed']:.1f}s",
+        f"  吞吐量 | Throughput: {report['files_per_minute']:.2f} files/min, "
+        f"{report['audio_hours_per_hour']:.2f} audio-hours/hour ({report['audio_hours']:.2f} audio-hours)",
+        "  阶段耗时 | Stage latency:",
+    ]
+    for stage, stats in report["stages"].items():
+        lines.append(
+            f"    {stage:<10} n={stats['count']:<6} p50={seconds(stats['p50']):<9} p95={seconds(stats['p95'])}"
+        )
+    batch_inference = report.get("batch_inference")
+    if batch_inference:
+        lines.append(
+            f"  批量推理 | Batch inference: {seconds(batch_inference['seconds'])} "
+            f"(成功 ok {batch_inference['succeeded']}, 失败 failed {batch_inference['failed']})"
+        )
+    return "\n".join(lines)
+
+
+async def run_batch_async(
+    items,
+    output_path,
+    model_id=None,
+    custom_prompt=None,
+    enable_speaker_diarization=False,
+    concurrency=BATCH_CONCURRENCY,
+    stage_limits=None,
+    resume=True,
+    transcriber=None,
+    offline_optimize=False,
+    batch_backend=None,
+):
+    """
+    以有限并发处理所有文件并返回吞吐量报告
+    Process all files with bounded concurrency and return the throughput report
+
+    Args:
+        concurrency: 同时在途的文件数 | Files in flight at once
+        stage_limits: 各阶段并发上限，缺省项使用配置值 | Per-stage limits, missing entries use the configured values
+        resume: 是否跳过输出中已成功的ID | Whether to skip IDs that already succeeded in the output
+        offline_optimize: 先转录全部文件，再通过Bedrock批量推理统一优化
+                          Transcribe every file first, then optimize them together through Bedrock batch inference
+        batch_backend: 批量推理后端，默认按配置创建 | Batch inference backend, created from configuration by default
+    """
+    limits = dict(DEFAULT_STAGE_LIMITS, **(stage_limits or {}))
+    # 阻塞的预处理、上传和Bedrock调用都在线程中执行，线程池按阶段上限配置
+    # Blocking preprocessing, upload and Bedrock calls run on threads, so size the pool from the stage limits
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=limits["prepare"] + limits["upload"] + limits["optimize"] + 8)
+    )
+
+    done_ids = load_checkpoint(output_path, offline_optimize) if resume else set()
+    pending = [item for item in items if item["id"] not in done_ids]
+    skipped = len(items) - len(pending)
+    if skipped:
+        logger.info(f"从检查点继续，跳过 {skipped} 个已完成文件 | Resuming from checkpoint, skipping {skipped} finished files")
+
+    limiter = StageLimiter(limits)
+    queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+    records = []
+    writer = ResultWriter(output_path)
+    started = time.perf_counter()
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await process_item(
+                item,
+                limiter,
+                model_id,
+                custom_prompt,
+                enable_speaker_diarization,
+                transcriber=transcriber,
+                optimize=not offline_optimize,
+            )
+            writer.write(record)
+            records.append(record)
+            if record["status"] == "ok":
+                logger.info(f"[{len(records)}/{len(pending)}] 完成 | Done: {item['id']}")
+            else:
+                logger.warning(
+                    f"[{len(records)}/{len(pending)}] 失败 | Failed: {item['id']} ({record.get('stage')}: {record.get('error')})"
+                )
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
+    finally:
+        writer.close()
+
+    batch_inference = None
+    if offline_optimize:
+        # 批量推理是一次整体的等待，单独计时，不作为逐文件的 optimize 阶段 | Batch inference is one collective wait, timed on its own rather than as the per-file optimize stage
+        batch_started = time.perf_counter()
+        succeeded, failed = await asyncio.to_thread(
+            optimize_records_offline, output_path, model_id, custom_prompt, batch_backend
+        )
+        batch_inference = {"seconds": time.perf_counter() - batch_started, "succeeded": succeeded, "failed": failed}
+        # 失败的优化会改写记录状态，报告以追加后的最新记录为准 | Failed optimizations rewrite the record status, so report on the latest records
+        latest = load_latest_records(output_path)
+        records = [latest[record["id"]] for record in records]
+
+    return build_report(
+        records, limiter.timings, time.perf_counter() - started, skipped=skipped, batch_inference=batch_inference
+    )
+
+
+def run_batch(items, output_path, **kwargs):
+    """
+    run_batch_async 的同步入口
+    Synchronous entry point for run_batch_async
+    """
+    return asyncio.run(run_batch_async(items, output_path, **kwargs))
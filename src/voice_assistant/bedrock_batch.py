@@ -0,0 +1,382 @@
+"""
+Bedrock批量推理：将大量转录文本打包为S3上的JSONL输入，提交 create_model_invocation_job，
+等待完成后按记录ID把输出分发回各条来源记录
+Bedrock batch inference: pack many transcripts into a JSONL input in S3, submit a create_model_invocation_job
+and, once it finishes, fan the outputs back to their source records by record ID
+
+批量任务不占用按需调用的 RPM/TPM 配额，适合离线大批量优化；提示词与 optimize_with_bedrock 完全相同，
+结果写入同一个LLM响应缓存。AWS侧通过后端接口访问，测试时使用进程内的本地替身。
+Batch jobs do not count against on-demand RPM/TPM quotas, which suits bulk offline optimization; prompts are
+built exactly as in optimize_with_bedrock and results go into the same LLM response cache. The AWS side sits
+behind a backend interface, with an in-process local stand-in for tests.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .aws_services import (
+    build_inference_config,
+    build_optimization_prompt,
+    get_cached_response,
+    get_client,
+    needs_chunking,
+    optimization_chunks,
+    optimize_with_bedrock,
+    optimize_with_bedrock_chunked,
+    store_cached_response,
+)
+from .config import (
+    S3_BUCKET_NAME,
+    BEDROCK_MODEL_ID,
+    BEDROCK_CHUNK_WORKERS,
+    BEDROCK_BATCH_ROLE_ARN,
+    BEDROCK_BATCH_BUCKET,
+    BEDROCK_BATCH_PREFIX,
+    BEDROCK_BATCH_MIN_RECORDS,
+    BEDROCK_BATCH_MAX_RECORDS,
+    BEDROCK_BATCH_POLL_INTERVAL,
+    BEDROCK_BATCH_TIMEOUT,
+)
+from .job_scheduler import make_job_name
+from .logger import logger
+from .transcript_chunker import stitch_chunks
+
+# 批量推理任务的终态 | Terminal states of a batch inference job
+SUCCEEDED_STATUSES = ("Completed", "PartiallyCompleted")
+FAILED_STATUSES = ("Failed", "Stopped", "Expired")
+
+# Anthropic原生请求体的版本 | Version of the Anthropic native request body
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+
+def build_model_input(model_id, prompt, inference_config):
+    """
+    按模型系列构建原生调用请求体；批量推理不支持 converse 格式
+    Build the native invocation body for the model family; batch inference does not accept the converse format
+    """
+    if "anthropic." in model_id:
+        return {
+            "anthropic_version": ANTHROPIC_VERSION,
+            "max_tokens": inference_config["maxTokens"],
+            "temperature": inference_config["temperature"],
+            "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+        }
+    if "nova" in model_id:
+        return {
+            "schemaVersion": "messages-v1",
+            "messages": [{"role": "user", "content": [{"text": prompt}]}],
+            "inferenceConfig": {
+                "maxTokens": inference_config["maxTokens"],
+                "temperature": inference_config["temperature"],
+                "topP": inference_config["topP"],
+            },
+        }
+    raise ValueError(
+        f"批量推理暂不支持该模型: {model_id} | Batch inference does not support this model yet: {model_id}"
+    )
+
+
+def parse_model_output(model_output):
+    """
+    从Anthropic或Nova的原生响应中提取文本
+    Extract the text from an Anthropic or Nova native response
+    """
+    if "content" in model_output:
+        content = model_output["content"]
+    else:
+        content = model_output.get("output", {}).get("message", {}).get("content", [])
+    return "".join(item.get("text", "") for item in content)
+
+
+def make_record_id(index):
+    # 批量推理要求记录ID为11位字母数字 | Batch inference expects 11-character alphanumeric record IDs
+    return f"{index:011d}"
+
+
+class AWSBatchInferenceBackend:
+    """
+    通过S3和Bedrock控制面运行批量推理任务
+    Run batch inference jobs through S3 and the Bedrock control plane
+    """
+
+    def __init__(self, bedrock_factory, s3_factory, bucket, prefix, role_arn):
+        self.bedrock_factory = bedrock_factory
+        self.s3_factory = s3_factory
+        self.bucket = bucket
+        self.prefix = prefix
+        self.role_arn = role_arn
+
+    def submit(self, job_name, model_id, lines):
+        """
+        上传JSONL输入并提交任务，返回任务ARN
+        Upload the JSONL input and submit the job, returning the job ARN
+        """
+        input_key = f"{self.prefix}{job_name}/input/records.jsonl"
+        body = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode("utf-8")
+        self.s3_factory().put_object(Bucket=self.bucket, Key=input_key, Body=body)
+        response = self.bedrock_factory().create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{self.bucket}/{input_key}", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{self.bucket}/{self.prefix}{job_name}/output/"}},
+        )
+        return response["jobArn"]
+
+    def status(self, job_id):
+        """
+        返回 (状态, 说明) | Return (status, message)
+        """
+        job = self.bedrock_factory().get_model_invocation_job(jobIdentifier=job_id)
+        return job["status"], job.get("message", "")
+
+    def results(self, job_id):
+        """
+        读取任务输出，逐条产出 (记录ID, 文本或None, 错误或None)
+        Read the job output, yielding (record ID, text or None, error or None) per record
+        """
+        job = self.bedrock_factory().get_model_invocation_job(jobIdentifier=job_id)
+        output_uri = job["outputDataConfig"]["s3OutputDataConfig"]["s3Uri"]
+        output_prefix = output_uri[len(f"s3://{self.bucket}/"):].rstrip("/") + "/" + job_id.rsplit("/", 1)[-1] + "/"
+
+        s3 = self.s3_factory()
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=output_prefix):
+            for entry in page.get("Contents", []):
+                # manifest.json.out 是统计信息，不是记录 | manifest.json.out holds statistics, not records
+                if not entry["Key"].endswith(".jsonl.out"):
+                    continue
+                body = s3.get_object(Bucket=self.bucket, Key=entry["Key"])["Body"].read().decode("utf-8")
+                for line in body.splitlines():
+                    if line.strip():
+                        yield parse_output_line(json.loads(line))
+
+
+def parse_output_line(output):
+    """
+    将一行批量推理输出解析为 (记录ID, 文本或None, 错误或None)
+    Parse one line of batch inference output into (record ID, text or None, error or None)
+    """
+    error = output.get("error")
+    if error:
+        message = error.get("errorMessage", str(error)) if isinstance(error, dict) else str(error)
+        return output.get("recordId"), None, message
+    return output.get("recordId"), parse_model_output(output.get("modelOutput", {})), None
+
+
+class LocalBatchInferenceBackend:
+    """
+    在进程内立即完成任务的本地替身，用于测试和离线开发
+    Local stand-in that completes jobs in-process right away, for tests and offline development
+
+    Args:
+        respond: 以 (模型ID, 提示词) 调用并返回文本的函数，抛出异常表示该记录失败；默认原样返回提示词
+                 Called with (model ID, prompt) and returning text, raising marks the record as failed;
+                 echoes the prompt by default
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda model_id, prompt: prompt)
+        self.jobs = {}
+        self.submitted = []
+
+    def submit(self, job_name, model_id, lines):
+        job_id = f"local/{job_name}"
+        self.submitted.append((job_name, model_id, lines))
+        outputs = []
+        for line in lines:
+            prompt = line["modelInput"]["messages"][0]["content"][0]["text"]
+            try:
+                outputs.append((line["recordId"], self.respond(model_id, prompt), None))
+            except Exception as e:
+                outputs.append((line["recordId"], None, str(e)))
+        self.jobs[job_id] = outputs
+        return job_id
+
+    def status(self, job_id):
+        return "Completed", ""
+
+    def results(self, job_id):
+        return iter(self.jobs[job_id])
+
+
+def get_batch_backend():
+    """
+    按配置创建AWS批量推理后端
+    Create the AWS batch inference backend from configuration
+    """
+    bucket = BEDROCK_BATCH_BUCKET or S3_BUCKET_NAME
+    if not BEDROCK_BATCH_ROLE_ARN or not bucket:
+        raise ValueError(
+            "批量推理需要配置 BEDROCK_BATCH_ROLE_ARN 和 S3存储桶 | "
+            "Batch inference requires BEDROCK_BATCH_ROLE_ARN and an S3 bucket"
+        )
+    return AWSBatchInferenceBackend(
+        lambda: get_client("bedrock"), lambda: get_client("s3"), bucket, BEDROCK_BATCH_PREFIX, BEDROCK_BATCH_ROLE_ARN
+    )
+
+
+def wait_for_batch_job(backend, job_id, poll_interval=BEDROCK_BATCH_POLL_INTERVAL, timeout=BEDROCK_BATCH_TIMEOUT,
+                       sleep=time.sleep, clock=time.time):
+    """
+    轮询直到任务进入终态，返回 (状态, 说明)；超时抛出 TimeoutError
+    Poll until the job reaches a terminal state and return (status, message); raises TimeoutError on timeout
+    """
+    deadline = clock() + timeout
+    while True:
+        status, message = backend.status(job_id)
+        if status in SUCCEEDED_STATUSES or status in FAILED_STATUSES:
+            return status, message
+        if clock() >= deadline:
+            raise TimeoutError(f"批量推理任务超时: {job_id} | Batch inference job timed out: {job_id}")
+        logger.debug(f"批量推理任务状态: {status} | Batch inference job status: {status}")
+        sleep(poll_interval)
+
+
+def optimize_on_demand(pending, model_id):
+    """
+    记录太少不值得提交批量任务时，逐条按需调用；长文本与在线处理一样分块优化
+    Optimize record by record on demand when there are too few records for a batch job; long text is
+    chunked just like online processing
+    """
+
+    def optimize(entry):
+        try:
+            if needs_chunking(entry["text"]):
+                text = optimize_with_bedrock_chunked(entry["text"], model_id, entry["custom_prompt"], entry.get("segments"))
+            else:
+                text = optimize_with_bedrock(entry["text"], model_id, entry["custom_prompt"])
+            return entry["id"], {"optimized_text": text}
+        except Exception as e:
+            return entry["id"], {"error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, BEDROCK_CHUNK_WORKERS)) as executor:
+        return dict(executor.map(optimize, pending))
+
+
+def split_into_jobs(pending):
+    """
+    将待优化记录均匀拆分为不超过单任务上限的若干块，避免最后一块低于批量推理下限
+    Split the pending records evenly into blocks within the per-job maximum, so the last block
+    never falls below the batch minimum
+    """
+    job_count = -(-len(pending) // BEDROCK_BATCH_MAX_RECORDS)
+    size, extra = divmod(len(pending), job_count)
+    blocks, start = [], 0
+    for index in range(job_count):
+        end = start + size + (1 if index < extra else 0)
+        blocks.append(pending[start:end])
+        start = end
+    return blocks
+
+
+def optimize_batch(records, model_id=None, custom_prompt=None, backend=None, **wait_kwargs):
+    """
+    通过批量推理优化多条转录文本
+    Optimize many transcripts through batch inference
+
+    长文本按与在线处理相同的规则分块，每块作为一条批量记录提交，完成后按来源ID拼接。
+    Long text is chunked by the same rules as online processing, each chunk is submitted as its own batch
+    record, and the outputs are stitched back together per source ID.
+
+    Args:
+        records: [{"id", "text", 可选 "custom_prompt", "segments"}] | [{"id", "text", optional "custom_prompt", "segments"}]
+        backend: 批量推理后端，默认按配置创建AWS后端 | Batch backend, the configured AWS backend by default
+        wait_kwargs: 传给 wait_for_batch_job 的参数 | Passed to wait_for_batch_job
+
+    Returns:
+        dict: 来源ID → {"optimized_text": 文本} 或 {"error": 错误信息}
+    """
+    model_id = model_id or BEDROCK_MODEL_ID
+    inference_config = build_inference_config()
+    results = {}
+    sources = {}
+    # 来源ID → 每块的结果，缓存命中的块直接填入 | Source ID → per-chunk outcomes, cache hits are filled in right away
+    parts = {}
+    pending = []
+
+    for record in records:
+        prompt_template = record.get("custom_prompt") or custom_prompt
+        sources[record["id"]] = {
+            "id": record["id"],
+            "text": record["text"],
+            "custom_prompt": prompt_template,
+            "segments": record.get("segments"),
+        }
+        chunks = optimization_chunks(record["text"], record.get("segments"))
+        parts[record["id"]] = [None] * len(chunks)
+        for index, chunk in enumerate(chunks):
+            prompt = build_optimization_prompt(chunk, prompt_template)
+            cached_text = get_cached_response(model_id, inference_config, prompt)
+            if cached_text is not None:
+                parts[record["id"]][index] = {"optimized_text": cached_text}
+            else:
+                pending.append({"id": record["id"], "chunk": index, "prompt": prompt})
+
+    if len(pending) < BEDROCK_BATCH_MIN_RECORDS:
+        if pending:
+            logger.info(
+                f"待优化记录 {len(pending)} 条，少于批量推理下限，改为按需调用 | "
+                f"{len(pending)} records to optimize, below the batch minimum, using on-demand calls"
+            )
+            # 按需调用以整条记录为单位，已缓存的块在其中直接命中 | On-demand works per record, cached chunks hit the cache inside it
+            pending_ids = list(dict.fromkeys(entry["id"] for entry in pending))
+            results.update(optimize_on_demand([sources[source_id] for source_id in pending_ids], model_id))
+    else:
+        run_batch_jobs(pending, parts, model_id, inference_config, backend or get_batch_backend(), **wait_kwargs)
+
+    for source_id, outcomes in parts.items():
+        if source_id in results:
+            continue
+        errors = [outcome["error"] for outcome in outcomes if "error" in outcome]
+        if errors:
+            results[source_id] = {"error": errors[0]}
+        elif len(outcomes) == 1:
+            results[source_id] = outcomes[0]
+        else:
+            results[source_id] = {"optimized_text": stitch_chunks([outcome["optimized_text"] for outcome in outcomes])}
+    return results
+
+
+def run_batch_jobs(pending, parts, model_id, inference_config, backend, **wait_kwargs):
+    """
+    提交批量任务并等待完成，把每条输出写回 parts[来源ID][块序号]
+    Submit the batch jobs, wait for them and write each output back into parts[source ID][chunk index]
+    """
+    jobs = []
+    for entries in split_into_jobs(pending):
+        by_record_id = {make_record_id(index): entry for index, entry in enumerate(entries)}
+        lines = [
+            {"recordId": record_id, "modelInput": build_model_input(model_id, entry["prompt"], inference_config)}
+            for record_id, entry in by_record_id.items()
+        ]
+        job_id = backend.submit(make_job_name("va-optimize"), model_id, lines)
+        logger.info(
+            f"已提交批量推理任务 {job_id}，共 {len(lines)} 条 | Submitted batch inference job {job_id} with {len(lines)} records"
+        )
+        jobs.append((job_id, by_record_id))
+
+    # 所有任务先提交再等待，多个任务并行执行 | Submit every job before waiting so they run in parallel
+    for job_id, by_record_id in jobs:
+        status, message = wait_for_batch_job(backend, job_id, **wait_kwargs)
+        if status in FAILED_STATUSES:
+            logger.error(f"批量推理任务失败 {job_id}: {status} {message} | Batch inference job failed {job_id}: {status} {message}")
+            for entry in by_record_id.values():
+                parts[entry["id"]][entry["chunk"]] = {"error": f"{status}: {message}"}
+            continue
+
+        for record_id, text, error in backend.results(job_id):
+            entry = by_record_id.get(record_id)
+            if entry is None:
+                continue
+            if error:
+                parts[entry["id"]][entry["chunk"]] = {"error": error}
+            else:
+                parts[entry["id"]][entry["chunk"]] = {"optimized_text": text}
+                store_cached_response(model_id, model_id, inference_config, entry["prompt"], text)
+
+        for entry in by_record_id.values():
+            if parts[entry["id"]][entry["chunk"]] is None:
+                parts[entry["id"]][entry["chunk"]] = {
+                    "error": "批量推理输出中缺少该记录 | Record missing from batch inference output"
+                }
@@ -0,0 +1,315 @@
+"""
+Bedrock调用路由模块，负责记住每个模型实际可用的调用ID（模型ID或inference profile ID）
+Bedrock invocation routing module, remembers which invocation ID (model ID or inference profile ID) works for each model
+"""
+import json
+import os
+import threading
+import time
+
+from .logger import logger
+
+
+class RouteCache:
+    """
+    进程级调用路由缓存，可选持久化到JSON文件
+    Process-wide invocation route cache, optionally persisted to a JSON file
+
+    命中缓存的请求直接使用已知可用的ID，跳过会失败的直接调用；
+    缓存路由调用失败时会失效，下次重新探测。
+    Cache hits go straight to the known working ID and skip the failing direct call;
+    a route is invalidated when a call through it fails and is re-discovered next time.
+    """
+
+    def __init__(self, persist_path=None):
+        self.persist_path = persist_path
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "round_trips_saved": 0}
+        self._load()
+
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                self._routes = dict(json.load(f))
+            logger.info(f"加载 {len(self._routes)} 条模型调用路由 | Loaded {len(self._routes)} model invocation routes")
+        except Exception as e:
+            logger.warning(f"读取调用路由缓存失败: {str(e)} | Failed to read route cache: {str(e)}")
+
+    def _save(self):
+        # 调用方必须持有锁 | Caller must hold the lock
+        if not self.persist_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._routes, f)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"写入调用路由缓存失败: {str(e)} | Failed to write route cache: {str(e)}")
+
+    def get(self, model_id):
+        """
+        获取模型已知可用的调用ID，未知时返回None
+        Get the known working invocation ID for a model, None if unknown
+        """
+        with self._lock:
+            route = self._routes.get(model_id)
+            if route is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+            return route
+
+    def peek(self, model_id):
+        """
+        查看已知的调用ID，不计入命中统计
+        Look up the known invocation ID without counting towards hit statistics
+        """
+        with self._lock:
+            return self._routes.get(model_id)
+
+    def record(self, model_id, invocation_id):
+        """
+        记录模型可用的调用ID
+        Record the working invocation ID for a model
+        """
+        with self._lock:
+            if self._routes.get(model_id) != invocation_id:
+                self._routes[model_id] = invocation_id
+                self._save()
+
+    def record_saved_round_trips(self, count=1):
+        with self._lock:
+            self._stats["round_trips_saved"] += count
+
+    def invalidate(self, model_id):
+        """
+        使模型的调用路由失效
+        Invalidate the invocation route for a model
+        """
+        with self._lock:
+            if self._routes.pop(model_id, None) is not None:
+                self._stats["invalidations"] += 1
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+            self._save()
+
+    def stats(self):
+        """
+        获取命中、未命中、失效和节省的往返次数统计
+        Get hit, miss, invalidation and saved round-trip counters
+        """
+        with self._lock:
+            return dict(self._stats, routes=len(self._routes))
+
+
+# 表明调用路由本身不可用的错误标记，只有这些错误才使缓存的路由失效
+# Error markers implicating the invocation route itself, only these invalidate a cached route
+ROUTE_ERROR_MARKERS = (
+    "on-demand throughput isn't supported",
+    "inference profile",
+    "AccessDeniedException",
+    "ResourceNotFoundException",
+    "model identifier is invalid",
+)
+
+
+def is_route_error(error):
+    """
+    判断异常是否说明调用路由不可用，而不是请求本身有误（如输入过长）
+    Check whether an exception implicates the invocation route rather than the request itself (e.g. input too long)
+    """
+    error_str = str(error)
+    return any(marker in error_str for marker in ROUTE_ERROR_MARKERS)
+
+
+# Inference profile ID 的地理前缀 | Geographic prefixes of inference profile IDs
+PROFILE_GEO_PREFIXES = ("us", "us-gov", "eu", "apac", "ca", "jp", "au", "global")
+
+# 区域前缀到profile地理前缀的映射 | Mapping from region prefix to profile geographic prefix
+REGION_GEO_MAPPING = {
+    "us-gov": "us-gov",
+    "us": "us",
+    "eu": "eu",
+    "ap": "apac",
+    "ca": "ca",
+}
+
+# 无法获取账户profile列表时使用的静态映射 | Static mapping used when the account's profiles cannot be listed
+STATIC_PROFILE_MAPPING = {
+    # Claude 模型
+    "anthropic.claude-3-5-sonnet-20241022-v2:0": "us.anthropic.claude-3-5-sonnet-20241022-v2:0",
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": "us.anthropic.claude-3-5-sonnet-20240620-v1:0",
+    "anthropic.claude-3-7-sonnet-20250219-v1:0": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+    "anthropic.claude-3-5-haiku-20241022-v1:0": "us.anthropic.claude-3-5-haiku-20241022-v1:0",
+    "anthropic.claude-3-haiku-20240307-v1:0": "us.anthropic.claude-3-haiku-20240307-v1:0",
+    "anthropic.claude-3-opus-20240229-v1:0": "us.anthropic.claude-3-opus-20240229-v1:0",
+    "anthropic.claude-3-sonnet-20240229-v1:0": "us.anthropic.claude-3-sonnet-20240229-v1:0",
+    "anthropic.claude-opus-4-20250514-v1:0": "us.anthropic.claude-opus-4-20250514-v1:0",
+    "anthropic.claude-sonnet-4-20250514-v1:0": "us.anthropic.claude-sonnet-4-20250514-v1:0",
+
+    # Nova 模型
+    "amazon.nova-pro-v1:0": "us.amazon.nova-pro-v1:0",
+    "amazon.nova-lite-v1:0": "us.amazon.nova-lite-v1:0",
+    "amazon.nova-micro-v1:0": "us.amazon.nova-micro-v1:0",
+    "amazon.nova-premier-v1:0": "us.amazon.nova-premier-v1:0",
+
+    # Meta Llama 模型
+    "meta.llama3-1-405b-instruct-v1:0": "us.meta.llama3-1-405b-instruct-v1:0",
+    "meta.llama3-1-70b-instruct-v1:0": "us.meta.llama3-1-70b-instruct-v1:0",
+    "meta.llama3-1-8b-instruct-v1:0": "us.meta.llama3-1-8b-instruct-v1:0",
+
+    # DeepSeek 模型
+    "deepseek.r1-v1:0": "us.deepseek.r1-v1:0",
+}
+
+
+def split_profile_id(profile_id):
+    """
+    将inference profile ID拆分为 (地理前缀, 基础模型ID)，不是profile ID时地理前缀为None
+    Split an inference profile ID into (geo prefix, base model ID), geo prefix is None for non-profile IDs
+    """
+    if profile_id.startswith("arn:"):
+        profile_id = profile_id.split("/")[-1]
+    prefix, _, rest = profile_id.partition(".")
+    if rest and prefix in PROFILE_GEO_PREFIXES:
+        return prefix, rest
+    return None, profile_id
+
+
+def is_inference_profile_id(model_id):
+    """
+    判断ID是否已经是inference profile ID（任意地理前缀或ARN）
+    Check whether an ID is already an inference profile ID (any geo prefix or ARN)
+    """
+    return ":inference-profile/" in model_id or split_profile_id(model_id)[0] is not None
+
+
+def region_to_geo(region_name):
+    """
+    将AWS区域映射为inference profile地理前缀
+    Map an AWS region to an inference profile geographic prefix
+    """
+    region_name = region_name or ""
+    for region_prefix, geo in REGION_GEO_MAPPING.items():
+        if region_name.startswith(f"{region_prefix}-"):
+            return geo
+    return None
+
+
+def build_profile_index(profile_summaries):
+    """
+    从 list_inference_profiles 的结果构建 基础模型ID -> {地理前缀: profile ID} 索引
+    Build a base model ID -> {geo prefix: profile ID} index from list_inference_profiles results
+    """
+    index = {}
+    for summary in profile_summaries:
+        profile_id = summary.get("inferenceProfileId", "")
+        geo, base_model_id = split_profile_id(profile_id)
+        if not geo:
+            continue
+        base_ids = {base_model_id}
+        for model in summary.get("models", []):
+            model_arn = model.get("modelArn", "")
+            if "foundation-model/" in model_arn:
+                base_ids.add(model_arn.split("foundation-model/")[-1])
+        for base_id in base_ids:
+            index.setdefault(base_id, {})[geo] = profile_id
+    return index
+
+
+class InferenceProfileResolver:
+    """
+    基于账户实际profile列表的inference profile解析器
+    Inference profile resolver based on the account's actual profile list
+
+    首次使用时同步加载一次，之后过期数据在后台刷新；加载失败时退回静态映射。
+    Loads once synchronously on first use, then refreshes stale data in the background;
+    falls back to the static mapping when loading fails.
+    """
+
+    def __init__(self, loader, region_name=None, refresh_interval=3600):
+        self.loader = loader
+        self.region_name = region_name
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._index = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    def refresh(self):
+        """
+        同步重新加载账户的inference profile列表
+        Synchronously reload the account's inference profile list
+        """
+        index = build_profile_index(self.loader())
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.time()
+        logger.info(
+            f"加载了 {len(index)} 个模型的inference profile | Loaded inference profiles for {len(index)} models"
+        )
+        return index
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"inference profile后台刷新失败: {str(e)} | Inference profile background refresh failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, name="inference-profile-refresh", daemon=True).start()
+
+    def _get_index(self):
+        with self._lock:
+            index, loaded_at = self._index, self._loaded_at
+        if index is None:
+            try:
+                return self.refresh()
+            except Exception as e:
+                logger.warning(
+                    f"获取inference profile列表失败，使用静态映射: {str(e)} | Failed to list inference profiles, using static mapping: {str(e)}"
+                )
+                # 记录失败时间，避免每次调用都重试 | Record the failure time to avoid retrying on every call
+                with self._lock:
+                    self._index = {}
+                    self._loaded_at = time.time()
+                return {}
+        if time.time() - loaded_at > self.refresh_interval:
+            self._refresh_in_background()
+        return index
+
+    def resolve(self, model_id):
+        """
+        将基础模型ID解析为与客户端区域匹配的inference profile ID，找不到时返回None
+        Resolve a base model ID to the inference profile ID matching the client region, None if not found
+        """
+        profiles = self._get_index().get(model_id)
+        geo = region_to_geo(self.region_name)
+        if not profiles:
+            static_id = STATIC_PROFILE_MAPPING.get(model_id)
+            # 静态映射只有us前缀，按客户端区域替换 | The static mapping only has us profiles, adapt to the client region
+            if static_id and geo and geo != "us":
+                return f"{geo}.{model_id}"
+            return static_id
+
+        for candidate in (geo, "global"):
+            if candidate and candidate in profiles:
+                return profiles[candidate]
+        # 没有匹配区域的profile时任选一个 | Pick any profile when none matches the region
+        return next(iter(profiles.values()))
@@ -11,6 +11,100 @@ load_dotenv()
 # AWS配置 | AWS configuration
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
+# AWS客户端连接池和重试配置 | AWS client connection pool and retry configuration
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "10"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "120"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+# 可选的端点覆盖，用于本地替身服务 | Optional endpoint override for local stand-in services
+AWS_ENDPOINT_URL = os.getenv("AWS_ENDPOINT_URL")
+
+# S3分段上传：启用阈值、最小分段大小（字节）、最大并发数和目标分段数 | S3 multipart upload: threshold, minimum part size (bytes), max concurrency and target part count
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+S3_MULTIPART_MIN_PART_SIZE = int(os.getenv("S3_MULTIPART_MIN_PART_SIZE", str(8 * 1024 * 1024)))
+S3_MULTIPART_MAX_CONCURRENCY = int(os.getenv("S3_MULTIPART_MAX_CONCURRENCY", "10"))
+S3_MULTIPART_TARGET_PARTS = int(os.getenv("S3_MULTIPART_TARGET_PARTS", "40"))
+# 超过该大小的对象使用并行范围GET读取（字节） | Objects above this size are read with parallel ranged GETs (bytes)
+S3_RANGED_GET_THRESHOLD = int(os.getenv("S3_RANGED_GET_THRESHOLD", str(16 * 1024 * 1024)))
+# 转录任务输出写入音频存储桶的前缀 | Prefix under which transcription jobs write their output into the audio bucket
+TRANSCRIBE_OUTPUT_PREFIX = os.getenv("TRANSCRIBE_OUTPUT_PREFIX", "transcripts/")
+
+# 多区域转录配置，格式: "us-east-1=bucket-a,us-west-2=bucket-b" | Multi-region transcription, format: "us-east-1=bucket-a,us-west-2=bucket-b"
+TRANSCRIBE_REGIONS = os.getenv("TRANSCRIBE_REGIONS", "")
+# 每个区域的Transcribe并发任务配额 | Transcribe concurrent job quota per region
+TRANSCRIBE_MAX_CONCURRENT_JOBS = int(os.getenv("TRANSCRIBE_MAX_CONCURRENT_JOBS", "100"))
+# 超出配额时每个区域最多排队的请求数、最长排队时间（秒）和LimitExceeded的最大重试次数
+# Maximum queued requests per region over the quota, maximum queue wait (s) and max retries on LimitExceeded
+TRANSCRIBE_MAX_QUEUED_JOBS = int(os.getenv("TRANSCRIBE_MAX_QUEUED_JOBS", "200"))
+TRANSCRIBE_QUEUE_TIMEOUT = float(os.getenv("TRANSCRIBE_QUEUE_TIMEOUT", "600"))
+TRANSCRIBE_SUBMIT_MAX_RETRIES = int(os.getenv("TRANSCRIBE_SUBMIT_MAX_RETRIES", "6"))
+# 区域被限流后降低优先级的秒数 | Seconds a throttled region is deprioritized
+REGION_THROTTLE_COOLDOWN = float(os.getenv("REGION_THROTTLE_COOLDOWN", "60"))
+
+# 转录任务轮询：固定开销（秒）、处理耗时与音频时长之比、退避间隔上下限（秒）和最长等待时间（秒）
+# Transcription job polling: fixed overhead (s), processing time per audio second, backoff bounds (s) and max wait (s)
+TRANSCRIBE_JOB_OVERHEAD = float(os.getenv("TRANSCRIBE_JOB_OVERHEAD", "15"))
+TRANSCRIBE_REALTIME_FACTOR = float(os.getenv("TRANSCRIBE_REALTIME_FACTOR", "0.35"))
+TRANSCRIBE_POLL_MIN_INTERVAL = float(os.getenv("TRANSCRIBE_POLL_MIN_INTERVAL", "2"))
+TRANSCRIBE_POLL_MAX_INTERVAL = float(os.getenv("TRANSCRIBE_POLL_MAX_INTERVAL", "30"))
+TRANSCRIBE_POLL_TIMEOUT = float(os.getenv("TRANSCRIBE_POLL_TIMEOUT", str(4 * 3600)))
+
+# 转录任务完成事件：EventBridge → SQS 队列URL，或本地文件队列目录；启用事件时的兜底轮询间隔（秒）
+# Transcription job completion events: EventBridge → SQS queue URL or a local file-queue directory; fallback poll interval (s) with events
+TRANSCRIBE_EVENTS_QUEUE_URL = os.getenv("TRANSCRIBE_EVENTS_QUEUE_URL", "")
+TRANSCRIBE_EVENTS_DIR = os.getenv("TRANSCRIBE_EVENTS_DIR", "")
+TRANSCRIBE_EVENT_FALLBACK_INTERVAL = float(os.getenv("TRANSCRIBE_EVENT_FALLBACK_INTERVAL", "120"))
+
+# 由一个后台线程批量轮询所有进行中的转录任务，及其轮询间隔（秒） | Batch-poll all in-flight transcription jobs from one background thread, and its interval (s)
+TRANSCRIBE_BATCH_POLLING = os.getenv("TRANSCRIBE_BATCH_POLLING", "true").lower() == "true"
+TRANSCRIBE_BATCH_POLL_INTERVAL = float(os.getenv("TRANSCRIBE_BATCH_POLL_INTERVAL", "5"))
+
+# 实时转录：语言代码，或逗号分隔的候选语言（启用自动识别） | Live transcription: language code, or comma-separated candidate languages (enables identification)
+TRANSCRIBE_STREAMING_LANGUAGE = os.getenv("TRANSCRIBE_STREAMING_LANGUAGE", "en-US")
+TRANSCRIBE_STREAMING_LANGUAGE_OPTIONS = os.getenv("TRANSCRIBE_STREAMING_LANGUAGE_OPTIONS", "")
+
+# 本地缓存目录 | Local cache directory
+CACHE_DIR = os.getenv(
+    "VOICE_ASSISTANT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+)
+# 模型目录缓存有效期（秒） | Model catalog cache TTL (seconds)
+MODEL_CATALOG_TTL = int(os.getenv("MODEL_CATALOG_TTL", "3600"))
+
+# 转录结果缓存，可选共享S3层 | Transcription result cache with optional shared S3 tier
+TRANSCRIPTION_CACHE_ENABLED = os.getenv("TRANSCRIPTION_CACHE_ENABLED", "true").lower() == "true"
+TRANSCRIPTION_CACHE_S3_BUCKET = os.getenv("TRANSCRIPTION_CACHE_S3_BUCKET", "")
+TRANSCRIPTION_CACHE_S3_PREFIX = os.getenv("TRANSCRIPTION_CACHE_S3_PREFIX", "transcription-cache/")
+# 合并相同音频/提示词的进行中请求，只执行一次转录和Bedrock调用 | Coalesce in-flight requests for the same audio/prompt into one transcription and Bedrock call
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# 上传前音频规范化（单声道、重采样、16位PCM）及目标采样率 | Pre-upload audio normalization (mono, resample, 16-bit PCM) and target sample rate
+AUDIO_NORMALIZATION_ENABLED = os.getenv("AUDIO_NORMALIZATION_ENABLED", "false").lower() == "true"
+AUDIO_TARGET_SAMPLE_RATE = int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000"))
+
+# 基于语音活动检测裁剪首尾静音，可选压缩超过 VAD_MAX_PAUSE 秒的停顿为 VAD_KEEP_PAUSE 秒
+# Trim leading/trailing silence with voice activity detection, optionally collapse pauses over VAD_MAX_PAUSE seconds to VAD_KEEP_PAUSE seconds
+VAD_TRIM_SILENCE = os.getenv("VAD_TRIM_SILENCE", "true").lower() == "true"
+VAD_COLLAPSE_PAUSES = os.getenv("VAD_COLLAPSE_PAUSES", "false").lower() == "true"
+VAD_MAX_PAUSE = float(os.getenv("VAD_MAX_PAUSE", "2.0"))
+VAD_KEEP_PAUSE = float(os.getenv("VAD_KEEP_PAUSE", "0.5"))
+# 帧长、语音结束后的拖尾时长（毫秒）和最低能量阈值（dBFS） | Frame length, hangover after speech (ms) and minimum energy threshold (dBFS)
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", "-50"))
+
+# 长音频在静音处切分并行转录：超过 LONG_AUDIO_MIN_DURATION 秒时按 LONG_AUDIO_CHUNK_SECONDS 切分，最多 LONG_AUDIO_MAX_CHUNKS 段
+# Long audio is split at silences and transcribed in parallel: above LONG_AUDIO_MIN_DURATION seconds it is cut into
+# LONG_AUDIO_CHUNK_SECONDS pieces, at most LONG_AUDIO_MAX_CHUNKS of them
+LONG_AUDIO_ENABLED = os.getenv("LONG_AUDIO_ENABLED", "true").lower() == "true"
+LONG_AUDIO_MIN_DURATION = float(os.getenv("LONG_AUDIO_MIN_DURATION", "900"))
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "300"))
+LONG_AUDIO_MAX_CHUNKS = int(os.getenv("LONG_AUDIO_MAX_CHUNKS", "8"))
+# 相邻片段的重叠时长和在理想切点附近寻找静音的范围（秒） | Overlap between neighbouring chunks and the range searched for silence around each ideal cut (seconds)
+LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("LONG_AUDIO_OVERLAP_SECONDS", "10"))
+LONG_AUDIO_SEARCH_SECONDS = float(os.getenv("LONG_AUDIO_SEARCH_SECONDS", "30"))
+
 # Transcribe支持的音频格式 | Audio formats supported by Transcribe
 SUPPORTED_AUDIO_FORMATS = ["mp3", "mp4", "wav", "flac", "ogg", "amr", "webm"]
 DEFAULT_AUDIO_FORMAT = "wav"
@@ -18,6 +112,41 @@ DEFAULT_AUDIO_FORMAT = "wav"
 # Bedrock模型配置 | Bedrock model configuration
 BEDROCK_MODEL_ID = "anthropic.claude-3-5-sonnet-20241022-v2:0"  # 默认使用Claude 3.5 Sonnet
 BEDROCK_MAX_TOKENS = 1000
+# 长文本分块优化：每块输入token预算、块间重叠和并发数 | Chunked optimization for long text: per-chunk input token budget, overlap and concurrency
+BEDROCK_CHUNKING = os.getenv("BEDROCK_CHUNKING", "true").lower() == "true"
+BEDROCK_CHUNK_TOKENS = int(os.getenv("BEDROCK_CHUNK_TOKENS", "700"))
+BEDROCK_CHUNK_OVERLAP_TOKENS = int(os.getenv("BEDROCK_CHUNK_OVERLAP_TOKENS", "60"))
+BEDROCK_CHUNK_WORKERS = int(os.getenv("BEDROCK_CHUNK_WORKERS", "4"))
+# LLM响应缓存：内存上限（字节）、可选SQLite磁盘层及其有效期（秒） | LLM response cache: memory limit (bytes), optional SQLite disk tier and its TTL (seconds)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_DISK = os.getenv("LLM_CACHE_DISK", "false").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# 是否在界面中流式显示Bedrock输出 | Whether to stream Bedrock output in the UI
+BEDROCK_STREAMING = os.getenv("BEDROCK_STREAMING", "true").lower() == "true"
+# 界面上同时处理的音频请求数上限；处理流程是异步的，等待转录时不占用线程 | Maximum audio requests processed at once by the UI; the pipeline is async and holds no thread while transcription is pending
+UI_PROCESS_CONCURRENCY = int(os.getenv("UI_PROCESS_CONCURRENCY", "200"))
+# 批量处理同时在途的文件数，以及预处理、上传、转录、优化各阶段的并发上限 | Files in flight during batch processing, and per-stage limits for prepare, upload, transcribe and optimize
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "64"))
+BATCH_PREPARE_CONCURRENCY = int(os.getenv("BATCH_PREPARE_CONCURRENCY", "4"))
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", "8"))
+BATCH_TRANSCRIBE_CONCURRENCY = int(os.getenv("BATCH_TRANSCRIBE_CONCURRENCY", "64"))
+BATCH_OPTIMIZE_CONCURRENCY = int(os.getenv("BATCH_OPTIMIZE_CONCURRENCY", "8"))
+# Bedrock批量推理：服务角色ARN、输入输出存储桶（默认S3_BUCKET_NAME，需与Bedrock同区域）和前缀
+# Bedrock batch inference: service role ARN, input/output bucket (defaults to S3_BUCKET_NAME, must be in the Bedrock region) and prefix
+BEDROCK_BATCH_ROLE_ARN = os.getenv("BEDROCK_BATCH_ROLE_ARN", "")
+BEDROCK_BATCH_BUCKET = os.getenv("BEDROCK_BATCH_BUCKET", "")
+BEDROCK_BATCH_PREFIX = os.getenv("BEDROCK_BATCH_PREFIX", "bedrock-batch/")
+# 每个任务的记录数下限（低于则改为按需调用）和上限，任务状态轮询间隔（秒）和最长等待时间（秒）
+# Per-job record minimum (below it, on-demand calls are used) and maximum, job status poll interval (s) and max wait (s)
+BEDROCK_BATCH_MIN_RECORDS = int(os.getenv("BEDROCK_BATCH_MIN_RECORDS", "100"))
+BEDROCK_BATCH_MAX_RECORDS = int(os.getenv("BEDROCK_BATCH_MAX_RECORDS", "50000"))
+BEDROCK_BATCH_POLL_INTERVAL = float(os.getenv("BEDROCK_BATCH_POLL_INTERVAL", "60"))
+BEDROCK_BATCH_TIMEOUT = float(os.getenv("BEDROCK_BATCH_TIMEOUT", str(24 * 3600)))
+# inference profile列表刷新间隔（秒） | Inference profile list refresh interval (seconds)
+INFERENCE_PROFILE_REFRESH_INTERVAL = int(os.getenv("INFERENCE_PROFILE_REFRESH_INTERVAL", "3600"))
+# 是否将模型调用路由持久化到缓存目录 | Whether to persist model invocation routes to the cache directory
+BEDROCK_ROUTE_CACHE_PERSIST = os.getenv("BEDROCK_ROUTE_CACHE_PERSIST", "false").lower() == "true"
 
 # 提示词模板 | Prompt template
 OPTIMIZATION_PROMPT = """Please optimize and correct the following transcribed text. 
@@ -38,7 +167,7 @@ def validate_configuration():
     warnings = []
 
     # 检查必需的环境变量 | Check required environment variables
-    if not S3_BUCKET_NAME:
+    if not S3_BUCKET_NAME and not TRANSCRIBE_REGIONS:
         errors.append(
             "S3_BUCKET_NAME 环境变量未设置 | S3_BUCKET_NAME environment variable not set"
         )
@@ -84,6 +213,7 @@ def get_configuration_status():
             or os.getenv("AWS_DEFAULT_REGION")
             or "未配置 | Not configured",
             "aws_profile": os.getenv("AWS_PROFILE") or "未使用 | Not used",
+            "transcribe_regions": TRANSCRIBE_REGIONS or "未使用 | Not used",
             "bedrock_model": BEDROCK_MODEL_ID,
             "supported_formats": ", ".join(SUPPORTED_AUDIO_FORMATS),
         },
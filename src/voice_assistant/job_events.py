@@ -0,0 +1,241 @@
+"""
+转录任务完成通知模块，消费 EventBridge → SQS 的 Transcribe 任务状态变更事件，通过future唤醒等待中的请求
+Transcription job completion module, consumes Transcribe job state-change events delivered by
+EventBridge → SQS and wakes waiting requests through futures
+
+本地开发和测试时可以使用文件队列（每个事件一个JSON文件）代替SQS。
+For local development and tests a file queue (one JSON file per event) can stand in for SQS.
+"""
+import glob
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .config import TRANSCRIBE_EVENTS_QUEUE_URL, TRANSCRIBE_EVENTS_DIR
+from .logger import logger
+
+# EventBridge中Transcribe任务状态变更事件的类型 | detail-type of Transcribe job state-change events in EventBridge
+JOB_STATE_CHANGE_DETAIL_TYPE = "Transcribe Job State Change"
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+# 保留先于注册到达的事件数量上限 | Maximum number of events kept that arrive before registration
+MAX_EARLY_EVENTS = 1000
+
+
+def parse_job_event(event):
+    """
+    从EventBridge事件中解析 (任务名, 状态)，不是终态的Transcribe事件返回None
+    Parse (job name, status) from an EventBridge event, None for anything that is not a terminal Transcribe event
+    """
+    if not isinstance(event, dict):
+        return None
+    if event.get("detail-type") not in (None, JOB_STATE_CHANGE_DETAIL_TYPE):
+        return None
+    detail = event.get("detail", event)
+    job_name = detail.get("TranscriptionJobName")
+    status = detail.get("TranscriptionJobStatus")
+    if not job_name or status not in TERMINAL_STATUSES:
+        return None
+    return job_name, status
+
+
+class JobCompletionRegistry:
+    """
+    任务名到future的线程安全映射
+    Thread-safe mapping from job names to futures
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._early = OrderedDict()
+
+    def register(self, job_name):
+        """
+        注册等待中的任务，返回在任务结束时以状态完成的future
+        Register a waiting job, returns a future resolved with the status when the job finishes
+        """
+        future = Future()
+        with self._lock:
+            self._futures[job_name] = future
+            status = self._early.pop(job_name, None)
+        if status is not None:
+            future.set_result(status)
+        return future
+
+    def notify(self, job_name, status):
+        """
+        通知任务已结束，没有等待者时暂存事件
+        Signal that a job finished, the event is kept if nobody is waiting yet
+        """
+        with self._lock:
+            future = self._futures.pop(job_name, None)
+            if future is None:
+                self._early[job_name] = status
+                while len(self._early) > MAX_EARLY_EVENTS:
+                    self._early.popitem(last=False)
+                return False
+        if not future.done():
+            future.set_result(status)
+        return True
+
+    def discard(self, job_name):
+        with self._lock:
+            self._futures.pop(job_name, None)
+            self._early.pop(job_name, None)
+
+    def pending(self):
+        with self._lock:
+            return len(self._futures)
+
+
+class SQSEventSource:
+    """
+    从SQS队列长轮询EventBridge转发的事件
+    Long-polls events forwarded by EventBridge from an SQS queue
+
+    每个应用实例应使用自己的队列，否则实例之间会互相消费对方的事件。
+    Each application instance should use its own queue, otherwise instances consume each other's events.
+    """
+
+    def __init__(self, queue_url, client_factory, wait_seconds=20):
+        self.queue_url = queue_url
+        self.client_factory = client_factory
+        self.wait_seconds = wait_seconds
+
+    def receive(self):
+        sqs = self.client_factory()
+        response = sqs.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=self.wait_seconds
+        )
+        events = []
+        for message in response.get("Messages", []):
+            try:
+                events.append(json.loads(message["Body"]))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"无法解析SQS消息: {str(e)} | Failed to parse SQS message: {str(e)}")
+            sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"])
+        return events
+
+
+class FileQueueEventSource:
+    """
+    基于目录的本地事件队列，每个事件一个JSON文件，读取后删除
+    Directory-based local event queue, one JSON file per event, deleted once read
+    """
+
+    def __init__(self, directory, wait_seconds=0.5):
+        self.directory = directory
+        self.wait_seconds = wait_seconds
+        self._idle = threading.Event()
+
+    def put(self, event):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{uuid.uuid4().hex}.json"
+        tmp_path = os.path.join(self.directory, f".{name}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(event, f)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+    def receive(self):
+        events = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    events.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"无法读取事件文件 {path}: {str(e)} | Failed to read event file {path}: {str(e)}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if not events:
+            self._idle.wait(self.wait_seconds)
+        return events
+
+
+class JobEventListener:
+    """
+    后台线程从事件源读取任务状态变更并唤醒等待者
+    Background thread that reads job state changes from an event source and wakes the waiters
+    """
+
+    def __init__(self, source, registry=None):
+        self.source = source
+        self.registry = registry or JobCompletionRegistry()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="transcribe-job-events", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def dispatch(self, events):
+        for event in events:
+            parsed = parse_job_event(event)
+            if parsed is None:
+                continue
+            job_name, status = parsed
+            if self.registry.notify(job_name, status):
+                logger.info(
+                    f"收到转录任务 {job_name} 的完成事件: {status} | Received completion event for transcription job {job_name}: {status}"
+                )
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.dispatch(self.source.receive())
+            except Exception as e:
+                logger.warning(f"读取转录任务事件失败: {str(e)} | Failed to read transcription job events: {str(e)}")
+                self._stop.wait(5)
+
+
+def queue_region(queue_url):
+    """
+    从SQS队列URL中解析区域
+    Parse the region from an SQS queue URL
+    """
+    host = queue_url.split("://", 1)[-1].split("/", 1)[0]
+    parts = host.split(".")
+    return parts[1] if len(parts) > 2 and parts[0] == "sqs" else None
+
+
+# 事件监听器和批量轮询器共享的全局注册表 | Global registry shared by the event listener and the batched poller
+job_registry = JobCompletionRegistry()
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def get_event_listener(client_factory=None):
+    """
+    按配置懒启动全局事件监听器，未配置事件源时返回None（仅使用轮询）
+    Lazily start the global event listener from configuration, None when no event source is configured (polling only)
+
+    Args:
+        client_factory: 创建SQS客户端的函数，参数为区域名
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+        if TRANSCRIBE_EVENTS_QUEUE_URL and client_factory is not None:
+            region = queue_region(TRANSCRIBE_EVENTS_QUEUE_URL)
+            source = SQSEventSource(TRANSCRIBE_EVENTS_QUEUE_URL, lambda: client_factory(region))
+        elif TRANSCRIBE_EVENTS_DIR:
+            source = FileQueueEventSource(TRANSCRIBE_EVENTS_DIR)
+        else:
+            return None
+        _listener = JobEventListener(source, job_registry).start()
+        logger.info(
+            f"已启动转录任务事件监听: {type(source).__name__} | Started transcription job event listener: {type(source).__name__}"
+        )
+        return _listener
@@ -0,0 +1,163 @@
+"""
+批量任务轮询模块，由一个后台线程通过 list_transcription_jobs 分页统一跟踪所有进行中的转录任务
+Batched job polling module, a single background thread tracks all in-flight transcription jobs
+through list_transcription_jobs pages
+"""
+import threading
+import time
+
+from .config import TRANSCRIBE_BATCH_POLL_INTERVAL
+from .job_events import TERMINAL_STATUSES, job_registry
+from .logger import logger
+
+# 任务名前缀，用于过滤其他应用的任务 | Job name prefix used to filter out other applications' jobs
+JOB_NAME_PREFIX = "transcription-"
+# 比较创建时间时允许的时钟偏差（秒） | Clock skew tolerated when comparing creation times (seconds)
+CLOCK_SKEW = 60
+# 无法恢复的错误，出现后停用批量轮询 | Unrecoverable errors that disable batched polling
+FATAL_ERROR_MARKERS = ("AccessDenied", "UnauthorizedOperation")
+# 停用时用于唤醒等待者的状态，等待者会自行查询实际状态 | Status used to wake waiters when disabled, they query the actual status themselves
+UNKNOWN_STATUS = "UNKNOWN"
+
+
+class BatchedJobPoller:
+    """
+    按区域批量轮询转录任务状态
+    Polls transcription job status in batches per region
+
+    每个周期每个区域只调用一次（或几次分页）list_transcription_jobs，与任务数量无关；
+    状态变化的任务通过注册表唤醒，由等待者调用一次 get_transcription_job 获取详情。
+    Each cycle calls list_transcription_jobs once (or a few pages) per region regardless of the number of jobs;
+    jobs that changed state are woken through the registry and the waiter calls get_transcription_job once for details.
+    """
+
+    def __init__(self, client_factory, registry=None, interval=None, clock=time.time):
+        self.client_factory = client_factory
+        self.registry = registry or job_registry
+        self.interval = interval if interval is not None else TRANSCRIBE_BATCH_POLL_INTERVAL
+        self.clock = clock
+        self.disabled = False
+        self.list_calls = 0
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def track(self, job_name, region_name=None):
+        """
+        开始跟踪任务，批量轮询已停用时返回False
+        Start tracking a job, False when batched polling is disabled
+        """
+        with self._condition:
+            if self.disabled:
+                return False
+            self._jobs[job_name] = (region_name, self.clock())
+            self._condition.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="transcribe-job-poller", daemon=True)
+                self._thread.start()
+        return True
+
+    def untrack(self, job_name):
+        with self._condition:
+            self._jobs.pop(job_name, None)
+
+    def tracked(self):
+        with self._condition:
+            return len(self._jobs)
+
+    def _jobs_by_region(self):
+        with self._condition:
+            by_region = {}
+            for job_name, (region_name, started) in self._jobs.items():
+                by_region.setdefault(region_name, {})[job_name] = started
+            return by_region
+
+    def poll_region(self, region_name, jobs):
+        """
+        按创建时间倒序分页列出任务，直到覆盖所有被跟踪的任务，返回 {任务名: 终态}
+        List jobs newest first, page by page until all tracked jobs are covered, returns {job name: terminal status}
+        """
+        client = self.client_factory(region_name)
+        oldest = min(jobs.values()) - CLOCK_SKEW
+        remaining = set(jobs)
+        finished = {}
+        params = {"JobNameContains": JOB_NAME_PREFIX, "MaxResults": 100}
+
+        while remaining:
+            response = client.list_transcription_jobs(**params)
+            self.list_calls += 1
+            summaries = response.get("TranscriptionJobSummaries", [])
+            reached_oldest = False
+            for summary in summaries:
+                job_name = summary.get("TranscriptionJobName")
+                if job_name in remaining:
+                    remaining.discard(job_name)
+                    if summary.get("TranscriptionJobStatus") in TERMINAL_STATUSES:
+                        finished[job_name] = summary["TranscriptionJobStatus"]
+                created = summary.get("CreationTime")
+                if created is not None and hasattr(created, "timestamp") and created.timestamp() < oldest:
+                    reached_oldest = True
+            next_token = response.get("NextToken")
+            if reached_oldest or not next_token or not summaries:
+                break
+            params["NextToken"] = next_token
+        return finished
+
+    def poll_once(self):
+        """
+        对所有被跟踪的任务执行一个轮询周期
+        Run one polling cycle over all tracked jobs
+        """
+        for region_name, jobs in self._jobs_by_region().items():
+            try:
+                finished = self.poll_region(region_name, jobs)
+            except Exception as e:
+                if any(marker in str(e) for marker in FATAL_ERROR_MARKERS):
+                    self._disable(str(e))
+                    return
+                logger.warning(f"批量查询转录任务失败: {str(e)} | Batched transcription job query failed: {str(e)}")
+                continue
+            for job_name, status in finished.items():
+                self.untrack(job_name)
+                self.registry.notify(job_name, status)
+
+    def _disable(self, reason):
+        logger.warning(
+            f"批量轮询已停用，回退到单任务轮询: {reason} | Batched polling disabled, falling back to per-job polling: {reason}"
+        )
+        with self._condition:
+            self.disabled = True
+            jobs = list(self._jobs)
+            self._jobs.clear()
+        for job_name in jobs:
+            self.registry.notify(job_name, UNKNOWN_STATUS)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self.disabled:
+                    # 没有任务时不调用API | No API calls while there are no jobs
+                    self._condition.wait()
+                if self.disabled:
+                    return
+            self.poll_once()
+            time.sleep(self.interval)
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_job_poller(client_factory):
+    """
+    返回全局批量轮询器，首次调用时创建
+    Return the global batched poller, created on first use
+
+    Args:
+        client_factory: 创建Transcribe客户端的函数，参数为区域名
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = BatchedJobPoller(client_factory)
+        return _poller
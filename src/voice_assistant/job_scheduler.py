@@ -0,0 +1,212 @@
+"""
+转录任务调度模块，统一负责任务提交：生成不冲突的任务名、按区域配额限制并发、排队超额请求并在超限时退避重试
+Transcription job scheduler module, owns job submission: collision-free job names, per-region concurrency
+quota, queuing of excess requests and backoff when the service limit is exceeded
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+
+from .config import (
+    TRANSCRIBE_MAX_CONCURRENT_JOBS,
+    TRANSCRIBE_MAX_QUEUED_JOBS,
+    TRANSCRIBE_QUEUE_TIMEOUT,
+    TRANSCRIBE_SUBMIT_MAX_RETRIES,
+)
+from .logger import logger
+
+# 提交重试的退避基数和上限（秒） | Base and cap of the submission retry backoff (seconds)
+SUBMIT_BACKOFF_BASE = 1.0
+SUBMIT_BACKOFF_CAP = 30.0
+# 任务名冲突时换名重试的次数上限，与限流退避分开计数 | Retries under a new name on a name conflict, counted apart from throttling backoff
+MAX_NAME_CONFLICT_RETRIES = 5
+
+
+def make_job_name(prefix="transcription"):
+    """
+    生成不冲突的任务名，保留时间戳便于排查
+    Generate a collision-free job name, keeping the timestamp for troubleshooting
+    """
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}"
+
+
+class SchedulerFullError(Exception):
+    """
+    排队已满或等待超时，请求被拒绝
+    Raised when the queue is full or the wait timed out and the request is rejected
+    """
+
+
+class JobScheduler:
+    """
+    按区域限制同时运行的转录任务数，超出配额的请求排队等待
+    Caps concurrently running transcription jobs per region, requests over the quota wait in a queue
+    """
+
+    def __init__(
+        self,
+        max_concurrent=TRANSCRIBE_MAX_CONCURRENT_JOBS,
+        max_queued=TRANSCRIBE_MAX_QUEUED_JOBS,
+        queue_timeout=TRANSCRIBE_QUEUE_TIMEOUT,
+        max_retries=TRANSCRIBE_SUBMIT_MAX_RETRIES,
+        sleep=time.sleep,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self._condition = threading.Condition()
+        self._running = {}
+        self._waiting = {}
+        # 异步等待者按区域登记 (事件循环, asyncio.Event) | Async waiters registered per region as (event loop, asyncio.Event)
+        self._async_waiters = {}
+
+    def _queue_full_error(self):
+        return SchedulerFullError("转录队列已满，请稍后重试 | Transcription queue is full, please retry later")
+
+    def _queue_timeout_error(self):
+        return SchedulerFullError(
+            f"转录任务排队超过 {int(self.queue_timeout)} 秒，请稍后重试 | Transcription job waited over {int(self.queue_timeout)} seconds in the queue, please retry later"
+        )
+
+    def _release(self, region_name):
+        with self._condition:
+            self._running[region_name] -= 1
+            # 所有区域共用一个条件变量，必须唤醒全部等待者，否则可能只唤醒其他区域的请求
+            # Every region shares one condition, so wake all waiters; notify() could wake only another region's request
+            self._condition.notify_all()
+            # 异步等待者可能在其他线程的事件循环中，只能通过 call_soon_threadsafe 唤醒
+            # Async waiters may live on another thread's event loop, so wake them through call_soon_threadsafe
+            for loop, event in self._async_waiters.get(region_name, ()):
+                loop.call_soon_threadsafe(event.set)
+
+    @contextmanager
+    def admit(self, region_name=None):
+        """
+        占用区域的一个任务名额，直到任务结束；没有名额时排队，队列已满或超时抛出 SchedulerFullError
+        Hold one of the region's job slots until the job ends; queue when none is free,
+        raising SchedulerFullError when the queue is full or the wait times out
+        """
+        with self._condition:
+            if self._running.get(region_name, 0) >= self.max_concurrent:
+                if self._waiting.get(region_name, 0) >= self.max_queued:
+                    raise self._queue_full_error()
+                self._waiting[region_name] = self._waiting.get(region_name, 0) + 1
+                logger.info(
+                    f"转录任务排队中，区域 {region_name} 已有 {self._running[region_name]} 个任务 | Transcription job queued, region {region_name} already runs {self._running[region_name]} jobs"
+                )
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._running.get(region_name, 0) < self.max_concurrent, timeout=self.queue_timeout
+                    )
+                finally:
+                    self._waiting[region_name] -= 1
+                if not admitted:
+                    raise self._queue_timeout_error()
+            self._running[region_name] = self._running.get(region_name, 0) + 1
+
+        try:
+            yield
+        finally:
+            self._release(region_name)
+
+    @asynccontextmanager
+    async def admit_async(self, region_name=None):
+        """
+        admit 的asyncio版本：排队时等待释放名额时触发的事件，不占用线程也不轮询
+        asyncio version of admit: queued requests await an event set when a slot is released,
+        holding no thread and without polling
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        queued = False
+        waiter = None
+        try:
+            while True:
+                with self._condition:
+                    if self._running.get(region_name, 0) < self.max_concurrent:
+                        self._running[region_name] = self._running.get(region_name, 0) + 1
+                        break
+                    if not queued:
+                        if self._waiting.get(region_name, 0) >= self.max_queued:
+                            raise self._queue_full_error()
+                        self._waiting[region_name] = self._waiting.get(region_name, 0) + 1
+                        queued = True
+                        waiter = (loop, asyncio.Event())
+                        self._async_waiters.setdefault(region_name, []).append(waiter)
+                        logger.info(
+                            f"转录任务排队中，区域 {region_name} 已有 {self._running[region_name]} 个任务 | Transcription job queued, region {region_name} already runs {self._running[region_name]} jobs"
+                        )
+                    # 在锁内清除事件，之后的释放一定会再次触发它 | Clear the event under the lock so any later release sets it again
+                    waiter[1].clear()
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise self._queue_timeout_error()
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise self._queue_timeout_error() from None
+        finally:
+            if queued:
+                with self._condition:
+                    self._waiting[region_name] -= 1
+                    self._async_waiters[region_name].remove(waiter)
+
+        try:
+            yield
+        finally:
+            self._release(region_name)
+
+    def start_job(self, transcribe_client, job_params):
+        """
+        提交转录任务并返回实际使用的任务参数；LimitExceeded时退避重试，任务名冲突时换名重试，两者分别计数。
+        换名时输出位置随之更换，调用方应使用返回的参数读取结果
+        Submit a transcription job and return the job parameters actually used; back off on LimitExceeded
+        and retry under a new name on a name conflict, each with its own retry budget. A rename also moves
+        the output location, so callers must read the result through the returned parameters
+        """
+        job_params = dict(job_params)
+        job_params.setdefault("TranscriptionJobName", make_job_name())
+        attempt = 0
+        renames = 0
+
+        while True:
+            try:
+                transcribe_client.start_transcription_job(**job_params)
+                return job_params
+            except Exception as e:
+                error_text = str(e)
+                if "ConflictException" in error_text:
+                    if renames >= MAX_NAME_CONFLICT_RETRIES:
+                        raise RuntimeError(
+                            "无法生成不冲突的任务名 | Failed to generate a non-conflicting job name"
+                        ) from e
+                    renames += 1
+                    old_name, new_name = job_params["TranscriptionJobName"], make_job_name()
+                    job_params["TranscriptionJobName"] = new_name
+                    if "OutputKey" in job_params:
+                        # 输出位置随任务名一起更换 | The output location moves with the job name
+                        job_params["OutputKey"] = job_params["OutputKey"].replace(old_name, new_name)
+                    continue
+                if "LimitExceededException" not in error_text or attempt == self.max_retries:
+                    raise
+                backoff = min(SUBMIT_BACKOFF_CAP, SUBMIT_BACKOFF_BASE * (2 ** attempt))
+                delay = random.uniform(0, backoff)
+                logger.warning(
+                    f"转录任务数超出服务限制，{delay:.1f} 秒后重试 ({attempt + 1}/{self.max_retries}) | Transcription job limit exceeded, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+                )
+                self.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        with self._condition:
+            return {"running": dict(self._running), "waiting": dict(self._waiting)}
+
+
+# 进程级调度器 | Process-wide scheduler
+job_scheduler = JobScheduler()
@@ -2,6 +2,8 @@
 日志模块，负责记录应用程序的关键信息
 Logging module, responsible for recording key information of the application
 """
+import functools
+import inspect
 import logging
 import os
 import time
@@ -112,75 +114,116 @@ llm_logger = setup_llm_logger()
 
 
 # 日志装饰器 | Log decorator
+class _ServiceCall:
+    """
+    一次服务调用的计时和日志记录
+    Timing and logging of a single service call
+    """
+
+    def __init__(self, service_name, args, kwargs):
+        self.service_name = service_name
+        self.args = args
+        self.kwargs = kwargs
+        self.start_time = time.time()
+        self.start_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+        # 记录调用开始 | Log call start
+        self.call_id = f"{service_name}_{int(self.start_time * 1000)}"
+        service_logger.info(f"START - ID: {self.call_id} - Service: {service_name}")
+
+    def _log_data(self, status):
+        # 计算执行时间 | Calculate execution time
+        duration = time.time() - self.start_time
+        return {
+            "id": self.call_id,
+            "service": self.service_name,
+            "status": status,
+            "start_time": self.start_datetime,
+            "duration_seconds": round(duration, 3),
+        }
+
+    def success(self, result):
+        # 记录成功调用 | Log successful call
+        log_data = self._log_data("success")
+        log_data["args"] = str(self.args) if self.args else None
+        log_data["kwargs"] = {
+            k: v for k, v in self.kwargs.items() if k not in ["audio_file"]
+        }  # 排除大型二进制数据 | Exclude large binary data
+
+        # 对于特定服务，记录额外信息 | For specific services, log additional information
+        if self.service_name == "transcribe":
+            if isinstance(result, str) and len(result) > 100:
+                log_data["result_preview"] = result[:100] + "..."
+                log_data["transcript_length"] = len(result)
+            else:
+                log_data["result"] = result
+
+        service_logger.info(f"SUCCESS - {json.dumps(log_data, default=str)}")
+
+    def error(self, e):
+        # 记录失败调用 | Log failed call
+        log_data = self._log_data("error")
+        log_data["error"] = str(e)
+        log_data["args"] = str(self.args) if self.args else None
+        log_data["kwargs"] = {
+            k: v for k, v in self.kwargs.items() if k not in ["audio_file"]
+        }  # 排除大型二进制数据 | Exclude large binary data
+        service_logger.error(f"ERROR - {json.dumps(log_data, default=str)}")
+
+
 def log_service_call(service_name):
     """
-    记录服务调用的装饰器
-    Decorator for logging service calls
+    记录服务调用的装饰器，支持普通函数、协程函数和异步生成器
+    Decorator for logging service calls, supporting plain functions, coroutine functions and async generators
+
+    异步生成器从第一次迭代计时到迭代结束。
+    Async generators are timed from the first iteration until they finish.
     """
 
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
-            start_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                call = _ServiceCall(service_name, args, kwargs)
+                try:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                except Exception as e:
+                    call.error(e)
+                    raise
+                call.success(None)
+
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                call = _ServiceCall(service_name, args, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    call.error(e)
+                    # 重新抛出异常 | Re-raise exception
+                    raise
+                call.success(result)
+                return result
 
-            # 记录调用开始 | Log call start
-            call_id = f"{service_name}_{int(start_time * 1000)}"
-            service_logger.info(f"START - ID: {call_id} - Service: {service_name}")
+            return async_wrapper
 
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            call = _ServiceCall(service_name, args, kwargs)
             try:
                 # 调用原始函数 | Call original function
                 result = func(*args, **kwargs)
-
-                # 计算执行时间 | Calculate execution time
-                end_time = time.time()
-                duration = end_time - start_time
-
-                # 记录成功调用 | Log successful call
-                log_data = {
-                    "id": call_id,
-                    "service": service_name,
-                    "status": "success",
-                    "start_time": start_datetime,
-                    "duration_seconds": round(duration, 3),
-                    "args": str(args) if args else None,
-                    "kwargs": {
-                        k: v for k, v in kwargs.items() if k not in ["audio_file"]
-                    },  # 排除大型二进制数据 | Exclude large binary data
-                }
-
-                # 对于特定服务，记录额外信息 | For specific services, log additional information
-                if service_name == "transcribe":
-                    if isinstance(result, str) and len(result) > 100:
-                        log_data["result_preview"] = result[:100] + "..."
-                        log_data["transcript_length"] = len(result)
-                    else:
-                        log_data["result"] = result
-
-                service_logger.info(f"SUCCESS - {json.dumps(log_data)}")
-                return result
-
             except Exception as e:
-                # 计算执行时间 | Calculate execution time
-                end_time = time.time()
-                duration = end_time - start_time
-
-                # 记录失败调用 | Log failed call
-                log_data = {
-                    "id": call_id,
-                    "service": service_name,
-                    "status": "error",
-                    "start_time": start_datetime,
-                    "duration_seconds": round(duration, 3),
-                    "error": str(e),
-                    "args": str(args) if args else None,
-                    "kwargs": {
-                        k: v for k, v in kwargs.items() if k not in ["audio_file"]
-                    },  # 排除大型二进制数据 | Exclude large binary data
-                }
-                service_logger.error(f"ERROR - {json.dumps(log_data)}")
-
+                call.error(e)
                 # 重新抛出异常 | Re-raise exception
                 raise
+            call.success(result)
+            return result
 
         return wrapper
 
@@ -214,10 +257,14 @@ def log_llm_call(model_id, prompt=None, custom_prompt=None):
     return call_id
 
 
-def log_llm_response(call_id, response_text, duration):
+def log_llm_response(call_id, response_text, duration, time_to_first_token=None, output_tokens=None):
     """
     记录LLM响应信息
     Log LLM response information
+
+    Args:
+        time_to_first_token: 流式响应的首个token延迟（秒）
+        output_tokens: 输出token数，用于计算生成速度
     """
     if response_text and len(response_text) > 500:
         response_preview = response_text[:500] + "..."
@@ -231,4 +278,31 @@ def log_llm_response(call_id, response_text, duration):
         "response_length": len(response_text) if response_text else 0,
     }
 
+    if time_to_first_token is not None:
+        log_data["time_to_first_token_seconds"] = round(time_to_first_token, 3)
+    if output_tokens:
+        log_data["output_tokens"] = output_tokens
+        # 生成速度按首个token之后的时间计算 | Generation speed is measured from the first token on
+        generation_time = duration - (time_to_first_token or 0.0)
+        if generation_time > 0:
+            log_data["tokens_per_second"] = round(output_tokens / generation_time, 2)
+
     llm_logger.info(json.dumps(log_data))
+
+
+def log_cache_stats(cache_name, event, stats):
+    """
+    记录缓存命中/未命中事件及累计统计
+    Log cache hit/miss events with cumulative counters
+    """
+    log_data = {"cache": cache_name, "event": event, **stats}
+    service_logger.info(f"CACHE - {json.dumps(log_data)}")
+
+
+def log_transfer_stats(event, stats):
+    """
+    记录S3传输进度和吞吐量
+    Log S3 transfer progress and throughput
+    """
+    log_data = {"event": event, **stats}
+    service_logger.info(f"TRANSFER - {json.dumps(log_data)}")
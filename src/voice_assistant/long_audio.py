@@ -0,0 +1,329 @@
+"""
+长音频模块，在静音处把长录音切成若干重叠片段分别转录，再把各片段的Transcribe结果合并为一份
+Long audio module, cuts long recordings at silences into overlapping chunks that are transcribed separately,
+then merges the per-chunk Transcribe results into one
+
+合并时平移时间戳、按重叠区域对齐各片段的发言者标签，并且每个词只保留在拥有其时间点的片段中，以去除重叠部分的重复。
+The merge shifts timestamps, aligns speaker labels across chunks through the overlap regions, and keeps each word
+only in the chunk that owns its time so the overlap is not transcribed twice.
+"""
+import math
+import os
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+from .audio_preprocessing import frame_energy_db, iter_mono_blocks, read_wav_info, write_wav16_blocks
+from .config import (
+    LONG_AUDIO_ENABLED,
+    LONG_AUDIO_MIN_DURATION,
+    LONG_AUDIO_CHUNK_SECONDS,
+    LONG_AUDIO_MAX_CHUNKS,
+    LONG_AUDIO_OVERLAP_SECONDS,
+    LONG_AUDIO_SEARCH_SECONDS,
+)
+from .logger import logger
+from .transcribe_polling import estimate_audio_duration
+from .voice_activity import frame_rms_db
+
+# 寻找切点时的帧长（毫秒）和能量平滑窗口（秒） | Frame length (ms) and energy smoothing window (s) used to find cuts
+CUT_FRAME_MS = 20
+CUT_SMOOTHING_SECONDS = 0.5
+# 词之间不加空格的语言 | Languages whose words are not separated by spaces
+NO_SPACE_LANGUAGES = ("zh", "ja", "th")
+
+
+def should_split(audio_path):
+    """
+    判断音频是否需要按长音频模式切分（目前只能解码WAV）
+    Whether the audio should go through long-audio mode (only WAV can be decoded for now)
+    """
+    if not LONG_AUDIO_ENABLED or os.path.splitext(audio_path)[1].lower() != ".wav":
+        return False
+    duration = estimate_audio_duration(audio_path, "wav")
+    return bool(duration) and duration >= LONG_AUDIO_MIN_DURATION
+
+
+def cut_frame_size(sample_rate):
+    """
+    寻找切点时每帧的样本数 | Samples per frame when looking for cuts
+    """
+    return max(1, int(sample_rate * CUT_FRAME_MS / 1000))
+
+
+def find_cut_points(samples, sample_rate, chunk_seconds=None, max_chunks=None, search_seconds=None):
+    """
+    在每个理想切点附近 search_seconds 范围内寻找能量最低处作为切点
+    Find cut points at the quietest spot within search_seconds of each ideal cut
+
+    Returns:
+        list: 切点时间（秒），已排序 | sorted cut times in seconds
+    """
+    frame_size = cut_frame_size(sample_rate)
+    return find_cut_points_in_energy(
+        frame_rms_db(samples, frame_size),
+        frame_size / float(sample_rate),
+        len(samples) / float(sample_rate),
+        chunk_seconds,
+        max_chunks,
+        search_seconds,
+    )
+
+
+def find_cut_points_in_energy(energy, frame_seconds, duration, chunk_seconds=None, max_chunks=None, search_seconds=None):
+    """
+    find_cut_points 的核心，输入每帧能量（dBFS），不需要整段样本
+    Core of find_cut_points working on per-frame energy (dBFS) instead of the whole signal
+    """
+    chunk_seconds = chunk_seconds or LONG_AUDIO_CHUNK_SECONDS
+    max_chunks = max_chunks or LONG_AUDIO_MAX_CHUNKS
+    search_seconds = LONG_AUDIO_SEARCH_SECONDS if search_seconds is None else search_seconds
+
+    count = max(1, min(max_chunks, math.ceil(duration / chunk_seconds)))
+    if count == 1:
+        return []
+
+    window = max(1, int(CUT_SMOOTHING_SECONDS / frame_seconds))
+    smoothed = np.convolve(energy, np.ones(window) / window, mode="same")
+
+    cuts = []
+    for k in range(1, count):
+        ideal = k * duration / count
+        low = max(int((ideal - search_seconds) / frame_seconds), int(cuts[-1] / frame_seconds) + 1 if cuts else 0)
+        high = min(len(smoothed), int((ideal + search_seconds) / frame_seconds) + 1)
+        if high <= low:
+            continue
+        frame = low + int(np.argmin(smoothed[low:high]))
+        cuts.append(round((frame + 0.5) * frame_seconds, 3))
+    return cuts
+
+
+def plan_chunks(duration, cuts, overlap_seconds=None):
+    """
+    根据切点生成片段：每段拥有 [own_start, own_end) 的时间，并向两侧各多取 overlap_seconds
+    Build chunks from the cuts: each owns [own_start, own_end) and extends overlap_seconds past both ends
+    """
+    overlap_seconds = LONG_AUDIO_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    bounds = [0.0] + list(cuts) + [duration]
+    chunks = []
+    for index in range(len(bounds) - 1):
+        own_start, own_end = bounds[index], bounds[index + 1]
+        chunks.append({
+            "index": index,
+            "start": max(0.0, own_start - overlap_seconds),
+            "end": min(duration, own_end + overlap_seconds),
+            "own_start": own_start,
+            # 最后一段拥有结尾之后的一切 | The last chunk owns everything past the end
+            "own_end": own_end if index < len(bounds) - 2 else math.inf,
+        })
+    return chunks
+
+
+def split_audio(audio_path, output_dir=None, **cut_options):
+    """
+    将WAV文件切成重叠片段并写入临时文件，调用方负责删除片段文件
+    Split a WAV file into overlapping chunks written to temporary files, the caller deletes the chunk files
+
+    Returns:
+        list: 片段字典，包含 path/start/end/own_start/own_end | chunk dicts with path/start/end/own_start/own_end
+    """
+    # 只读取能量曲线和各片段所需的帧，整个文件不会进入内存 | Only the energy curve and each chunk's frames are read, never the whole file
+    info = read_wav_info(audio_path)
+    sample_rate = info.sample_rate
+    duration = info.frames / float(sample_rate)
+    frame_size = cut_frame_size(sample_rate)
+    energy = frame_energy_db(audio_path, frame_size, info)
+    chunks = plan_chunks(
+        duration, find_cut_points_in_energy(energy, frame_size / float(sample_rate), duration, **cut_options)
+    )
+
+    try:
+        for chunk in chunks:
+            fd, chunk["path"] = tempfile.mkstemp(suffix=".wav", prefix=f"chunk{chunk['index']:03d}-", dir=output_dir)
+            os.close(fd)
+            write_wav16_blocks(
+                chunk["path"],
+                iter_mono_blocks(
+                    audio_path, info, int(chunk["start"] * sample_rate), int(chunk["end"] * sample_rate)
+                ),
+                sample_rate,
+            )
+    except Exception:
+        remove_chunks(chunks)
+        raise
+
+    logger.info(
+        f"长音频切分为 {len(chunks)} 段，总时长 {duration:.0f} 秒 | Long audio split into {len(chunks)} chunks, {duration:.0f} seconds in total"
+    )
+    return chunks
+
+
+def remove_chunks(chunks):
+    """
+    删除片段临时文件
+    Delete the chunk temporary files
+    """
+    for chunk in chunks:
+        path = chunk.get("path")
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def _shift_item(item, offset):
+    item = dict(item)
+    for field in ("start_time", "end_time"):
+        if field in item:
+            item[field] = f"{float(item[field]) + offset:.3f}"
+    return item
+
+
+def _owns(chunk, seconds):
+    return chunk["own_start"] <= seconds < chunk["own_end"]
+
+
+def owned_items(chunk, transcript_data):
+    """
+    返回片段拥有的词（已平移到全局时间），标点跟随前一个词
+    Return the words owned by the chunk, shifted to global time; punctuation follows the preceding word
+    """
+    kept = []
+    keep_punctuation = False
+    for item in transcript_data["results"].get("items", []):
+        if "start_time" in item:
+            keep_punctuation = _owns(chunk, float(item["start_time"]) + chunk["start"])
+            if keep_punctuation:
+                kept.append(_shift_item(item, chunk["start"]))
+        elif keep_punctuation:
+            kept.append(dict(item))
+    return kept
+
+
+def _labeled_spans(chunk, transcript_data):
+    """片段内带发言者标签的词时间段（全局时间） | Speaker-labelled word spans of a chunk in global time"""
+    spans = []
+    for segment in (transcript_data["results"].get("speaker_labels") or {}).get("segments", []):
+        for item in segment.get("items") or [segment]:
+            spans.append((
+                float(item["start_time"]) + chunk["start"],
+                float(item["end_time"]) + chunk["start"],
+                item.get("speaker_label", segment.get("speaker_label")),
+            ))
+    return spans
+
+
+def reconcile_speakers(chunk_results):
+    """
+    为每个片段计算 局部发言者标签 → 全局标签 的映射
+    Compute a local speaker label → global label mapping for every chunk
+
+    相邻片段在重叠区域里同时说话时间最长的标签视为同一发言者；没有出现在重叠区域的发言者无法匹配，分配新的全局标签。
+    Labels of neighbouring chunks that talk over the same time in the overlap region the longest are the same speaker;
+    speakers absent from the overlap cannot be matched and get a new global label.
+    """
+    mappings = []
+    global_count = 0
+    previous_spans = None
+    previous_chunk = None
+    for chunk, transcript_data in chunk_results:
+        spans = _labeled_spans(chunk, transcript_data)
+        mapping = {}
+
+        if previous_spans:
+            window_start, window_end = chunk["start"], previous_chunk["end"]
+            votes = defaultdict(float)
+            for start, end, label in spans:
+                if end <= window_start or start >= window_end:
+                    continue
+                for previous_start, previous_end, previous_label in previous_spans:
+                    shared = min(end, previous_end) - max(start, previous_start)
+                    if shared > 0:
+                        votes[(label, previous_label)] += shared
+            for (label, previous_label), _ in sorted(votes.items(), key=lambda vote: -vote[1]):
+                if label not in mapping and previous_label not in mapping.values():
+                    mapping[label] = previous_label
+
+        for _, _, label in spans:
+            if label not in mapping:
+                mapping[label] = f"spk_{global_count}"
+                global_count += 1
+
+        mappings.append(mapping)
+        previous_spans = [(start, end, mapping[label]) for start, end, label in spans]
+        previous_chunk = chunk
+    return mappings
+
+
+def join_items(items, language_code=None):
+    """
+    由词和标点重建转录文本
+    Rebuild the transcript text from words and punctuation
+    """
+    separator = "" if (language_code or "").split("-")[0] in NO_SPACE_LANGUAGES else " "
+    words = []
+    for item in items:
+        content = (item.get("alternatives") or [{}])[0].get("content", "")
+        if not content:
+            continue
+        if item.get("type") == "punctuation" and words:
+            words[-1] += content
+        else:
+            words.append(content)
+    return separator.join(words)
+
+
+def merge_transcripts(chunk_results, language_code=None):
+    """
+    合并各片段的Transcribe原始JSON，结果与单个任务的JSON结构相同
+    Merge the raw Transcribe JSON of every chunk into a document shaped like a single job's JSON
+
+    Args:
+        chunk_results: [(片段, 转录结果JSON)]，按片段顺序 | [(chunk, transcript JSON)] in chunk order
+        language_code: 识别的语言，决定词之间是否加空格 | identified language, decides whether words are space-separated
+    """
+    mappings = reconcile_speakers(chunk_results)
+    items = []
+    segments = []
+    for (chunk, transcript_data), mapping in zip(chunk_results, mappings):
+        for item in owned_items(chunk, transcript_data):
+            if "speaker_label" in item:
+                item["speaker_label"] = mapping.get(item["speaker_label"], item["speaker_label"])
+            items.append(item)
+
+        for segment in (transcript_data["results"].get("speaker_labels") or {}).get("segments", []):
+            segment = _shift_item(segment, chunk["start"])
+            segment_items = [
+                dict(item, speaker_label=mapping.get(item.get("speaker_label"), item.get("speaker_label")))
+                for item in (_shift_item(item, chunk["start"]) for item in segment.get("items", []))
+                if _owns(chunk, float(item["start_time"]))
+            ]
+            if segment_items:
+                segment["start_time"] = segment_items[0]["start_time"]
+                segment["end_time"] = segment_items[-1]["end_time"]
+            elif segment.get("items") or not _owns(
+                chunk, (float(segment["start_time"]) + float(segment["end_time"])) / 2
+            ):
+                continue
+            segment["items"] = segment_items
+            segment["speaker_label"] = mapping.get(segment.get("speaker_label"), segment.get("speaker_label"))
+            segments.append(segment)
+
+    results = {"transcripts": [{"transcript": join_items(items, language_code)}], "items": items}
+    if segments:
+        results["speaker_labels"] = {
+            "speakers": len({segment["speaker_label"] for segment in segments}),
+            "segments": segments,
+        }
+    return {"results": results}
+
+
+def pick_language_status(chunk_statuses, chunk_results):
+    """
+    选择拥有最多词的片段的任务状态，用作合并结果的语言信息
+    Pick the job status of the chunk that owns the most words, used as the merged result's language information
+    """
+    word_counts = [
+        sum(1 for item in owned_items(chunk, data) if item.get("type") == "pronunciation")
+        for chunk, data in chunk_results
+    ]
+    return chunk_statuses[int(np.argmax(word_counts))] if word_counts else chunk_statuses[0]
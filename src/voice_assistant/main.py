@@ -1,10 +1,23 @@
 """
 主模块，负责启动应用程序
 Main module, responsible for starting the application
+
+用法 | Usage:
+    python -m voice_assistant                      # 启动Web界面 | Start the web interface
+    python -m voice_assistant batch <目录或清单>    # 批量处理 | Batch processing
 """
+import argparse
+
 from .ui import create_ui
 from .logger import logger
-from .config import validate_configuration
+from .config import (
+    validate_configuration,
+    BATCH_CONCURRENCY,
+    BATCH_PREPARE_CONCURRENCY,
+    BATCH_UPLOAD_CONCURRENCY,
+    BATCH_TRANSCRIBE_CONCURRENCY,
+    BATCH_OPTIMIZE_CONCURRENCY,
+)
 
 
 def check_startup_configuration():
@@ -41,11 +54,105 @@ def check_startup_configuration():
     return len(errors) == 0
 
 
-def main():
+def build_parser():
     """
-    主函数，启动应用程序
-    Main function, starts the application
+    构建命令行参数解析器
+    Build the command line argument parser
     """
+    parser = argparse.ArgumentParser(
+        prog="voice_assistant", description="AWS Transcribe + Bedrock 语音助手 | Voice assistant"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("ui", help="启动Web界面（默认） | Start the web interface (default)")
+
+    batch = subparsers.add_parser(
+        "batch", help="批量处理目录或CSV/JSONL清单中的音频 | Batch process audio from a directory or CSV/JSONL manifest"
+    )
+    batch.add_argument("source", help="音频目录或清单文件 | Audio directory or manifest file")
+    batch.add_argument(
+        "-o", "--output", default="batch_results.jsonl", help="JSONL结果文件，同时作为检查点 | JSONL results file, also the checkpoint"
+    )
+    batch.add_argument("--model-id", help="Bedrock模型ID | Bedrock model ID")
+    batch.add_argument("--prompt", help="自定义优化提示词 | Custom optimization prompt")
+    batch.add_argument("--speaker-diarization", action="store_true", help="启用发言者划分 | Enable speaker diarization")
+    batch.add_argument(
+        "--bedrock-batch",
+        action="store_true",
+        help="转录完成后通过Bedrock批量推理统一优化 | Optimize all transcripts with Bedrock batch inference after transcription",
+    )
+    batch.add_argument(
+        "--no-resume", action="store_true", help="忽略已有输出，全部重新处理 | Ignore existing output and reprocess everything"
+    )
+    batch.add_argument(
+        "--concurrency", type=int, default=BATCH_CONCURRENCY, help="同时在途的文件数 | Files in flight at once"
+    )
+    for stage, default in (
+        ("prepare", BATCH_PREPARE_CONCURRENCY),
+        ("upload", BATCH_UPLOAD_CONCURRENCY),
+        ("transcribe", BATCH_TRANSCRIBE_CONCURRENCY),
+        ("optimize", BATCH_OPTIMIZE_CONCURRENCY),
+    ):
+        batch.add_argument(
+            f"--{stage}-concurrency", type=int, default=default, help=f"{stage} 阶段并发上限 | {stage} stage limit"
+        )
+    return parser
+
+
+def run_batch_command(args):
+    """
+    执行 batch 子命令，返回进程退出码
+    Run the batch subcommand, returning the process exit code
+    """
+    from .batch import collect_inputs, format_report, run_batch
+
+    print("🎤 语音助手批量处理 | Voice Assistant batch processing")
+    print("=" * 60)
+    if not check_startup_configuration():
+        return 2
+
+    try:
+        items = collect_inputs(args.source)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ 读取输入失败 | Failed to read input: {str(e)}")
+        return 2
+    print(f"📂 共 {len(items)} 个文件 | {len(items)} files, 结果 | results: {args.output}")
+
+    try:
+        report = run_batch(
+            items,
+            args.output,
+            model_id=args.model_id,
+            custom_prompt=args.prompt,
+            enable_speaker_diarization=args.speaker_diarization,
+            concurrency=args.concurrency,
+            stage_limits={
+                "prepare": args.prepare_concurrency,
+                "upload": args.upload_concurrency,
+                "transcribe": args.transcribe_concurrency,
+                "optimize": args.optimize_concurrency,
+            },
+            resume=not args.no_resume,
+            offline_optimize=args.bedrock_batch,
+        )
+    except KeyboardInterrupt:
+        logger.warning("批量处理被中断 | Batch processing interrupted")
+        print("\n⏸️  已中断，重新运行相同命令即可继续 | Interrupted, rerun the same command to resume")
+        return 130
+
+    print("")
+    print(format_report(report))
+    return 0 if report["failed"] == 0 else 1
+
+
+def main(argv=None):
+    """
+    主函数，启动应用程序或执行子命令
+    Main function, starts the application or runs a subcommand
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        return run_batch_command(args)
+
     print("🎤 启动语音助手应用 | Starting Voice Assistant Application")
     print("=" * 60)
 
@@ -0,0 +1,220 @@
+"""
+模型目录缓存模块，负责缓存Bedrock可用模型列表（内存 + 磁盘两级，支持TTL和后台刷新）
+Model catalog cache module, caches the Bedrock model list (memory + disk tiers, TTL and background refresh)
+"""
+import json
+import os
+import threading
+import time
+
+from .logger import logger
+
+
+def get_display_name(model_id, model_name, is_claude):
+    """
+    为Claude和Nova模型生成友好的显示名称
+    Create friendly display name for Claude and Nova models
+    """
+    model_id_lower = model_id.lower()
+    if is_claude:
+        # Claude模型的友好名称 | Friendly name for Claude models
+        if "claude-3-5-sonnet" in model_id_lower:
+            return "Claude 3.5 Sonnet"
+        elif "claude-3-sonnet" in model_id_lower:
+            return "Claude 3 Sonnet"
+        elif "claude-3-haiku" in model_id_lower:
+            return "Claude 3 Haiku"
+        elif "claude-3-opus" in model_id_lower:
+            return "Claude 3 Opus"
+        elif "claude-2" in model_id_lower:
+            return "Claude 2"
+        else:
+            return f"Claude - {model_name}"
+    else:
+        # Nova模型的友好名称 | Friendly name for Nova models
+        if "nova-pro" in model_id_lower:
+            return "Nova Pro"
+        elif "nova-lite" in model_id_lower:
+            return "Nova Lite"
+        elif "nova-micro" in model_id_lower:
+            return "Nova Micro"
+        else:
+            return f"Nova - {model_name}"
+
+
+def sort_key(model):
+    """
+    按模型系列和名称排序：Claude优先，然后是Nova
+    Sort by model series and name: Claude first, then Nova
+    """
+    name = model["name"].lower()
+    if "claude" in name:
+        # Claude模型排序：3.5 Sonnet > 3 Opus > 3 Sonnet > 3 Haiku > 2
+        if "3.5 sonnet" in name:
+            return (0, 0)
+        elif "3 opus" in name:
+            return (0, 1)
+        elif "3 sonnet" in name:
+            return (0, 2)
+        elif "3 haiku" in name:
+            return (0, 3)
+        elif "2" in name:
+            return (0, 4)
+        else:
+            return (0, 5)
+    elif "nova" in name:
+        # Nova模型排序：Pro > Lite > Micro
+        if "pro" in name:
+            return (1, 0)
+        elif "lite" in name:
+            return (1, 1)
+        elif "micro" in name:
+            return (1, 2)
+        else:
+            return (1, 3)
+    else:
+        return (2, 0)
+
+
+def filter_text_models(model_summaries):
+    """
+    从模型摘要中过滤出Claude和Nova系列的文本生成模型并排序
+    Filter and sort Claude and Nova series text generation models from model summaries
+    """
+    filtered_models = []
+    for model in model_summaries:
+        model_id = model.get("modelId", "")
+        model_name = model.get("modelName", "")
+        provider_name = model.get("providerName", "")
+
+        # 只包含支持文本生成的模型 | Only include models that support text generation
+        if model.get("outputModalities", []) != ["TEXT"]:
+            continue
+
+        # 检查是否是Claude或Nova系列模型 | Check if it's Claude or Nova series model
+        is_claude = (
+            "claude" in model_id.lower()
+            or "claude" in model_name.lower()
+            or provider_name.lower() == "anthropic"
+        )
+        is_nova = "nova" in model_id.lower() or "nova" in model_name.lower()
+
+        if is_claude or is_nova:
+            filtered_models.append(
+                {
+                    "id": model_id,
+                    "name": get_display_name(model_id, model_name, is_claude),
+                    "provider": provider_name,
+                    "model_name": model_name,
+                }
+            )
+
+    filtered_models.sort(key=sort_key)
+    return filtered_models
+
+
+class ModelCatalog:
+    """
+    两级模型目录缓存：内存层 + 磁盘JSON层
+    Two-tier model catalog cache: in-memory tier + on-disk JSON tier
+
+    数据过期后仍立即返回旧数据，并在后台线程中刷新（stale-while-revalidate）；
+    只有在两级缓存都为空时才会同步调用 fetcher。
+    Stale data is returned immediately while a background thread refreshes it (stale-while-revalidate);
+    the fetcher is only called synchronously when both tiers are empty.
+    """
+
+    def __init__(self, fetcher, cache_path=None, ttl=3600):
+        self.fetcher = fetcher
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._models = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+
+    def _load_from_disk(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["models"], float(data["fetched_at"])
+        except Exception as e:
+            logger.warning(f"读取模型目录缓存失败: {str(e)} | Failed to read model catalog cache: {str(e)}")
+            return None
+
+    def _save_to_disk(self, models, fetched_at):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": fetched_at, "models": models}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"写入模型目录缓存失败: {str(e)} | Failed to write model catalog cache: {str(e)}")
+
+    def refresh(self):
+        """
+        同步从控制面获取模型列表并更新两级缓存
+        Synchronously fetch the model list from the control plane and update both tiers
+        """
+        models = self.fetcher()
+        fetched_at = time.time()
+        with self._lock:
+            self._models = models
+            self._fetched_at = fetched_at
+        self._save_to_disk(models, fetched_at)
+        return models
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                self.refresh()
+                logger.info("模型目录后台刷新完成 | Model catalog background refresh completed")
+            except Exception as e:
+                logger.warning(f"模型目录后台刷新失败，继续使用缓存: {str(e)} | Model catalog background refresh failed, keeping cached data: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, name="model-catalog-refresh", daemon=True).start()
+
+    def get_models(self):
+        """
+        获取模型列表，优先使用缓存
+        Get the model list, preferring cached data
+        """
+        with self._lock:
+            models, fetched_at = self._models, self._fetched_at
+
+        if models is None:
+            cached = self._load_from_disk()
+            if cached:
+                models, fetched_at = cached
+                with self._lock:
+                    self._models, self._fetched_at = models, fetched_at
+                logger.info(f"从磁盘缓存加载 {len(models)} 个模型 | Loaded {len(models)} models from disk cache")
+
+        if models is None:
+            # 冷启动：两级缓存都为空 | Cold start: both tiers are empty
+            return self.refresh()
+
+        if time.time() - fetched_at > self.ttl:
+            self._refresh_in_background()
+        return models
+
+    def invalidate(self):
+        """
+        使内存缓存过期，下次访问时触发后台刷新
+        Expire the in-memory tier so the next access triggers a background refresh
+        """
+        with self._lock:
+            self._fetched_at = 0.0
@@ -0,0 +1,197 @@
+"""
+区域池模块，负责在多个 (区域, 存储桶) 之间分配S3上传和Transcribe任务
+Regional pool module, responsible for distributing S3 uploads and Transcribe jobs across (region, bucket) pairs
+"""
+import asyncio
+import threading
+import time
+
+from .config import (
+    S3_BUCKET_NAME,
+    TRANSCRIBE_REGIONS,
+    TRANSCRIBE_MAX_CONCURRENT_JOBS,
+    REGION_THROTTLE_COOLDOWN,
+)
+from .logger import logger
+
+# 表示区域被限流或配额耗尽的错误标记 | Error markers indicating a region is throttled or out of quota
+THROTTLING_ERROR_MARKERS = (
+    "ThrottlingException",
+    "Throttling",
+    "LimitExceededException",
+    "TooManyRequestsException",
+    "SlowDown",
+    "RequestLimitExceeded",
+)
+
+# 延迟指数移动平均的平滑系数 | Smoothing factor for the latency exponential moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+
+def is_throttling_error(error):
+    """
+    判断异常是否为限流或配额错误
+    Check whether an exception is a throttling or quota error
+    """
+    error_str = str(error)
+    return any(marker in error_str for marker in THROTTLING_ERROR_MARKERS)
+
+
+def parse_region_buckets(value, default_bucket=None):
+    """
+    解析 "region=bucket,region=bucket" 格式的区域配置
+    Parse region configuration in "region=bucket,region=bucket" format
+    """
+    pairs = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            region, bucket = item.split("=", 1)
+        else:
+            region, bucket = item, default_bucket
+        pairs.append((region.strip(), (bucket or "").strip() or None))
+    return pairs
+
+
+class RegionSlot:
+    """
+    单个区域的状态：并发任务数、最近延迟和限流截止时间
+    State of a single region: in-flight jobs, recent latency and throttle deadline
+    """
+
+    def __init__(self, region, bucket, max_jobs):
+        self.region = region
+        self.bucket = bucket
+        self.max_jobs = max_jobs
+        self.in_flight = 0
+        self.latency = None
+        self.throttled_until = 0.0
+
+    @property
+    def headroom(self):
+        return self.max_jobs - self.in_flight
+
+    def is_throttled(self, now=None):
+        return (now or time.time()) < self.throttled_until
+
+    def __repr__(self):
+        return f"RegionSlot({self.region!r}, {self.bucket!r}, in_flight={self.in_flight}/{self.max_jobs})"
+
+
+class RegionalPool:
+    """
+    区域池，将每个请求路由到Transcribe并发余量最多、近期延迟最低的区域
+    Regional pool, routes each request to the region with most Transcribe concurrency headroom and lowest recent latency
+    """
+
+    def __init__(self, region_buckets, max_jobs=TRANSCRIBE_MAX_CONCURRENT_JOBS, throttle_cooldown=REGION_THROTTLE_COOLDOWN):
+        self._lock = threading.Lock()
+        self.throttle_cooldown = throttle_cooldown
+        self.slots = [RegionSlot(region, bucket, max_jobs) for region, bucket in region_buckets]
+
+    def acquire(self, exclude=()):
+        """
+        选择一个区域并占用一个并发名额
+        Select a region and reserve one concurrency slot
+        """
+        with self._lock:
+            candidates = [slot for slot in self.slots if slot.region not in exclude]
+            if not candidates:
+                raise RuntimeError("没有可用的区域 | No region available")
+
+            now = time.time()
+            healthy = [slot for slot in candidates if not slot.is_throttled(now)] or candidates
+
+            measured = [slot.latency for slot in healthy if slot.latency]
+            fastest = min(measured) if measured else None
+
+            def score(slot):
+                # 余量按相对延迟折算：慢一倍的区域需要多一倍的余量才会被选中；
+                # 未测量的区域视为最快以便尽早探测
+                # Headroom discounted by relative latency: a region twice as slow needs twice the headroom;
+                # unmeasured regions count as fastest so they get probed early
+                relative_latency = slot.latency / fastest if slot.latency and fastest else 1.0
+                return slot.headroom / relative_latency
+
+            slot = max(healthy, key=score)
+            slot.in_flight += 1
+            return slot
+
+    def release(self, slot, latency=None, throttled=False):
+        """
+        释放区域名额，并更新延迟和限流状态
+        Release a region slot and update latency and throttle state
+        """
+        with self._lock:
+            slot.in_flight = max(0, slot.in_flight - 1)
+            if latency is not None:
+                if slot.latency is None:
+                    slot.latency = latency
+                else:
+                    slot.latency = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * slot.latency
+            if throttled:
+                slot.throttled_until = time.time() + self.throttle_cooldown
+                logger.warning(
+                    f"区域 {slot.region} 被限流，{self.throttle_cooldown} 秒内降低优先级 | Region {slot.region} throttled, deprioritized for {self.throttle_cooldown} seconds"
+                )
+
+    def run(self, func, size_hint=1.0):
+        """
+        run_async 的同步入口，在选定的区域执行 func(slot)
+        Synchronous entry point for run_async, running func(slot) in the selected region
+        """
+
+        async def call(slot):
+            return func(slot)
+
+        return asyncio.run(self.run_async(call, size_hint=size_hint))
+
+    async def run_async(self, func, size_hint=1.0):
+        """
+        在选定的区域执行 func(slot) 返回的协程，限流时切换到下一个区域
+        Await the coroutine returned by func(slot) in the selected region, failing over to the next region when throttled
+
+        记录的延迟按 size_hint（例如音频分钟数）归一化，使不同大小的请求可比较。
+        Recorded latency is normalized by size_hint (e.g. audio minutes) so requests of different sizes are comparable.
+        """
+        attempted = set()
+        while True:
+            slot = self.acquire(exclude=attempted)
+            attempted.add(slot.region)
+            start_time = time.time()
+            try:
+                result = await func(slot)
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(slot, throttled=throttled)
+                if throttled and len(attempted) < len(self.slots):
+                    logger.info(
+                        f"区域 {slot.region} 限流，切换到其他区域 | Region {slot.region} throttled, failing over to another region"
+                    )
+                    continue
+                raise
+            except BaseException:
+                # 被取消（例如客户端断开）时也要归还名额，否则该区域的负载永远偏高
+                # Give the slot back when cancelled (e.g. the client disconnected), or the region stays loaded forever
+                self.release(slot)
+                raise
+            self.release(slot, latency=(time.time() - start_time) / max(size_hint, 1.0))
+            return result
+
+
+def build_default_pool():
+    """
+    根据配置构建区域池，未配置多区域时使用默认区域和存储桶
+    Build the regional pool from configuration, falling back to the default region and bucket
+    """
+    region_buckets = parse_region_buckets(TRANSCRIBE_REGIONS, S3_BUCKET_NAME)
+    if not region_buckets:
+        # None 表示使用会话的默认区域 | None means the session's default region
+        region_buckets = [(None, S3_BUCKET_NAME)]
+    return RegionalPool(region_buckets)
+
+
+# 进程级区域池 | Process-wide regional pool
+regional_pool = build_default_pool()
@@ -0,0 +1,159 @@
+"""
+LLM响应缓存模块，按 (模型, 推理参数, 提示词) 缓存确定性的Bedrock响应（内存LRU + 可选SQLite磁盘层）
+LLM response cache module, caches deterministic Bedrock responses by (model, inference config, prompt)
+(in-memory LRU + optional SQLite disk tier)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .logger import log_cache_stats
+
+
+def make_cache_key(*parts):
+    """
+    对任意可JSON序列化的部分计算稳定的SHA-256缓存键
+    Compute a stable SHA-256 cache key over any JSON-serializable parts
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    按字节数限制大小的线程安全LRU缓存
+    Thread-safe LRU cache bounded by total size in bytes
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    @staticmethod
+    def _size(value):
+        return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._size(previous)
+            self._items[key] = value
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= self._size(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteCache:
+    """
+    带TTL的SQLite磁盘缓存层
+    SQLite disk cache tier with TTL
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl and time.time() - created_at > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def purge_expired(self):
+        """
+        删除过期条目
+        Delete expired entries
+        """
+        if not self.ttl:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,))
+
+
+class ResponseCache:
+    """
+    两级响应缓存，命中/未命中计数通过日志输出
+    Two-tier response cache, hit/miss counters are reported through the logger
+    """
+
+    def __init__(self, name, memory, disk=None):
+        self.name = name
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, *counters):
+        with self._lock:
+            for counter in counters:
+                self._stats[counter] += 1
+            return dict(self._stats, memory_items=len(self.memory), memory_bytes=self.memory.current_bytes)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            log_cache_stats(self.name, "hit", self._count("hits", "memory_hits"))
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                log_cache_stats(self.name, "hit", self._count("hits", "disk_hits"))
+                return value
+
+        log_cache_stats(self.name, "miss", self._count("misses"))
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        self._count("stores")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, memory_items=len(self.memory), memory_bytes=self.memory.current_bytes)
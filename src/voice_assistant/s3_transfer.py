@@ -0,0 +1,164 @@
+"""
+S3传输模块，按文件大小选择分段上传参数，并把上传进度报告给界面和服务日志
+S3 transfer module, picks multipart upload settings from the file size and reports upload progress
+to the UI and the service log
+
+同时提供通过连接池读取对象的方法，大对象使用并行范围GET。
+Also reads objects through the pooled client, with parallel ranged GETs for large objects.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.s3.transfer import TransferConfig
+
+from .config import (
+    S3_MULTIPART_THRESHOLD,
+    S3_MULTIPART_MIN_PART_SIZE,
+    S3_MULTIPART_MAX_CONCURRENCY,
+    S3_MULTIPART_TARGET_PARTS,
+    S3_RANGED_GET_THRESHOLD,
+)
+from .logger import log_transfer_stats
+
+MB = 1024 * 1024
+# S3分段上传的硬性限制 | Hard limits of S3 multipart upload
+S3_MIN_PART_SIZE = 5 * MB
+S3_MAX_PARTS = 10000
+
+
+def choose_part_size(file_size, min_part_size=None, target_parts=None):
+    """
+    选择分段大小：尽量切成 target_parts 段以便并发，但不小于最小分段，并向上取整到MB
+    Choose the part size: aim for target_parts parts for concurrency, never below the minimum part size,
+    rounded up to whole MB
+    """
+    min_part_size = max(min_part_size or S3_MULTIPART_MIN_PART_SIZE, S3_MIN_PART_SIZE)
+    target_parts = target_parts or S3_MULTIPART_TARGET_PARTS
+    part_size = max(min_part_size, math.ceil(file_size / target_parts))
+    # 保证不超过S3的10000段限制 | Stay within the S3 limit of 10000 parts
+    part_size = max(part_size, math.ceil(file_size / S3_MAX_PARTS))
+    return math.ceil(part_size / MB) * MB
+
+
+def build_transfer_config(file_size):
+    """
+    根据文件大小构建TransferConfig
+    Build a TransferConfig for the given file size
+
+    Returns:
+        tuple: (TransferConfig, 预计分段数 | expected number of parts)
+    """
+    if file_size < S3_MULTIPART_THRESHOLD:
+        # 小文件单次PUT即可 | Small files go up in a single PUT
+        return TransferConfig(multipart_threshold=S3_MULTIPART_THRESHOLD, max_concurrency=1), 1
+
+    part_size = choose_part_size(file_size)
+    parts = math.ceil(file_size / part_size)
+    config = TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=part_size,
+        max_concurrency=max(1, min(S3_MULTIPART_MAX_CONCURRENCY, parts)),
+        use_threads=True,
+    )
+    return config, parts
+
+
+class UploadProgress:
+    """
+    线程安全的上传进度回调，传给 upload_file 的 Callback 参数
+    Thread-safe upload progress callback, passed as the Callback argument of upload_file
+
+    s3transfer在重试某个分段前会回报负的字节数，据此统计重试次数。
+    s3transfer reports negative byte counts before retrying a part, which is how retries are counted.
+    """
+
+    def __init__(self, file_name, total_bytes, parts=1, progress=None, report_interval=1.0):
+        self.file_name = file_name
+        self.total_bytes = total_bytes
+        self.parts = parts
+        self.progress = progress
+        self.report_interval = report_interval
+        self.transferred = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._last_report = 0.0
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            if bytes_amount < 0:
+                self.retries += 1
+            self.transferred = max(0, self.transferred + bytes_amount)
+            now = time.time()
+            if now - self._last_report < self.report_interval and self.transferred < self.total_bytes:
+                return
+            self._last_report = now
+            stats = self.stats()
+
+        if self.progress is not None:
+            try:
+                self.progress(
+                    stats["fraction"],
+                    desc=f"上传中 {stats['fraction']:.0%} | Uploading {stats['fraction']:.0%}",
+                )
+            except Exception:
+                # 进度显示失败不应影响上传 | A progress display failure must not affect the upload
+                pass
+        log_transfer_stats("progress", stats)
+
+    def stats(self):
+        elapsed = max(time.time() - self._started, 1e-6)
+        return {
+            "file_name": self.file_name,
+            "bytes": self.transferred,
+            "total_bytes": self.total_bytes,
+            "fraction": round(self.transferred / self.total_bytes, 4) if self.total_bytes else 1.0,
+            "parts": self.parts,
+            "retries": self.retries,
+            "elapsed_seconds": round(elapsed, 3),
+            "bytes_per_second": round(self.transferred / elapsed, 1),
+        }
+
+    def finish(self):
+        """
+        记录本次上传的吞吐量指标
+        Record throughput metrics of this upload
+        """
+        with self._lock:
+            stats = self.stats()
+        log_transfer_stats("complete", stats)
+        return stats
+
+
+def fetch_object(s3, bucket, key, ranged_threshold=None, part_size=None, max_workers=None):
+    """
+    通过连接池中的S3客户端读取对象；大对象按字节范围并行GET后拼接
+    Read an object through the pooled S3 client; large objects are fetched with parallel ranged GETs and joined
+
+    第一次GET只读取前 ranged_threshold 字节并从 ContentRange 得到总大小，小对象只需一次请求。
+    The first GET reads only the first ranged_threshold bytes and learns the total size from ContentRange,
+    so small objects take a single request.
+
+    Returns:
+        bytes: 对象内容
+    """
+    ranged_threshold = ranged_threshold or S3_RANGED_GET_THRESHOLD
+    part_size = part_size or S3_MULTIPART_MIN_PART_SIZE
+    max_workers = max_workers or S3_MULTIPART_MAX_CONCURRENCY
+
+    first = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{ranged_threshold - 1}")
+    head = first["Body"].read()
+    content_range = first.get("ContentRange")
+    size = int(content_range.rsplit("/", 1)[1]) if content_range else len(head)
+    if size <= len(head):
+        return head
+
+    def fetch_range(start):
+        end = min(start + part_size, size) - 1
+        return s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")["Body"].read()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parts = list(executor.map(fetch_range, range(len(head), size, part_size)))
+    return head + b"".join(parts)
@@ -0,0 +1,177 @@
+"""
+单飞合并模块：相同键的并发请求只执行一次计算，其余请求等待并共享同一个结果
+Single-flight module: concurrent requests with the same key run the computation once,
+the others wait for it and share the same result
+
+用于重复点击“处理”或多个用户同时提交同一文件时，避免重复的上传、Transcribe任务和Bedrock调用。
+结果只在计算进行期间共享，完成后由各自的缓存负责后续请求。
+Used so a double-clicked "Process" or several users submitting the same file do not repeat the upload,
+Transcribe job and Bedrock call. Results are only shared while the computation is in flight; afterwards
+the regular caches serve later requests.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from .logger import logger
+
+
+class Flight:
+    """
+    一次 claim 的结果：领头者执行计算并发布结果，跟随者直接得到共享结果
+    Outcome of a claim: the leader runs the computation and publishes it, a follower gets the shared result
+    """
+
+    def __init__(self, group=None, key=None, future=None, leader=True, result=None):
+        self.group = group
+        self.key = key
+        self.future = future
+        self.leader = leader
+        self.result = result
+
+    def _settle(self, settle):
+        if self.future is None or self.future.done():
+            return
+        self.group._forget(self.key, self.future)
+        settle(self.future)
+
+    def resolve(self, result):
+        """
+        发布结果，唤醒所有跟随者 | Publish the result and wake every follower
+        """
+        self._settle(lambda future: future.set_result(result))
+
+    def reject(self, error):
+        """
+        发布异常，跟随者收到同一个异常 | Publish an error, followers receive the same exception
+        """
+        self._settle(lambda future: future.set_exception(error))
+
+    def abandon(self):
+        """
+        领头者未完成就退出（被取消或调用方停止迭代）时调用，跟随者重新竞争领头；已发布时不做任何事
+        Called when the leader exits unfinished (cancelled or the caller stopped iterating), so followers
+        compete to lead again; does nothing once settled
+        """
+        self._settle(lambda future: future.cancel())
+
+
+class SingleFlight:
+    """
+    按键合并进行中的计算，线程和asyncio调用方可以互相等待
+    Coalesce in-flight computations by key; threads and asyncio callers can wait on each other
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.led = 0
+        self.shared = 0
+
+    def _join(self, key):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.led += 1
+            return future, True
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _log_shared(self, key):
+        logger.info(
+            f"合并重复的进行中请求 [{self.name}]: {key[:12]} | Coalesced duplicate in-flight request [{self.name}]: {key[:12]}"
+        )
+
+    def claim(self, key):
+        """
+        成为该键的领头者，或阻塞等待进行中的计算并得到其结果；key 为None时总是领头
+        Become the leader for a key, or block on the in-flight computation and receive its result;
+        a None key always leads
+
+        Returns:
+            Flight: 领头者必须调用 resolve/reject，并在退出时调用 abandon
+                    The leader must call resolve/reject and call abandon on the way out
+        """
+        if key is None:
+            return Flight()
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return Flight(self, key, future)
+            self._log_shared(key)
+            try:
+                return Flight(leader=False, result=future.result())
+            except BaseException:
+                if not future.cancelled():
+                    raise
+                # 领头者放弃了计算，重新竞争 | The leader gave up, compete again
+
+    async def claim_async(self, key):
+        """
+        claim 的asyncio版本，等待时不占用线程
+        asyncio version of claim, holding no thread while waiting
+        """
+        if key is None:
+            return Flight()
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return Flight(self, key, future)
+            self._log_shared(key)
+            try:
+                # shield 防止跟随者被取消时连带取消共享的future | shield keeps a cancelled follower from cancelling the shared future
+                return Flight(leader=False, result=await asyncio.shield(asyncio.wrap_future(future)))
+            except BaseException:
+                if not future.cancelled():
+                    raise
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        以单飞方式调用 func，返回其结果或共享的结果
+        Call `func` single-flight, returning its result or the shared one
+        """
+        flight = self.claim(key)
+        if not flight.leader:
+            return flight.result
+        try:
+            result = func(*args, **kwargs)
+            flight.resolve(result)
+            return result
+        except Exception as e:
+            flight.reject(e)
+            raise
+        finally:
+            flight.abandon()
+
+    async def do_async(self, key, func, *args, **kwargs):
+        """
+        do 的asyncio版本，func 为协程函数
+        asyncio version of do, `func` is a coroutine function
+        """
+        flight = await self.claim_async(key)
+        if not flight.leader:
+            return flight.result
+        try:
+            result = await func(*args, **kwargs)
+            flight.resolve(result)
+            return result
+        except Exception as e:
+            flight.reject(e)
+            raise
+        finally:
+            flight.abandon()
+
+    def stats(self):
+        """
+        返回领头和合并的请求数 | Return the number of leading and coalesced requests
+        """
+        with self._lock:
+            return {"led": self.led, "shared": self.shared, "in_flight": len(self._inflight)}
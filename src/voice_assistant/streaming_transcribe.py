@@ -0,0 +1,294 @@
+"""
+实时转录模块，将麦克风音频块发送到Transcribe Streaming并返回部分和最终结果
+Live transcription module, sends microphone audio chunks to Transcribe Streaming and returns partial and final results
+
+传输层通过 StreamingTransport 接口抽象，测试中可以用本地假服务替换。
+The transport is abstracted behind the StreamingTransport interface so a local fake server can replace it in tests.
+"""
+import asyncio
+import queue
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .aws_clients import client_registry
+from .config import TRANSCRIBE_STREAMING_LANGUAGE, TRANSCRIBE_STREAMING_LANGUAGE_OPTIONS
+from .logger import logger
+
+# 可选依赖：Transcribe Streaming SDK | Optional dependency: Transcribe Streaming SDK
+try:
+    from amazon_transcribe.auth import StaticCredentialResolver
+    from amazon_transcribe.client import TranscribeStreamingClient
+    from amazon_transcribe.handlers import TranscriptResultStreamHandler
+
+    TRANSCRIBE_STREAMING_AVAILABLE = True
+except ImportError:
+    TRANSCRIBE_STREAMING_AVAILABLE = False
+
+# 结束流后等待最终结果的秒数 | Seconds to wait for final results after the stream ends
+FINISH_TIMEOUT = 5.0
+# 关闭会话时等待流结束和后台线程退出的秒数 | Seconds to wait for the stream to end and the background thread to exit on close
+CLOSE_TIMEOUT = 2.0
+# 界面中没有新音频块时保留实时会话的秒数，超过后关闭 | Seconds a live session is kept in the UI without new chunks before it is closed
+LIVE_SESSION_IDLE_TIMEOUT = 120
+
+
+def to_pcm16(samples):
+    """
+    将Gradio的音频数组转换为16位小端单声道PCM
+    Convert a Gradio audio array into 16-bit little-endian mono PCM
+    """
+    samples = np.asarray(samples)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if np.issubdtype(samples.dtype, np.floating):
+        samples = np.clip(samples, -1.0, 1.0) * 32767
+    return samples.astype("<i2").tobytes()
+
+
+class StreamingSession(ABC):
+    """
+    一次流式转录会话的接口，未实现全部抽象方法的子类在创建时即报错
+    Interface of a single streaming transcription session, a subclass missing an abstract method fails at construction
+
+    结果事件是字典: {"text": 文本, "is_partial": 是否为部分结果}
+    Result events are dicts: {"text": text, "is_partial": whether the result is partial}
+    """
+
+    @abstractmethod
+    def send_audio(self, pcm):
+        """
+        发送一块16位PCM音频 | Send one chunk of 16-bit PCM audio
+        """
+
+    @abstractmethod
+    def end(self):
+        """
+        通知服务音频已结束 | Tell the service the audio has ended
+        """
+
+    @abstractmethod
+    def events(self, timeout=0):
+        """
+        取出已到达的结果事件；timeout>0 时最多等待这么久直到流结束
+        Drain result events that have arrived; with timeout>0 wait up to that long for the stream to finish
+        """
+
+    def close(self):
+        """
+        释放会话占用的连接和线程，可重复调用；默认没有需要释放的资源
+        Release the connection and threads held by the session, safe to call repeatedly; nothing to release by default
+        """
+
+
+class StreamingTransport(ABC):
+    """
+    创建流式转录会话的传输层接口
+    Transport interface that opens streaming transcription sessions
+    """
+
+    @abstractmethod
+    def open(self, sample_rate):
+        """
+        以给定采样率打开一个新会话并返回 StreamingSession | Open a new session at the given sample rate and return a StreamingSession
+        """
+
+
+class LiveTranscript:
+    """
+    合并部分结果和最终结果得到当前转录文本
+    Merge partial and final results into the current transcript text
+    """
+
+    def __init__(self):
+        self.final_segments = []
+        self.partial = ""
+
+    def apply(self, event):
+        text = event.get("text", "").strip()
+        if event.get("is_partial"):
+            self.partial = text
+        else:
+            if text:
+                self.final_segments.append(text)
+            self.partial = ""
+
+    def text(self):
+        return " ".join(self.final_segments + ([self.partial] if self.partial else []))
+
+
+class LiveTranscriptionSession:
+    """
+    界面层使用的实时转录会话，首个音频块到达时按其采样率打开流
+    Live transcription session used by the UI, the stream is opened with the sample rate of the first chunk
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.session = None
+        self.transcript = LiveTranscript()
+
+    def _drain(self, timeout=0):
+        for event in self.session.events(timeout=timeout):
+            self.transcript.apply(event)
+
+    def feed(self, sample_rate, samples):
+        """
+        发送一个音频块并返回当前转录文本
+        Send one audio chunk and return the current transcript text
+        """
+        if self.session is None:
+            self.session = self.transport.open(sample_rate)
+        self.session.send_audio(to_pcm16(samples))
+        self._drain()
+        return self.transcript.text()
+
+    def finish(self, timeout=FINISH_TIMEOUT):
+        """
+        结束流并返回最终转录文本，无论成功与否都会关闭会话
+        End the stream and return the final transcript text, closing the session either way
+        """
+        if self.session is None:
+            return self.transcript.text()
+        try:
+            self.session.end()
+            self._drain(timeout=timeout)
+        finally:
+            self.close()
+        return self.transcript.text()
+
+    def close(self):
+        """
+        不等待最终结果直接关闭流，用于出错或录音被放弃时
+        Close the stream without waiting for final results, for errors or abandoned recordings
+        """
+        session, self.session = self.session, None
+        if session is not None:
+            session.close()
+
+
+class _AmazonTranscribeSession(StreamingSession):
+    """
+    基于 amazon-transcribe SDK 的会话，SDK的asyncio循环运行在后台线程中
+    Session backed by the amazon-transcribe SDK, whose asyncio loop runs in a background thread
+    """
+
+    def __init__(self, client, sample_rate):
+        self._events = queue.Queue()
+        self._done = threading.Event()
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="transcribe-streaming", daemon=True)
+        self._thread.start()
+        try:
+            self._stream = self._call(self._start(client, sample_rate))
+        except Exception:
+            self._stop_loop()
+            raise
+
+    def _call(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(CLOSE_TIMEOUT)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    async def _start(self, client, sample_rate):
+        options = {"media_sample_rate_hz": int(sample_rate), "media_encoding": "pcm"}
+        language_options = [code.strip() for code in TRANSCRIBE_STREAMING_LANGUAGE_OPTIONS.split(",") if code.strip()]
+        if language_options:
+            # 多个候选语言时启用自动语言识别 | Enable automatic language identification with several candidate languages
+            options.update(identify_language=True, language_options=language_options)
+        else:
+            options["language_code"] = TRANSCRIBE_STREAMING_LANGUAGE
+        stream = await client.start_stream_transcription(**options)
+        asyncio.ensure_future(self._read(stream))
+        return stream
+
+    async def _read(self, stream):
+        session = self
+
+        class Handler(TranscriptResultStreamHandler):
+            async def handle_transcript_event(self, transcript_event):
+                for result in transcript_event.transcript.results:
+                    if result.alternatives:
+                        session._events.put(
+                            {"text": result.alternatives[0].transcript, "is_partial": result.is_partial}
+                        )
+
+        try:
+            await Handler(stream.output_stream).handle_events()
+        except Exception as e:
+            logger.error(f"实时转录失败: {str(e)} | Live transcription failed: {str(e)}")
+        finally:
+            self._done.set()
+
+    def send_audio(self, pcm):
+        self._call(self._stream.input_stream.send_audio_event(audio_chunk=pcm))
+
+    def end(self):
+        self._call(self._stream.input_stream.end_stream())
+
+    def events(self, timeout=0):
+        if timeout:
+            self._done.wait(timeout)
+        drained = []
+        while True:
+            try:
+                drained.append(self._events.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if not self._done.is_set():
+            # 被放弃的流先尝试正常结束，再取消读取任务 | Try to end an abandoned stream cleanly, then cancel the reader
+            try:
+                self._call(self._stream.input_stream.end_stream(), timeout=CLOSE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"关闭实时转录流失败: {str(e)} | Failed to close live transcription stream: {str(e)}")
+            for task in asyncio.all_tasks(self._loop):
+                self._loop.call_soon_threadsafe(task.cancel)
+        self._stop_loop()
+
+
+class AmazonTranscribeTransport(StreamingTransport):
+    """
+    通过 amazon-transcribe SDK 连接Transcribe Streaming
+    Connects to Transcribe Streaming through the amazon-transcribe SDK
+    """
+
+    def __init__(self, session):
+        if not TRANSCRIBE_STREAMING_AVAILABLE:
+            raise RuntimeError(
+                "实时转录需要安装 amazon-transcribe | Live transcription requires amazon-transcribe to be installed"
+            )
+        self.boto_session = session
+
+    def open(self, sample_rate):
+        credentials = self.boto_session.get_credentials().get_frozen_credentials()
+        client = TranscribeStreamingClient(
+            region=self.boto_session.region_name,
+            credential_resolver=StaticCredentialResolver(
+                access_key_id=credentials.access_key,
+                secret_access_key=credentials.secret_key,
+                session_token=credentials.token,
+            ),
+        )
+        logger.info(f"打开实时转录流，采样率 {sample_rate} Hz | Opening live transcription stream at {sample_rate} Hz")
+        return _AmazonTranscribeSession(client, sample_rate)
+
+
+def get_streaming_transport():
+    """
+    返回默认的实时转录传输层，未安装SDK时返回None
+    Return the default live transcription transport, None when the SDK is not installed
+    """
+    if not TRANSCRIBE_STREAMING_AVAILABLE:
+        return None
+    return AmazonTranscribeTransport(client_registry.get_session())
@@ -0,0 +1,240 @@
+"""
+转录任务轮询模块，根据音频时长估计任务耗时，接近预计完成时间后再以带抖动的指数退避轮询
+Transcription job polling module, estimates job duration from the audio length and only starts polling
+near the expected finish, then backs off exponentially with jitter
+"""
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import wait as wait_futures
+
+from .config import (
+    TRANSCRIBE_JOB_OVERHEAD,
+    TRANSCRIBE_REALTIME_FACTOR,
+    TRANSCRIBE_POLL_MIN_INTERVAL,
+    TRANSCRIBE_POLL_MAX_INTERVAL,
+    TRANSCRIBE_POLL_TIMEOUT,
+    TRANSCRIBE_EVENT_FALLBACK_INTERVAL,
+)
+from .logger import logger
+from .audio_probe import AudioProbeError, probe_audio
+
+# 无法读取音频头时按格式估计的码率（字节/秒） | Assumed bitrates (bytes/second) when the audio header cannot be read
+ASSUMED_BYTES_PER_SECOND = {
+    "mp3": 128000 / 8,
+    "mp4": 128000 / 8,
+    "ogg": 96000 / 8,
+    "webm": 96000 / 8,
+    "amr": 12200 / 8,
+    "flac": 16000 * 2 * 0.6,
+    "wav": 16000 * 2,
+}
+# 发言者划分会让任务变慢 | Speaker diarization makes jobs slower
+DIARIZATION_SLOWDOWN = 1.3
+# 首次轮询在预计完成时间之前的比例 | Fraction of the expected duration to wait before the first poll
+FIRST_POLL_FRACTION = 0.8
+# 等待期间本地刷新进度的间隔（秒），不会调用API | Interval (seconds) of local progress updates while waiting, no API calls
+PROGRESS_TICK = 2.0
+# 任务完成前显示的最大进度 | Maximum progress shown before the job completes
+MAX_PENDING_FRACTION = 0.95
+
+
+def estimate_audio_duration(audio_path, media_format=None):
+    """
+    估计音频时长（秒），优先读取容器头，头中没有时长时按文件大小和典型码率估算
+    Estimate the audio duration in seconds from the container header, falling back to file size and typical
+    bitrate when the header has no duration
+    """
+    try:
+        duration = probe_audio(audio_path).duration
+        if duration:
+            return duration
+    except (AudioProbeError, OSError):
+        pass
+
+    try:
+        size = os.path.getsize(audio_path)
+    except OSError:
+        return None
+    media_format = media_format or os.path.splitext(audio_path)[1][1:].lower()
+    return size / ASSUMED_BYTES_PER_SECOND.get(media_format, ASSUMED_BYTES_PER_SECOND["mp3"])
+
+
+def estimate_job_duration(audio_seconds, enable_speaker_diarization=False):
+    """
+    根据音频时长估计转录任务耗时（秒）
+    Estimate the transcription job duration in seconds from the audio length
+    """
+    if not audio_seconds:
+        return TRANSCRIBE_JOB_OVERHEAD
+    expected = TRANSCRIBE_JOB_OVERHEAD + audio_seconds * TRANSCRIBE_REALTIME_FACTOR
+    if enable_speaker_diarization:
+        expected *= DIARIZATION_SLOWDOWN
+    return expected
+
+
+def iter_poll_delays(expected_seconds, min_interval=None, max_interval=None, rng=random):
+    """
+    生成轮询间隔：先等待到接近预计完成时间，之后按带抖动的指数退避增长，不超过上限
+    Yield polling delays: first wait until close to the expected finish, then grow with jittered
+    exponential backoff under a cap
+    """
+    min_interval = min_interval if min_interval is not None else TRANSCRIBE_POLL_MIN_INTERVAL
+    max_interval = max_interval if max_interval is not None else TRANSCRIBE_POLL_MAX_INTERVAL
+
+    yield max(min_interval, expected_seconds * FIRST_POLL_FRACTION)
+
+    attempt = 0
+    while True:
+        base = min(max_interval, min_interval * (2 ** attempt))
+        # 等量抖动，避免多个任务同时轮询 | Equal jitter so concurrent jobs do not poll in lockstep
+        yield base / 2 + rng.uniform(0, base / 2)
+        attempt += 1
+
+
+def _wait_steps(job_name, expected_seconds, on_progress, timeout, completion, clock):
+    """
+    等待逻辑的状态机，与I/O无关：产出 ("wait", (秒数, 完成future)) 或 ("poll", None)，
+    轮询时由驱动方 send 回 get_transcription_job 的响应，结束时返回最后的响应
+    I/O-free state machine of the wait: yields ("wait", (seconds, completion future)) or ("poll", None);
+    for a poll the driver sends back the get_transcription_job response, and the last response is returned
+    """
+    timeout = timeout if timeout is not None else TRANSCRIBE_POLL_TIMEOUT
+    start_time = clock()
+    polls = 0
+
+    def report(status_text):
+        if on_progress is None:
+            return
+        elapsed = clock() - start_time
+        fraction = min(MAX_PENDING_FRACTION, elapsed / expected_seconds) if expected_seconds else 0.0
+        try:
+            on_progress(fraction, desc=f"转录中 {status_text} | Transcribing {status_text}")
+        except Exception:
+            # 进度显示失败不应影响转录 | A progress display failure must not affect transcription
+            pass
+
+    def wait(delay):
+        deadline = clock() + delay
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0 or (completion is not None and completion.done()):
+                return
+            step = min(PROGRESS_TICK, remaining) if on_progress else remaining
+            yield "wait", (step, completion)
+            report(f"{int(clock() - start_time)}s")
+
+    if completion is not None:
+        # 事件驱动时轮询只用于防止事件丢失 | With events, polling only guards against lost events
+        delays = iter_poll_delays(
+            expected_seconds + TRANSCRIBE_EVENT_FALLBACK_INTERVAL,
+            min_interval=TRANSCRIBE_EVENT_FALLBACK_INTERVAL,
+            max_interval=TRANSCRIBE_EVENT_FALLBACK_INTERVAL,
+        )
+    else:
+        delays = iter_poll_delays(expected_seconds)
+
+    while True:
+        delay = next(delays)
+        elapsed = clock() - start_time
+        if elapsed + delay > timeout:
+            delay = max(0.0, timeout - elapsed)
+        yield from wait(delay)
+
+        status = yield "poll", None
+        polls += 1
+        job_status = status["TranscriptionJob"]["TranscriptionJobStatus"]
+        elapsed = clock() - start_time
+
+        if job_status in ["COMPLETED", "FAILED"]:
+            logger.info(
+                f"转录任务 {job_name} 结束 ({job_status})，耗时 {elapsed:.1f} 秒 (预计 {expected_seconds:.1f} 秒)，轮询 {polls} 次 | Transcription job {job_name} finished ({job_status}) after {elapsed:.1f}s (expected {expected_seconds:.1f}s), {polls} polls"
+            )
+            report(job_status)
+            return status
+
+        logger.info(
+            f"转录任务 {job_name} 状态 {job_status}，已等待 {int(elapsed)} 秒 (预计 {int(expected_seconds)} 秒) | Transcription job {job_name} is {job_status}, waited {int(elapsed)}s (expected {int(expected_seconds)}s)"
+        )
+        report(job_status)
+
+        if completion is not None and completion.done():
+            # 通知与实际状态不符（例如通知源失效），回退到自适应轮询
+            # The notification disagrees with the actual status (e.g. the source failed), fall back to adaptive polling
+            completion = None
+            delays = iter_poll_delays(max(0.0, expected_seconds - elapsed))
+
+        if elapsed >= timeout:
+            raise TimeoutError(
+                f"转录任务 {job_name} 超过 {int(timeout)} 秒未完成 | Transcription job {job_name} did not finish within {int(timeout)} seconds"
+            )
+
+
+def wait_for_transcription_job(
+    transcribe_client,
+    job_name,
+    expected_seconds,
+    on_progress=None,
+    timeout=None,
+    completion=None,
+    sleep=time.sleep,
+    clock=time.time,
+):
+    """
+    等待转录任务结束并返回最后一次 get_transcription_job 的响应
+    Wait for a transcription job to finish and return the last get_transcription_job response
+
+    Args:
+        expected_seconds: 预计任务耗时（秒）
+        on_progress: 可选的进度回调 on_progress(fraction, desc)，等待期间在本地刷新
+        timeout: 最长等待时间（秒），默认 TRANSCRIBE_POLL_TIMEOUT
+        completion: 可选的完成事件future；提供时等待事件唤醒，轮询仅作为低频兜底
+    """
+    steps = _wait_steps(job_name, expected_seconds, on_progress, timeout, completion, clock)
+    reply = None
+    try:
+        while True:
+            kind, value = steps.send(reply)
+            reply = None
+            if kind == "poll":
+                reply = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+            elif value[1] is not None:
+                wait_futures([value[1]], timeout=value[0])
+            else:
+                sleep(value[0])
+    except StopIteration as finished:
+        return finished.value
+
+
+async def wait_for_transcription_job_async(
+    transcribe_client,
+    job_name,
+    expected_seconds,
+    on_progress=None,
+    timeout=None,
+    completion=None,
+    clock=time.time,
+):
+    """
+    wait_for_transcription_job 的asyncio版本：等待期间用 asyncio.sleep 让出事件循环，不占用线程
+    asyncio version of wait_for_transcription_job: waits yield the event loop with asyncio.sleep instead of holding a thread
+
+    get_transcription_job 是短调用，在线程池中执行。
+    get_transcription_job is a short call and runs on the thread pool.
+    """
+    steps = _wait_steps(job_name, expected_seconds, on_progress, timeout, completion, clock)
+    awaitable_completion = asyncio.wrap_future(completion) if completion is not None else None
+    reply = None
+    try:
+        while True:
+            kind, value = steps.send(reply)
+            reply = None
+            if kind == "poll":
+                reply = await asyncio.to_thread(transcribe_client.get_transcription_job, TranscriptionJobName=job_name)
+            elif value[1] is not None:
+                await asyncio.wait([awaitable_completion], timeout=value[0])
+            else:
+                await asyncio.sleep(value[0])
+    except StopIteration as finished:
+        return finished.value
@@ -0,0 +1,113 @@
+"""
+转录文本分块模块，负责将长文本按句子或发言者片段切分为受token预算限制的块，并在优化后拼接
+Transcript chunking module, splits long text on sentence or speaker-segment boundaries into
+token-budgeted chunks and stitches the optimized chunks back together
+"""
+import re
+from difflib import SequenceMatcher
+
+# 句子结束标点（中英文） | Sentence-ending punctuation (Chinese and English)
+SENTENCE_PATTERN = re.compile(r"[^.!?。！？\n]+(?:[.!?。！？]+|\n+|$)")
+
+# CJK字符，每个字符大约一个token | CJK characters, roughly one token each
+CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+# 判断重叠句子重复的相似度阈值 | Similarity threshold for treating overlapping sentences as duplicates
+DUPLICATE_SIMILARITY = 0.8
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的token数：CJK字符按1个token，其他字符按每4个字符1个token
+    Roughly estimate token count: 1 token per CJK character, 1 token per 4 other characters
+    """
+    if not text:
+        return 0
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def split_sentences(text):
+    """
+    按句子边界切分文本
+    Split text on sentence boundaries
+    """
+    return [s.strip() for s in SENTENCE_PATTERN.findall(text or "") if s.strip()]
+
+
+def split_units(text, segments=None):
+    """
+    获取分块的基本单元：优先使用发言者片段，否则按句子切分
+    Get the basic chunking units: speaker segments when available, otherwise sentences
+    """
+    if segments and all(seg.get("text") and not seg["text"].startswith("[片段") for seg in segments):
+        return [seg["text"].strip() for seg in segments]
+    return split_sentences(text)
+
+
+def chunk_transcript(text, max_tokens, overlap_tokens=0, segments=None):
+    """
+    将文本切分为每块不超过 max_tokens 的块，相邻块之间重叠约 overlap_tokens
+    Split text into chunks of at most max_tokens each, with about overlap_tokens of overlap between neighbours
+
+    单个超长句子会单独成块，不会被从中间截断。
+    A single over-long sentence becomes its own chunk instead of being cut in the middle.
+    """
+    units = split_units(text, segments)
+    chunks = []
+    current, current_tokens = [], 0
+
+    for unit in units:
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append(" ".join(current))
+            # 从上一块末尾带入重叠的句子 | Carry overlapping sentences from the end of the previous chunk
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if overlap_size + previous_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous_tokens
+            current, current_tokens = overlap, overlap_size
+        current.append(unit)
+        current_tokens += unit_tokens
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _normalize(sentence):
+    return re.sub(r"\W+", "", sentence.lower())
+
+
+def _is_duplicate(a, b):
+    a, b = _normalize(a), _normalize(b)
+    if not a or not b:
+        return False
+    return a == b or SequenceMatcher(None, a, b).ratio() >= DUPLICATE_SIMILARITY
+
+
+def stitch_chunks(outputs, lookback=5):
+    """
+    按顺序拼接优化后的块，去掉每块开头与上一块结尾重复的句子，其余内容保持原样
+    Stitch optimized chunks in order, dropping leading sentences that repeat the end of the previous chunk
+    and keeping the rest of each chunk verbatim
+    """
+    parts = []
+    tail = []
+    for output in outputs:
+        matches = [m for m in SENTENCE_PATTERN.finditer(output or "") if m.group().strip()]
+        skip = 0
+        while skip < len(matches) and any(
+            _is_duplicate(matches[skip].group(), previous) for previous in tail
+        ):
+            skip += 1
+
+        remainder = output[matches[skip - 1].end():] if skip else (output or "")
+        remainder = remainder.strip()
+        if remainder:
+            parts.append(remainder)
+        tail = [m.group().strip() for m in matches[-lookback:]]
+    return "\n\n".join(parts)
@@ -0,0 +1,209 @@
+"""
+转录结果缓存模块，按音频内容哈希和转录设置缓存Transcribe结果（本地磁盘层 + 可选共享S3层）
+Transcription result cache module, caches Transcribe results by audio content hash and transcription settings
+(local disk tier + optional shared S3 tier)
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from .logger import logger, log_cache_stats
+from .response_cache import make_cache_key
+
+# 读取文件计算哈希时的块大小 | Block size used when hashing files
+HASH_BLOCK_SIZE = 1024 * 1024
+# 超过该大小的文件通过mmap计算哈希 | Files above this size are hashed through mmap
+HASH_MMAP_THRESHOLD = 8 * 1024 * 1024
+# 记忆化的哈希结果数量上限 | Maximum number of memoized hash results
+HASH_MEMO_SIZE = 256
+
+_hash_memo = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+
+def _hash_contents(path, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size >= HASH_MMAP_THRESHOLD:
+            # 大文件直接映射到内存，避免逐块复制到Python缓冲区
+            # Large files are memory-mapped to avoid copying blocks into Python buffers
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, HASH_BLOCK_SIZE * 16):
+                        digest.update(view[offset : offset + HASH_BLOCK_SIZE * 16])
+                finally:
+                    view.release()
+        else:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """
+    计算文件内容的SHA-256，按 (路径, 大小, 修改时间) 记忆化，同一文件在上传和缓存查找之间只读取一次
+    Compute the SHA-256 of a file's contents, memoized by (path, size, mtime) so the same file
+    is only read once across the upload and the cache lookup
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+
+    digest = _hash_contents(path, stat.st_size)
+
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return digest
+
+
+def transcription_settings(enable_speaker_diarization):
+    """
+    构建影响转录结果的设置，作为缓存键的一部分
+    Build the settings that affect the transcription result, used as part of the cache key
+    """
+    return {
+        "diarization": bool(enable_speaker_diarization),
+        "max_speaker_labels": 10 if enable_speaker_diarization else None,
+        "identify_language": True,
+    }
+
+
+def strip_speaker_information(result):
+    """
+    从发言者划分结果中去掉发言者信息，得到未划分的结果
+    Remove speaker information from a diarized result to obtain the non-diarized result
+    """
+    stripped = dict(result)
+    stripped["speaker_labels"] = None
+    stripped["segments"] = None
+    return stripped
+
+
+class TranscriptionCache:
+    """
+    内容寻址的转录结果缓存
+    Content-addressed transcription result cache
+
+    启用发言者划分的结果同样可以满足之后对同一音频的未划分请求。
+    A diarized result also satisfies a later non-diarized request for the same audio.
+    """
+
+    def __init__(self, cache_dir, s3_bucket=None, s3_prefix="transcription-cache/", s3_client_factory=None):
+        self.cache_dir = cache_dir
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix
+        self.s3_client_factory = s3_client_factory
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "s3_hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, *counters):
+        with self._lock:
+            for counter in counters:
+                self._stats[counter] += 1
+            return dict(self._stats)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取转录缓存失败: {str(e)} | Failed to read transcription cache: {str(e)}")
+            return None
+
+    def _write_disk(self, key, result):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入转录缓存失败: {str(e)} | Failed to write transcription cache: {str(e)}")
+
+    def _read_s3(self, key):
+        if not self.s3_bucket or not self.s3_client_factory:
+            return None
+        try:
+            response = self.s3_client_factory().get_object(
+                Bucket=self.s3_bucket, Key=f"{self.s3_prefix}{key}.json"
+            )
+            return json.loads(response["Body"].read().decode("utf-8"))
+        except Exception as e:
+            if "NoSuchKey" not in str(e) and "404" not in str(e):
+                logger.warning(f"读取S3转录缓存失败: {str(e)} | Failed to read S3 transcription cache: {str(e)}")
+            return None
+
+    def _write_s3(self, key, result):
+        if not self.s3_bucket or not self.s3_client_factory:
+            return
+        try:
+            self.s3_client_factory().put_object(
+                Bucket=self.s3_bucket,
+                Key=f"{self.s3_prefix}{key}.json",
+                Body=json.dumps(result, ensure_ascii=False).encode("utf-8"),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            logger.warning(f"写入S3转录缓存失败: {str(e)} | Failed to write S3 transcription cache: {str(e)}")
+
+    def _lookup(self, key):
+        result = self._read_disk(key)
+        if result is not None:
+            return result, "disk_hits"
+        result = self._read_s3(key)
+        if result is not None:
+            # 回填本地磁盘层 | Backfill the local disk tier
+            self._write_disk(key, result)
+            return result, "s3_hits"
+        return None, None
+
+    def get(self, audio_hash, enable_speaker_diarization):
+        """
+        查找缓存的转录结果，未命中时返回None
+        Look up a cached transcription result, None on a miss
+        """
+        key = make_cache_key(audio_hash, transcription_settings(enable_speaker_diarization))
+        result, tier = self._lookup(key)
+
+        if result is None and not enable_speaker_diarization:
+            # 已划分发言者的结果也能满足未划分的请求 | A diarized result also satisfies a non-diarized request
+            diarized_key = make_cache_key(audio_hash, transcription_settings(True))
+            result, tier = self._lookup(diarized_key)
+            if result is not None:
+                result = strip_speaker_information(result)
+
+        if result is None:
+            log_cache_stats("transcriptions", "miss", self._count("misses"))
+            return None
+        log_cache_stats("transcriptions", "hit", self._count("hits", tier))
+        return result
+
+    def set(self, audio_hash, enable_speaker_diarization, result):
+        """
+        缓存转录结果到磁盘层和S3层
+        Store a transcription result in the disk and S3 tiers
+        """
+        key = make_cache_key(audio_hash, transcription_settings(enable_speaker_diarization))
+        self._write_disk(key, result)
+        self._write_s3(key, result)
+        self._count("stores")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -3,12 +3,30 @@
 User interface module, responsible for creating and managing the Gradio interface
 """
 import gradio as gr
-from .aws_services import process_audio, get_available_models
+from .aws_services import get_available_models
+from .async_pipeline import iter_process_audio_async
+from .streaming_transcribe import LiveTranscriptionSession, get_streaming_transport, LIVE_SESSION_IDLE_TIMEOUT
 from .config import (
     SUPPORTED_AUDIO_FORMATS,
     OPTIMIZATION_PROMPT,
+    BEDROCK_STREAMING,
+    UI_PROCESS_CONCURRENCY,
     get_configuration_status,
 )
+from .logger import logger
+
+
+def close_live_session(session):
+    """
+    关闭被放弃的实时转录会话，释放流和后台线程
+    Close an abandoned live transcription session, releasing its stream and background thread
+    """
+    if session is None:
+        return
+    try:
+        session.close()
+    except Exception as e:
+        logger.warning(f"关闭实时转录会话失败: {str(e)} | Failed to close live transcription session: {str(e)}")
 
 
 def create_ui():
@@ -121,6 +139,24 @@ def create_ui():
                     "处理录音 | Process Recording", variant="primary"
                 )
 
+                # 实时转录模式：边说边显示结果 | Live transcription mode: results appear while speaking
+                live_mode_checkbox = gr.Checkbox(
+                    label="实时转录模式 | Live Transcription Mode",
+                    value=False,
+                    info="边录音边通过Transcribe Streaming显示转录结果 | Show transcription from Transcribe Streaming while recording",
+                )
+                audio_input_live = gr.Audio(
+                    sources=["microphone"],
+                    type="numpy",
+                    streaming=True,
+                    label="实时录音 | Live recording",
+                    visible=False,
+                )
+                # 页面关闭或会话闲置过期时关闭流 | Close the stream when the page goes away or the session idles out
+                live_session_state = gr.State(
+                    None, time_to_live=LIVE_SESSION_IDLE_TIMEOUT, delete_callback=close_live_session
+                )
+
             with gr.TabItem("上传音频 | Upload Audio"):
                 audio_input_upload = gr.Audio(
                     sources=["upload"],
@@ -171,46 +207,102 @@ def create_ui():
         )
 
         # 处理函数 | Processing function
-        def process_with_options(audio_file, model_name, prompt, enable_speaker_diarization):
+        async def process_with_options(audio_file, model_name, prompt, enable_speaker_diarization, progress=gr.Progress()):
             """
             处理音频文件的包装函数，包含增强的错误处理
             Wrapper function for processing audio files with enhanced error handling
+
+            作为异步生成器逐步更新输出，等待转录时不占用工作线程
+            Runs as an async generator so outputs update as soon as they are ready and no worker thread is held
+            while the transcription is pending
             """
             try:
                 # 验证输入 | Validate inputs
                 if not audio_file:
-                    return (
+                    yield (
                         "❌ 错误: 请先录制或上传音频文件 | Error: Please record or upload an audio file first",
                         "",
                         "",
                         "",
                     )
+                    return
 
                 # 获取选择的模型ID | Get selected model ID
                 model_id = model_choices.get(model_name)
                 if not model_id:
-                    return (
+                    yield (
                         f"❌ 错误: 无效的模型选择: {model_name} | Error: Invalid model selection: {model_name}",
                         "",
                         "",
                         "",
                     )
+                    return
 
                 # 验证提示词 | Validate prompt
                 if prompt and len(prompt.strip()) > 10000:
-                    return (
+                    yield (
                         "❌ 错误: 自定义提示词过长，请限制在10000字符以内 | Error: Custom prompt too long, please limit to 10000 characters",
                         "",
                         "",
                         "",
                     )
+                    return
 
                 # 处理音频 | Process audio
-                return process_audio(audio_file, model_id, prompt, enable_speaker_diarization)
+                async for outputs in iter_process_audio_async(
+                    audio_file,
+                    model_id,
+                    prompt,
+                    enable_speaker_diarization,
+                    stream=BEDROCK_STREAMING,
+                    progress=progress,
+                ):
+                    yield outputs
 
             except Exception as e:
                 error_msg = f"❌ 处理失败: {str(e)} | Processing failed: {str(e)}"
-                return error_msg, "", "", ""
+                yield error_msg, "", "", ""
+
+        # 实时转录函数 | Live transcription functions
+        def toggle_live_mode(enabled, session):
+            # 关闭实时模式时放弃进行中的流 | Leaving live mode abandons any stream in progress
+            close_live_session(session)
+            return gr.update(visible=not enabled), gr.update(visible=not enabled), gr.update(visible=enabled), None
+
+        def stream_live_audio(chunk, session):
+            """
+            将一个麦克风音频块发送到实时转录流，返回当前的部分结果
+            Send one microphone chunk to the live transcription stream and return the current partial result
+            """
+            if chunk is None:
+                return gr.update(), session
+            try:
+                if session is None:
+                    transport = get_streaming_transport()
+                    if transport is None:
+                        return (
+                            "❌ 实时转录需要安装 amazon-transcribe | Live transcription requires amazon-transcribe to be installed",
+                            None,
+                        )
+                    session = LiveTranscriptionSession(transport)
+                sample_rate, samples = chunk
+                return session.feed(sample_rate, samples), session
+            except Exception as e:
+                # 丢弃会话前关闭流，下一个音频块会打开新流 | Close the stream before dropping the session, the next chunk opens a new one
+                close_live_session(session)
+                return f"❌ 实时转录失败: {str(e)} | Live transcription failed: {str(e)}", None
+
+        def finish_live_audio(session):
+            """
+            录音结束时关闭流并显示最终结果
+            Close the stream when recording stops and show the final result
+            """
+            if session is None:
+                return gr.update(), None
+            try:
+                return session.finish(), None
+            except Exception as e:
+                return f"❌ 实时转录失败: {str(e)} | Live transcription failed: {str(e)}", None
 
         # 状态更新函数 | Status update functions
         def update_status_recording():
@@ -235,6 +327,7 @@ def create_ui():
             inputs=[audio_input_mic, model_dropdown, custom_prompt, speaker_diarization_checkbox],
             outputs=[transcribe_output, llm_output, language_info, speaker_info],
             show_progress=True,
+            concurrency_limit=UI_PROCESS_CONCURRENCY,
         ).then(
             fn=update_status_completed,
             inputs=None,
@@ -250,6 +343,7 @@ def create_ui():
             inputs=[audio_input_upload, model_dropdown, custom_prompt, speaker_diarization_checkbox],
             outputs=[transcribe_output, llm_output, language_info, speaker_info],
             show_progress=True,
+            concurrency_limit=UI_PROCESS_CONCURRENCY,
         ).then(
             fn=update_status_completed,
             inputs=None,
@@ -269,4 +363,25 @@ def create_ui():
             outputs=[status_info],
         )
 
+        # 实时转录事件 | Live transcription events
+        live_mode_checkbox.change(
+            fn=toggle_live_mode,
+            inputs=[live_mode_checkbox, live_session_state],
+            outputs=[audio_input_mic, process_mic_button, audio_input_live, live_session_state],
+        )
+
+        audio_input_live.stream(
+            fn=stream_live_audio,
+            inputs=[audio_input_live, live_session_state],
+            outputs=[transcribe_output, live_session_state],
+            stream_every=0.25,
+            show_progress="hidden",
+        )
+
+        audio_input_live.stop_recording(
+            fn=finish_live_audio,
+            inputs=[live_session_state],
+            outputs=[transcribe_output, live_session_state],
+        )
+
     return demo
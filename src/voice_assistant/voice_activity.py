@@ -0,0 +1,191 @@
+"""
+语音活动检测模块，基于逐帧RMS能量（带拖尾）裁剪首尾静音并可压缩过长的停顿，
+同时记录时间偏移映射，用于把转录时间戳换算回原始时间轴
+Voice activity detection module, trims leading/trailing silence and optionally collapses long pauses
+based on frame-wise RMS energy with hangover, keeping an offset map that translates transcript
+timestamps back to the original timeline
+"""
+import bisect
+
+import numpy as np
+
+from .config import (
+    VAD_FRAME_MS,
+    VAD_HANGOVER_MS,
+    VAD_MIN_DB,
+    VAD_MAX_PAUSE,
+    VAD_KEEP_PAUSE,
+)
+
+# 噪声底估计使用的能量分位数 | Energy percentile used to estimate the noise floor
+NOISE_FLOOR_PERCENTILE = 10
+# 语音阈值高于噪声底的分贝数 | Speech threshold above the noise floor in dB
+THRESHOLD_ABOVE_NOISE_DB = 12
+# 语音开始前保留的时长（秒），避免截断起音 | Audio kept before speech onset (s) so attacks are not clipped
+PRE_ROLL_SECONDS = 0.1
+
+
+def frame_rms_db(samples, frame_size):
+    """
+    计算每帧RMS能量（dBFS），末尾不足一帧的部分补零
+    Compute per-frame RMS energy in dBFS, zero-padding the last partial frame
+    """
+    frames = int(np.ceil(len(samples) / frame_size))
+    padded = np.zeros(frames * frame_size, dtype=np.float32)
+    padded[: len(samples)] = samples
+    rms = np.sqrt(np.mean(padded.reshape(frames, frame_size) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def vad_frame_size(sample_rate, frame_ms=None):
+    """
+    每个检测帧的样本数 | Samples per detection frame
+    """
+    return max(1, int(sample_rate * (frame_ms or VAD_FRAME_MS) / 1000))
+
+
+def speech_mask(energy, frame_ms=None, hangover_ms=None, min_db=None):
+    """
+    由每帧能量得到语音帧布尔数组；阈值按噪声底自适应，语音结束后保持 hangover 时长
+    Turn per-frame energy into a speech mask; the threshold adapts to the noise floor and
+    speech is held for the hangover time after it ends
+    """
+    frame_ms = frame_ms or VAD_FRAME_MS
+    hangover_ms = VAD_HANGOVER_MS if hangover_ms is None else hangover_ms
+    min_db = VAD_MIN_DB if min_db is None else min_db
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+
+    noise_floor = np.percentile(energy, NOISE_FLOOR_PERCENTILE)
+    threshold = max(min_db, noise_floor + THRESHOLD_ABOVE_NOISE_DB)
+    active = energy > threshold
+
+    # 拖尾和预留：用卷积向后/向前扩展语音帧 | Hangover and pre-roll: extend speech frames forwards/backwards by convolution
+    hangover = int(np.ceil(hangover_ms / frame_ms))
+    pre_roll = int(np.ceil(PRE_ROLL_SECONDS * 1000 / frame_ms))
+    kernel = np.ones(hangover + pre_roll + 1)
+    extended = np.convolve(active.astype(np.float32), kernel)[pre_roll : pre_roll + len(active)]
+    return extended > 0
+
+
+def detect_speech_frames(samples, sample_rate, frame_ms=None, hangover_ms=None, min_db=None):
+    """
+    返回每帧是否为语音的布尔数组及帧长
+    Return a per-frame speech mask and the frame size
+    """
+    frame_size = vad_frame_size(sample_rate, frame_ms)
+    return speech_mask(frame_rms_db(samples, frame_size), frame_ms, hangover_ms, min_db), frame_size
+
+
+def speech_regions(mask, frame_size, total_samples):
+    """
+    将帧掩码转换为 [(起始样本, 结束样本)] 的语音区间
+    Convert a frame mask into [(start sample, end sample)] speech regions
+    """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame_size
+    ends = np.minimum(np.flatnonzero(edges == -1) * frame_size, total_samples)
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+class OffsetMap:
+    """
+    压缩后时间轴到原始时间轴的分段线性映射
+    Piecewise-linear mapping from the compacted timeline to the original timeline
+
+    每段为 (压缩后起点, 原始起点, 时长)，单位为秒。
+    Each piece is (compacted start, original start, length) in seconds.
+    """
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self._starts = [piece[0] for piece in pieces]
+
+    def to_original(self, seconds):
+        if not self.pieces:
+            return seconds
+        index = max(0, bisect.bisect_right(self._starts, seconds) - 1)
+        compact_start, original_start, length = self.pieces[index]
+        return original_start + min(max(seconds - compact_start, 0.0), length)
+
+    def _translate_time(self, value):
+        translated = round(self.to_original(float(value)), 3)
+        # 保留原始类型：Transcribe原始JSON中时间是字符串 | Keep the original type: raw Transcribe JSON uses strings
+        return f"{translated:.3f}" if isinstance(value, str) else translated
+
+    def translate_segments(self, segments):
+        """
+        将片段（以及嵌套的items）中的 start_time/end_time 换算回原始时间轴
+        Translate start_time/end_time of segments (and nested items) back to the original timeline
+        """
+        if not segments:
+            return segments
+        translated = []
+        for segment in segments:
+            segment = dict(segment)
+            for field in ("start_time", "end_time"):
+                if field in segment:
+                    segment[field] = self._translate_time(segment[field])
+            if isinstance(segment.get("items"), list):
+                segment["items"] = self.translate_segments(segment["items"])
+            translated.append(segment)
+        return translated
+
+    def to_dict(self):
+        return {"pieces": self.pieces}
+
+
+def plan_compaction(mask, frame_size, total_samples, sample_rate, collapse_pauses=False, max_pause=None, keep_pause=None):
+    """
+    根据语音帧掩码决定保留的样本区间：裁剪首尾静音，可选地把超过 max_pause 的停顿压缩为 keep_pause
+    Decide which sample ranges to keep from a speech mask: trim leading/trailing silence and optionally
+    collapse pauses longer than max_pause down to keep_pause
+
+    Returns:
+        tuple: ([(起始样本, 结束样本)], OffsetMap)；没有检测到语音时保留全部
+               ([(start sample, end sample)], OffsetMap); everything is kept when no speech is found
+    """
+    max_pause = VAD_MAX_PAUSE if max_pause is None else max_pause
+    keep_pause = VAD_KEEP_PAUSE if keep_pause is None else keep_pause
+
+    regions = speech_regions(mask, frame_size, total_samples)
+    if not regions:
+        return [(0, total_samples)], OffsetMap([(0.0, 0.0, total_samples / float(sample_rate))])
+
+    # 合并不需要压缩的停顿 | Merge pauses that are not collapsed
+    kept = [list(regions[0])]
+    max_gap = int(max_pause * sample_rate) if collapse_pauses else None
+    keep_gap = int(keep_pause * sample_rate)
+    for start, end in regions[1:]:
+        if max_gap is None or start - kept[-1][1] <= max_gap:
+            kept[-1][1] = end
+        else:
+            # 停顿两侧各保留一半 | Keep half of the retained pause on each side
+            kept[-1][1] = min(kept[-1][1] + keep_gap // 2, start)
+            kept.append([max(start - (keep_gap - keep_gap // 2), kept[-1][1]), end])
+
+    pieces = []
+    compact_position = 0
+    for start, end in kept:
+        pieces.append((compact_position / float(sample_rate), start / float(sample_rate), (end - start) / float(sample_rate)))
+        compact_position += end - start
+
+    return [tuple(region) for region in kept], OffsetMap(pieces)
+
+
+def compact_audio(samples, sample_rate, collapse_pauses=False, max_pause=None, keep_pause=None, **vad_options):
+    """
+    裁剪首尾静音，可选地把超过 max_pause 的停顿压缩为 keep_pause
+    Trim leading/trailing silence and optionally collapse pauses longer than max_pause down to keep_pause
+
+    Returns:
+        tuple: (压缩后的样本, OffsetMap)；没有检测到语音时原样返回
+               (compacted samples, OffsetMap); samples are returned unchanged when no speech is found
+    """
+    mask, frame_size = detect_speech_frames(samples, sample_rate, **vad_options)
+    kept, offset_map = plan_compaction(
+        mask, frame_size, len(samples), sample_rate, collapse_pauses=collapse_pauses, max_pause=max_pause, keep_pause=keep_pause
+    )
+    if kept == [(0, len(samples))]:
+        return samples, offset_map
+    return np.concatenate([samples[start:end] for start, end in kept]), offset_map
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+异步处理流程测试
+Async processing pipeline tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import async_pipeline, aws_services, logger  # noqa: E402
+from voice_assistant.job_scheduler import JobScheduler  # noqa: E402
+from voice_assistant.transcribe_polling import wait_for_transcription_job_async  # noqa: E402
+
+from tests.test_pipeline import TRANSCRIBE_RESULT, setup_fakes  # noqa: E402
+
+
+class CompletedJobs:
+    """任何任务都已完成的假Transcribe客户端"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self.calls += 1
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName, "TranscriptionJobStatus": "COMPLETED"}}
+
+
+def test_many_waits_share_one_event_loop():
+    """测试数百个等待中的任务不需要数百个线程"""
+    client = CompletedJobs()
+    futures = [Future() for _ in range(300)]
+
+    async def run():
+        waits = [
+            asyncio.create_task(wait_for_transcription_job_async(client, f"job-{i}", 600, completion=future))
+            for i, future in enumerate(futures)
+        ]
+        await asyncio.sleep(0.2)
+        threads_while_waiting = threading.active_count()
+        for future in futures:
+            future.set_result("COMPLETED")
+        statuses = await asyncio.gather(*waits)
+        return threads_while_waiting, statuses
+
+    started = time.time()
+    threads_while_waiting, statuses = asyncio.run(run())
+
+    assert time.time() - started < 10
+    assert threads_while_waiting < 50
+    assert client.calls == 300
+    assert all(status["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED" for status in statuses)
+
+
+def test_admit_async_queues_without_threads():
+    """测试异步排队在名额释放后获得准入"""
+    scheduler = JobScheduler(max_concurrent=1, max_queued=1, queue_timeout=5)
+    order = []
+
+    async def job(name, hold):
+        async with scheduler.admit_async("us-east-1"):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def run():
+        await asyncio.gather(job("first", 0.3), job("second", 0))
+
+    asyncio.run(run())
+    assert order == ["first", "second"]
+    assert scheduler.stats() == {"running": {"us-east-1": 0}, "waiting": {"us-east-1": 0}}
+
+
+def test_iter_process_audio_async_streams(monkeypatch, tmp_path):
+    """测试异步流程与同步流程产出相同的输出"""
+    audio_path, _ = setup_fakes(monkeypatch, tmp_path, ["Hello", " world", "."])
+
+    async def fake_transcriber(path, enable_speaker_diarization, progress=None):
+        await asyncio.sleep(0)
+        return dict(TRANSCRIBE_RESULT)
+
+    async def collect():
+        return [
+            outputs
+            async for outputs in async_pipeline.iter_process_audio_async(
+                audio_path, "amazon.nova-lite-v1:0", stream=True, transcriber=fake_transcriber
+            )
+        ]
+
+    outputs = asyncio.run(collect())
+    assert outputs[0][:2] == (TRANSCRIBE_RESULT["transcript"], "")
+    assert [o[1] for o in outputs[1:4]] == ["Hello", "Hello world", "Hello world."]
+    assert outputs[-1][1] == "Hello world."
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.lines = []
+
+    def info(self, message):
+        self.lines.append(message)
+
+    error = info
+
+
+def test_service_calls_are_logged_once_on_both_paths(monkeypatch, tmp_path):
+    """测试同步和异步入口都记录一次 process_audio，转录计时覆盖整个任务"""
+    audio_path, _ = setup_fakes(monkeypatch, tmp_path, ["Hi"])
+    service_log = RecordingLogger()
+    monkeypatch.setattr(logger, "service_logger", service_log)
+
+    aws_services.process_audio(audio_path, "amazon.nova-lite-v1:0")
+
+    async def collect():
+        return [outputs async for outputs in async_pipeline.iter_process_audio_async(audio_path, "amazon.nova-lite-v1:0")]
+
+    asyncio.run(collect())
+    calls = [line for line in service_log.lines if line.startswith(("START", "SUCCESS", "ERROR"))]
+    assert [line.split(" - ")[0] for line in calls] == ["START", "SUCCESS", "START", "SUCCESS"]
+    assert all("process_audio" in line for line in calls)
+
+    async def failing_job(*args, **kwargs):
+        await asyncio.sleep(0)
+        raise RuntimeError("job failed")
+
+    monkeypatch.setattr(async_pipeline, "run_transcription_job_async", failing_job)
+    service_log.lines.clear()
+    with pytest.raises(Exception, match="job failed"):
+        asyncio.run(async_pipeline.transcribe_audio_async("s3://bucket/key", audio_path))
+    assert service_log.lines[0].endswith("Service: transcribe")
+    assert service_log.lines[-1].startswith("ERROR") and "job failed" in service_log.lines[-1]
+
+
+def test_sync_wrappers_run_the_async_pipeline(monkeypatch, tmp_path):
+    """测试保留的同步入口通过异步流程返回相同结构的结果"""
+    audio_path, _ = setup_fakes(monkeypatch, tmp_path, ["Hi"])
+    status = {"TranscriptionJob": {"LanguageCode": "en-US", "LanguageIdentification": []}}
+    transcript_data = {"results": {"transcripts": [{"transcript": "hello"}]}}
+
+    async def fake_job(*args, **kwargs):
+        return status, transcript_data
+
+    monkeypatch.setattr(async_pipeline, "run_transcription_job_async", fake_job)
+
+    result = aws_services.transcribe_audio("s3://bucket/key", audio_path)
+
+    assert (result["transcript"], result["language_code"]) == ("hello", "en-US")
+    assert aws_services.upload_and_transcribe(audio_path) == TRANSCRIBE_RESULT
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+音频预处理测试
+Audio preprocessing tests
+"""
+import os
+import struct
+import sys
+import wave
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import audio_preprocessing  # noqa: E402
+from voice_assistant.audio_preprocessing import downmix, normalize_audio, read_wav, resample  # noqa: E402
+from voice_assistant.voice_activity import compact_audio  # noqa: E402
+
+
+def write_stereo_wav(path, rate, seconds, frequency):
+    t = np.arange(int(rate * seconds)) / rate
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t)
+    stereo = np.stack([tone, tone], axis=1)
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes((stereo * 32767).astype("<i2").tobytes())
+
+
+def test_normalize_stereo_48k(tmp_path):
+    """测试48 kHz立体声被转换为16 kHz单声道且体积缩小"""
+    source = tmp_path / "mic.wav"
+    write_stereo_wav(source, 48000, 1.0, 440)
+
+    output_path, stats, offset_map = normalize_audio(str(source), output_dir=str(tmp_path))
+    with wave.open(output_path, "rb") as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getframerate() == 16000
+        assert wav_file.getnframes() == 16000
+    assert stats["reduction_ratio"] >= 5.9
+    assert stats["bytes_saved"] > 0
+
+    # 已规范化的文件无需再次处理 | An already normalized file needs no work
+    assert offset_map is None
+    assert normalize_audio(output_path) == (None, None, None)
+
+
+def test_resample_keeps_tone_and_removes_alias():
+    """测试重采样保留通带内的音调并衰减高于新奈奎斯特频率的成分"""
+    rate = 48000
+    t = np.arange(rate) / rate
+    passband = resample(np.sin(2 * np.pi * 1000 * t).astype(np.float32), rate, 16000)
+    stopband = resample(np.sin(2 * np.pi * 12000 * t).astype(np.float32), rate, 16000)
+
+    assert 0.65 < np.sqrt(np.mean(passband[100:-100] ** 2)) < 0.75
+    assert np.sqrt(np.mean(stopband[100:-100] ** 2)) < 0.02
+
+
+def test_read_float_wav(tmp_path):
+    """测试读取32位浮点WAV"""
+    samples = np.array([0.5, -0.25], dtype="<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, 1, 8000, 32000, 4, 32)
+    data = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(samples)) + samples
+    path = tmp_path / "float.wav"
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(data)) + data)
+
+    decoded, rate = read_wav(str(path))
+    assert rate == 8000
+    assert decoded[:, 0].tolist() == [0.5, -0.25]
+
+
+def test_block_processing_matches_in_memory_result(monkeypatch, tmp_path):
+    """测试分块读取、重采样和静音裁剪与整段内存处理的结果一致"""
+    rate = 44100
+    t = np.arange(rate) / rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    silence = np.zeros(rate)
+    mono = np.concatenate([silence, tone, silence, tone, silence])
+    source = tmp_path / "speech.wav"
+    with wave.open(str(source), "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes((np.stack([mono, mono], axis=1) * 32767).astype("<i2").tobytes())
+
+    samples, _ = read_wav(str(source))
+    expected, expected_map = compact_audio(resample(downmix(samples), rate, 16000), 16000)
+
+    # 块远小于文件，跨块边界的插值和能量帧都要正确 | Blocks much smaller than the file, so interpolation and energy frames cross block edges
+    monkeypatch.setattr(audio_preprocessing, "WAV_BLOCK_FRAMES", 1000)
+    monkeypatch.setattr(audio_preprocessing, "RESAMPLE_BLOCK", 777)
+    output_path, stats, offset_map = normalize_audio(str(source), output_dir=str(tmp_path), trim_silence=True)
+
+    output, output_rate = read_wav(output_path)
+    assert output_rate == 16000
+    assert output.shape == (len(expected), 1)
+    assert np.max(np.abs(output[:, 0] - expected)) < 2.0 / 32768
+    assert offset_map.pieces == expected_map.pieces
+    assert stats["output_duration_seconds"] < stats["duration_seconds"]
+    assert sorted(os.listdir(tmp_path)) == sorted(["speech.wav", os.path.basename(output_path)])
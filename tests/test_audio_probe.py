@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+音频探测测试
+Audio probe tests
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.audio_preprocessing import write_wav16  # noqa: E402
+from voice_assistant.audio_probe import AudioProbeError, probe_audio, validate_audio  # noqa: E402
+from voice_assistant.aws_services import get_media_format  # noqa: E402
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def atom(kind, body):
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def ebml(element_id, body):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + bytes([0x80 | len(body)]) + body
+
+
+def mp3_frames(count):
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, 单声道，每帧417字节 | mono, 417 bytes per frame
+    header = b"\xff\xfb\x90\xc0"
+    return (header + b"\x00" * 413) * count
+
+
+def test_probe_wav(tmp_path):
+    path = str(tmp_path / "a.wav")
+    write_wav16(path, np.zeros(16000 * 3, dtype=np.float32), 16000)
+    info = probe_audio(path)
+    assert (info.media_format, info.duration, info.sample_rate, info.channels) == ("wav", 3.0, 16000, 1)
+
+
+def test_probe_flac(tmp_path):
+    packed = (44100 << 44) | (1 << 41) | (15 << 36) | (44100 * 5)
+    streaminfo = b"\x00" * 10 + packed.to_bytes(8, "big") + b"\x00" * 16
+    info = probe_audio(write(tmp_path, "a.flac", b"fLaC" + b"\x80\x00\x00\x22" + streaminfo))
+    assert (info.media_format, info.duration, info.sample_rate, info.channels) == ("flac", 5.0, 44100, 2)
+
+
+def test_probe_mp3_with_id3_and_mislabeled_extension(tmp_path):
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    path = write(tmp_path, "recording.wav", id3 + mp3_frames(100))
+    info = probe_audio(path)
+    assert (info.media_format, info.sample_rate, info.channels) == ("mp3", 44100, 1)
+    assert abs(info.duration - 100 * 417 * 8 / 128000) < 0.01
+    # 扩展名错误时使用真实格式 | The real format wins over a wrong extension
+    assert get_media_format(path) == "mp3"
+
+
+def test_probe_ogg_opus(tmp_path):
+    def page(granule, packet, serial=b"\x01\x00\x00\x00"):
+        return b"OggS\x00\x02" + struct.pack("<q", granule) + serial + b"\x00" * 8 + bytes([1, len(packet)]) + packet
+
+    head = b"OpusHead\x01\x02" + struct.pack("<HI", 312, 48000) + b"\x00\x00\x00"
+    info = probe_audio(write(tmp_path, "a.ogg", page(0, head) + page(-1, b"x") + page(48000 * 2 + 312, b"y")))
+    assert (info.media_format, info.duration, info.sample_rate, info.channels) == ("ogg", 2.0, 48000, 2)
+
+
+def test_probe_mp4(tmp_path):
+    mdhd = atom(b"mdhd", b"\x00" * 12 + struct.pack(">II", 16000, 16000 * 7) + b"\x00" * 4)
+    hdlr = atom(b"hdlr", b"\x00" * 8 + b"soun" + b"\x00" * 12)
+    entry = struct.pack(">I4s", 36, b"mp4a") + b"\x00" * 16 + struct.pack(">HHHHI", 1, 16, 0, 0, 16000 << 16)
+    stsd = atom(b"stsd", b"\x00" * 4 + struct.pack(">I", 1) + entry)
+    trak = atom(b"trak", atom(b"mdia", mdhd + hdlr + atom(b"minf", atom(b"stbl", stsd))))
+    moov = atom(b"moov", atom(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, 7000) + b"\x00" * 80) + trak)
+    info = probe_audio(write(tmp_path, "a.m4a", atom(b"ftyp", b"M4A \x00\x00\x00\x00") + moov + atom(b"mdat", b"")))
+    assert (info.media_format, info.duration, info.sample_rate, info.channels) == ("mp4", 7.0, 16000, 1)
+
+
+def test_probe_webm(tmp_path):
+    header = ebml(0x1A45DFA3, ebml(0x4282, b"webm"))
+    info = ebml(0x1549A966, ebml(0x2AD7B1, (1000000).to_bytes(3, "big")) + ebml(0x4489, struct.pack(">d", 4500.0)))
+    audio = ebml(0xE1, ebml(0xB5, struct.pack(">d", 48000.0)) + ebml(0x9F, b"\x02"))
+    tracks = ebml(0x1654AE6B, ebml(0xAE, ebml(0x83, b"\x02") + audio))
+    segment = b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff" + info + tracks
+    result = probe_audio(write(tmp_path, "a.webm", header + segment))
+    assert (result.media_format, result.duration, result.sample_rate, result.channels) == ("webm", 4.5, 48000, 2)
+
+
+def test_probe_amr(tmp_path):
+    info = probe_audio(write(tmp_path, "a.amr", b"#!AMR\n" + (b"\x3c" + b"\x00" * 31) * 50))
+    assert (info.media_format, info.sample_rate, info.channels) == ("amr", 8000, 1)
+    assert abs(info.duration - 1.0) < 1e-9
+
+
+def test_validate_rejects_bad_input(tmp_path):
+    with pytest.raises(AudioProbeError):
+        validate_audio(write(tmp_path, "notes.mp3", b"just some text, not audio at all"))
+
+    empty = str(tmp_path / "empty.wav")
+    write_wav16(empty, np.zeros(0, dtype=np.float32), 16000)
+    with pytest.raises(AudioProbeError):
+        validate_audio(empty)
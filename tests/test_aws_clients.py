@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+AWS客户端工厂测试
+AWS client factory tests
+"""
+import os
+import sys
+import threading
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.aws_clients import ClientRegistry, build_client_config  # noqa: E402
+
+
+def test_import_does_not_create_clients():
+    """测试导入aws_services时不创建客户端"""
+    from voice_assistant import aws_services
+    from voice_assistant.aws_clients import client_registry
+
+    assert aws_services.get_client is not None
+    assert client_registry._clients == {}
+
+
+def test_client_config_settings():
+    """测试客户端配置"""
+    config = build_client_config(max_pool_connections=64)
+    assert config.max_pool_connections == 64
+    assert config.retries["mode"] == "adaptive"
+
+
+def test_clients_are_cached_per_key():
+    """测试客户端按 (服务, 区域, Profile) 缓存"""
+    registry = ClientRegistry(endpoint_overrides={"s3": "http://localhost:4566"})
+    first = registry.get_client("s3", region_name="us-east-1")
+    second = registry.get_client("s3", region_name="us-east-1")
+    other_region = registry.get_client("s3", region_name="eu-west-1")
+
+    assert first is second
+    assert first is not other_region
+    assert first.meta.endpoint_url == "http://localhost:4566"
+    assert first.meta.config.max_pool_connections == build_client_config().max_pool_connections
+
+
+def test_concurrent_access_creates_one_client():
+    """测试并发访问只创建一个客户端"""
+    registry = ClientRegistry()
+    results = []
+
+    def worker():
+        results.append(registry.get_client("transcribe", region_name="us-west-2"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in results}) == 1
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+批量处理测试
+Batch processing tests
+"""
+import json
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.aws_services import PipelineStageError  # noqa: E402
+from voice_assistant.batch import collect_inputs, load_checkpoint, percentile, run_batch  # noqa: E402
+from voice_assistant.main import build_parser  # noqa: E402
+
+from tests.test_pipeline import TRANSCRIBE_RESULT, setup_fakes  # noqa: E402
+
+
+def make_transcriber(calls, failing=()):
+    async def transcriber(path, enable_speaker_diarization, stage_gate=None):
+        calls.append(os.path.basename(path))
+        async with stage_gate("prepare"):
+            pass
+        async with stage_gate("upload"):
+            pass
+        if os.path.basename(path) in failing:
+            raise PipelineStageError("transcribe", "job failed")
+        async with stage_gate("transcribe"):
+            return dict(TRANSCRIBE_RESULT)
+
+    return transcriber
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_collect_inputs_from_directory_and_manifests(tmp_path):
+    """测试目录扫描和CSV/JSONL清单解析"""
+    (tmp_path / "audio" / "day2").mkdir(parents=True)
+    for name in ("audio/b.wav", "audio/a.mp3", "audio/day2/c.flac", "audio/notes.txt"):
+        (tmp_path / name).write_bytes(b"x")
+
+    assert [item["id"] for item in collect_inputs(str(tmp_path / "audio"))] == ["a.mp3", "b.wav", os.path.join("day2", "c.flac")]
+
+    csv_path = tmp_path / "manifest.csv"
+    csv_path.write_text("path,id,speaker_diarization\naudio/a.mp3,first,yes\naudio/a.mp3,first,no\n", encoding="utf-8")
+    items = collect_inputs(str(csv_path))
+    assert items == [{"id": "first", "path": str(tmp_path / "audio" / "a.mp3"), "speaker_diarization": True}]
+
+    jsonl_path = tmp_path / "manifest.jsonl"
+    jsonl_path.write_text('{"path": "/data/x.wav", "model_id": "m"}\n\n', encoding="utf-8")
+    assert collect_inputs(str(jsonl_path)) == [{"id": "/data/x.wav", "path": "/data/x.wav", "model_id": "m"}]
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95)) == (50, 95)
+    assert percentile([], 0.5) is None
+
+
+def test_run_batch_writes_results_and_resumes(monkeypatch, tmp_path):
+    """测试结果写入JSONL、失败记录阶段，重新运行只处理未成功的文件"""
+    setup_fakes(monkeypatch, tmp_path, ["Clean", " text"])
+    items = [{"id": name, "path": str(tmp_path / name)} for name in ("one.wav", "two.wav", "three.wav")]
+    for item in items:
+        with open(item["path"], "wb") as f:
+            f.write(b"RIFF")
+    output = str(tmp_path / "out" / "results.jsonl")
+
+    calls = []
+    report = run_batch(items, output, transcriber=make_transcriber(calls, failing={"two.wav"}), concurrency=2)
+
+    assert (report["succeeded"], report["failed"], report["skipped"]) == (2, 1, 0)
+    assert report["stages"]["upload"]["count"] == 3
+    assert report["stages"]["optimize"]["count"] == 2
+    records = {record["id"]: record for record in read_records(output)}
+    assert records["one.wav"]["optimized_text"] == "Clean text"
+    assert records["one.wav"]["transcript"] == TRANSCRIBE_RESULT["transcript"]
+    assert (records["two.wav"]["status"], records["two.wav"]["stage"]) == ("error", "transcribe")
+
+    # 模拟中断时写了一半的行 | Simulate a line half-written when interrupted
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "three.wav", "sta')
+    assert load_checkpoint(output) == {"one.wav", "three.wav"}
+
+    calls.clear()
+    report = run_batch(items, output, transcriber=make_transcriber(calls))
+
+    assert calls == ["two.wav"]
+    assert (report["succeeded"], report["skipped"]) == (1, 2)
+    assert load_checkpoint(output) == {"one.wav", "two.wav", "three.wav"}
+
+
+def test_unoptimized_records_are_redone_without_offline_mode(monkeypatch, tmp_path):
+    """测试中断的离线优化运行留下的未优化记录，在普通模式下重新运行时会被处理"""
+    setup_fakes(monkeypatch, tmp_path, ["Clean", " text"])
+    output = tmp_path / "results.jsonl"
+    output.write_text(json.dumps({"id": "one.wav", "status": "ok", "transcript": "raw"}) + "\n", encoding="utf-8")
+    items = [{"id": "one.wav", "path": str(tmp_path / "one.wav")}]
+    (tmp_path / "one.wav").write_bytes(b"RIFF")
+
+    assert load_checkpoint(str(output), offline_optimize=True) == {"one.wav"}
+    assert load_checkpoint(str(output)) == set()
+
+    calls = []
+    report = run_batch(items, str(output), transcriber=make_transcriber(calls))
+
+    assert calls == ["one.wav"]
+    assert (report["succeeded"], report["skipped"]) == (1, 0)
+    assert load_checkpoint(str(output)) == {"one.wav"}
+
+
+def test_batch_subcommand_arguments():
+    args = build_parser().parse_args(["batch", "recordings", "-o", "out.jsonl", "--upload-concurrency", "3"])
+    assert (args.command, args.source, args.output, args.upload_concurrency) == ("batch", "recordings", "out.jsonl", 3)
+    assert build_parser().parse_args([]).command is None
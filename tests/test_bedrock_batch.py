@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Bedrock批量推理测试
+Bedrock batch inference tests
+"""
+import io
+import json
+import os
+import sys
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import aws_services, bedrock_batch  # noqa: E402
+from voice_assistant.aws_services import build_inference_config, build_optimization_prompt, optimization_chunks  # noqa: E402
+from voice_assistant.batch import format_report, load_latest_records, run_batch  # noqa: E402
+from voice_assistant.transcript_chunker import stitch_chunks  # noqa: E402
+from voice_assistant.bedrock_batch import (  # noqa: E402
+    AWSBatchInferenceBackend,
+    LocalBatchInferenceBackend,
+    build_model_input,
+    optimize_batch,
+    parse_model_output,
+)
+
+from tests.test_pipeline import TRANSCRIBE_RESULT, setup_fakes  # noqa: E402
+
+NOVA = "amazon.nova-lite-v1:0"
+CLAUDE = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+
+
+def test_model_input_and_output_formats():
+    config = build_inference_config()
+    claude = build_model_input(CLAUDE, "hi", config)
+    assert claude["messages"][0]["content"][0] == {"type": "text", "text": "hi"}
+    assert claude["max_tokens"] == config["maxTokens"]
+    nova = build_model_input("us." + NOVA, "hi", config)
+    assert nova["messages"][0]["content"][0] == {"text": "hi"}
+    with pytest.raises(ValueError):
+        build_model_input("meta.llama3-70b-instruct-v1:0", "hi", config)
+
+    assert parse_model_output({"content": [{"type": "text", "text": "a"}, {"type": "text", "text": "b"}]}) == "ab"
+    assert parse_model_output({"output": {"message": {"content": [{"text": "nova"}]}}}) == "nova"
+
+
+def test_optimize_batch_fans_out_results_and_uses_cache(monkeypatch, tmp_path):
+    """测试记录按任务上限拆分、结果按ID回填，缓存命中的记录不再提交"""
+    setup_fakes(monkeypatch, tmp_path, ["unused"])
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MIN_RECORDS", 1)
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MAX_RECORDS", 2)
+
+    def respond(model_id, prompt):
+        if "broken" in prompt:
+            raise RuntimeError("ValidationException")
+        return prompt.upper()
+
+    backend = LocalBatchInferenceBackend(respond)
+    records = [{"id": f"r{i}", "text": f"text {i}"} for i in range(3)] + [{"id": "bad", "text": "broken"}]
+
+    results = optimize_batch(records, NOVA, "Fix: {text}", backend=backend)
+
+    assert len(backend.submitted) == 2
+    assert results["r1"] == {"optimized_text": build_optimization_prompt("text 1", "Fix: {text}").upper()}
+    assert results["bad"] == {"error": "ValidationException"}
+
+    # 成功的结果写入LLM缓存，再次运行只提交失败的记录 | Successes are cached, a rerun submits only the failure
+    results = optimize_batch(records, NOVA, "Fix: {text}", backend=backend)
+    assert len(backend.submitted) == 3
+    assert [line["recordId"] for line in backend.submitted[-1][2]] == ["00000000000"]
+    assert results["r0"] == {"optimized_text": "FIX: TEXT 0"}
+
+
+def test_records_are_split_into_even_jobs(monkeypatch, tmp_path):
+    """测试按上限拆分时每个任务都不低于批量推理下限"""
+    setup_fakes(monkeypatch, tmp_path, ["unused"])
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MIN_RECORDS", 3)
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MAX_RECORDS", 5)
+    backend = LocalBatchInferenceBackend(lambda model_id, prompt: "ok")
+    records = [{"id": f"r{i}", "text": f"text {i}"} for i in range(7)]
+
+    results = optimize_batch(records, NOVA, backend=backend)
+
+    assert [len(lines) for _, _, lines in backend.submitted] == [4, 3]
+    assert all(result == {"optimized_text": "ok"} for result in results.values())
+    assert len(results) == 7
+
+
+def test_long_transcripts_are_chunked_like_online_optimization(monkeypatch, tmp_path):
+    """测试超过分块阈值的转录文本按块提交并按来源拼接，按需回退也分块"""
+    _, client = setup_fakes(monkeypatch, tmp_path, ["Clean."])
+    monkeypatch.setattr(aws_services, "BEDROCK_CHUNK_TOKENS", 20)
+    monkeypatch.setattr(aws_services, "BEDROCK_CHUNK_OVERLAP_TOKENS", 0)
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MIN_RECORDS", 1)
+    text = " ".join(f"Sentence number {i} is spoken here." for i in range(12))
+    chunks = optimization_chunks(text)
+    assert len(chunks) > 1
+
+    backend = LocalBatchInferenceBackend(lambda model_id, prompt: prompt.upper())
+    results = optimize_batch([{"id": "long", "text": text}, {"id": "short", "text": "Hi."}], NOVA, "{text}", backend=backend)
+
+    assert len(backend.submitted[0][2]) == len(chunks) + 1
+    assert results["long"] == {"optimized_text": stitch_chunks([chunk.upper() for chunk in chunks])}
+    assert results["short"] == {"optimized_text": "HI."}
+
+    # 记录太少时按需回退同样逐块调用 | The on-demand fallback also calls per chunk
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MIN_RECORDS", 100)
+    results = optimize_batch([{"id": "long", "text": text + " One more."}], NOVA, backend=backend)
+    assert client.calls == len(optimization_chunks(text + " One more."))
+    assert "error" not in results["long"]
+
+
+def test_small_batches_fall_back_to_on_demand(monkeypatch, tmp_path):
+    _, client = setup_fakes(monkeypatch, tmp_path, ["Clean", " text"])
+    backend = LocalBatchInferenceBackend()
+
+    results = optimize_batch([{"id": "only", "text": "raw"}], NOVA, backend=backend)
+
+    assert results == {"only": {"optimized_text": "Clean text"}}
+    assert backend.submitted == []
+    assert client.calls == 1
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def get_paginator(self, name):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                return [{"Contents": [{"Key": key} for key in sorted(objects) if key.startswith(Prefix)]}]
+
+        return Paginator()
+
+
+class FakeBedrockControl:
+    def __init__(self):
+        self.created = None
+
+    def create_model_invocation_job(self, **kwargs):
+        self.created = kwargs
+        return {"jobArn": "arn:aws:bedrock:us-east-1:123:model-invocation-job/abc123"}
+
+    def get_model_invocation_job(self, jobIdentifier):
+        return {"status": "Completed", "outputDataConfig": self.created["outputDataConfig"]}
+
+
+def test_aws_backend_submits_and_reads_output():
+    s3, bedrock = FakeS3(), FakeBedrockControl()
+    backend = AWSBatchInferenceBackend(lambda: bedrock, lambda: s3, "bucket", "bedrock-batch/", "arn:role")
+    lines = [{"recordId": "00000000000", "modelInput": build_model_input(NOVA, "p", build_inference_config())}]
+
+    job_id = backend.submit("job-1", NOVA, lines)
+
+    assert json.loads(s3.objects["bedrock-batch/job-1/input/records.jsonl"]) == lines[0]
+    assert bedrock.created["inputDataConfig"]["s3InputDataConfig"]["s3Uri"] == "s3://bucket/bedrock-batch/job-1/input/records.jsonl"
+    assert backend.status(job_id) == ("Completed", "")
+
+    output_dir = "bedrock-batch/job-1/output/abc123/"
+    s3.objects[output_dir + "records.jsonl.out"] = "\n".join([
+        json.dumps({"recordId": "00000000000", "modelOutput": {"output": {"message": {"content": [{"text": "ok"}]}}}}),
+        json.dumps({"recordId": "00000000001", "error": {"errorCode": 400, "errorMessage": "too long"}}),
+    ]).encode()
+    s3.objects[output_dir + "manifest.json.out"] = b'{"totalRecordCount": 2}'
+
+    assert list(backend.results(job_id)) == [("00000000000", "ok", None), ("00000000001", None, "too long")]
+
+
+def test_run_batch_with_offline_optimization(monkeypatch, tmp_path):
+    """测试批量命令先转录全部文件，再通过批量推理回填优化文本"""
+    setup_fakes(monkeypatch, tmp_path, ["on-demand"])
+    monkeypatch.setattr(bedrock_batch, "BEDROCK_BATCH_MIN_RECORDS", 1)
+    items = [{"id": name, "path": str(tmp_path / name)} for name in ("a.wav", "b.wav")]
+
+    async def transcriber(path, enable_speaker_diarization, stage_gate=None):
+        return dict(TRANSCRIBE_RESULT)
+
+    backend = LocalBatchInferenceBackend(lambda model_id, prompt: "batched")
+    output = str(tmp_path / "results.jsonl")
+    report = run_batch(items, output, model_id=NOVA, transcriber=transcriber, offline_optimize=True, batch_backend=backend)
+
+    assert report["succeeded"] == 2
+    assert len(backend.submitted) == 1
+    # 批量推理单独报告，不作为逐文件的优化阶段 | Batch inference is reported on its own, not as the per-file optimize stage
+    assert report["stages"]["optimize"]["count"] == 0
+    assert (report["batch_inference"]["succeeded"], report["batch_inference"]["failed"]) == (2, 0)
+    assert "Batch inference" in format_report(report)
+    assert {record["optimized_text"] for record in load_latest_records(output).values()} == {"batched"}
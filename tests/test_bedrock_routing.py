@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Bedrock调用路由测试
+Bedrock invocation routing tests
+"""
+import os
+import sys
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import aws_services  # noqa: E402
+from voice_assistant.bedrock_routing import (  # noqa: E402
+    RouteCache,
+    InferenceProfileResolver,
+    is_inference_profile_id,
+)
+
+
+class FakeBedrockClient:
+    """只接受inference profile ID的假客户端"""
+
+    def __init__(self):
+        self.calls = []
+
+    def converse(self, modelId, messages, inferenceConfig):
+        self.calls.append(modelId)
+        if not modelId.startswith("us."):
+            raise Exception(
+                "ValidationException: Invocation of model ID with on-demand throughput isn't supported."
+            )
+        return {"output": {"message": {"content": [{"text": "ok"}]}}}
+
+
+def test_route_cache_saves_round_trip(monkeypatch):
+    """测试缓存路由后只需一次往返"""
+    monkeypatch.setattr(aws_services, "route_cache", RouteCache())
+    client = FakeBedrockClient()
+    model_id = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+
+    _, first_id = aws_services.try_model_with_fallback(model_id, client, [], {})
+    assert len(client.calls) == 2
+
+    client.calls.clear()
+    _, second_id = aws_services.try_model_with_fallback(model_id, client, [], {})
+    assert client.calls == [first_id] == [second_id]
+    assert aws_services.route_cache.stats()["round_trips_saved"] == 1
+
+
+def test_cached_route_kept_on_request_errors(monkeypatch):
+    """测试请求错误直接抛出且保留缓存，只有路由相关的错误才重新探测"""
+    monkeypatch.setattr(aws_services, "route_cache", RouteCache())
+    model_id = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+    aws_services.route_cache.record(model_id, "us." + model_id)
+
+    class FailingClient(FakeBedrockClient):
+        def __init__(self, error):
+            super().__init__()
+            self.error = error
+
+        def converse(self, modelId, messages, inferenceConfig):
+            if self.error and not self.calls:
+                self.calls.append(modelId)
+                raise Exception(self.error)
+            return super().converse(modelId, messages, inferenceConfig)
+
+    client = FailingClient("ValidationException: Input is too long for requested model.")
+    with pytest.raises(Exception, match="too long"):
+        aws_services.try_model_with_fallback(model_id, client, [], {})
+    assert client.calls == ["us." + model_id]
+    assert aws_services.route_cache.get(model_id) == "us." + model_id
+
+    client = FailingClient("AccessDeniedException: You don't have access to the model with the specified model ID.")
+    _, used_id = aws_services.try_model_with_fallback(model_id, client, [], {})
+    assert client.calls == ["us." + model_id, model_id, "us." + model_id]
+    assert used_id == "us." + model_id
+    assert aws_services.route_cache.stats()["invalidations"] == 1
+
+
+def test_route_cache_persistence_and_invalidation(tmp_path):
+    """测试路由持久化和失效"""
+    path = str(tmp_path / "routes.json")
+    cache = RouteCache(persist_path=path)
+    cache.record("model-a", "us.model-a")
+    assert RouteCache(persist_path=path).get("model-a") == "us.model-a"
+
+    cache.invalidate("model-a")
+    assert RouteCache(persist_path=path).get("model-a") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+PROFILE_SUMMARIES = [
+    {"inferenceProfileId": "us.anthropic.claude-3-7-sonnet-20250219-v1:0"},
+    {"inferenceProfileId": "eu.anthropic.claude-3-7-sonnet-20250219-v1:0"},
+    {"inferenceProfileId": "apac.anthropic.claude-3-7-sonnet-20250219-v1:0"},
+    {"inferenceProfileId": "global.amazon.nova-2-lite-v1:0"},
+]
+
+
+def test_profile_resolver_matches_client_region():
+    """测试按客户端区域选择inference profile"""
+    model_id = "anthropic.claude-3-7-sonnet-20250219-v1:0"
+    for region, expected in [
+        ("us-east-1", "us."),
+        ("eu-central-1", "eu."),
+        ("ap-northeast-1", "apac."),
+    ]:
+        resolver = InferenceProfileResolver(lambda: PROFILE_SUMMARIES, region_name=region)
+        assert resolver.resolve(model_id) == expected + model_id
+
+    resolver = InferenceProfileResolver(lambda: PROFILE_SUMMARIES, region_name="eu-west-1")
+    assert resolver.resolve("amazon.nova-2-lite-v1:0") == "global.amazon.nova-2-lite-v1:0"
+    assert resolver.resolve("unknown.model-v1:0") is None
+    assert is_inference_profile_id("eu.anthropic.claude-3-7-sonnet-20250219-v1:0")
+    assert not is_inference_profile_id(model_id)
+
+
+def test_profile_resolver_falls_back_to_static_mapping():
+    """测试无法获取profile列表时使用静态映射"""
+    def loader():
+        raise Exception("AccessDeniedException")
+
+    resolver = InferenceProfileResolver(loader, region_name="us-west-2")
+    assert resolver.resolve("amazon.nova-pro-v1:0") == "us.amazon.nova-pro-v1:0"
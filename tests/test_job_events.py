@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+转录任务完成事件测试
+Transcription job completion event tests
+"""
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.job_events import (  # noqa: E402
+    FileQueueEventSource,
+    JobCompletionRegistry,
+    JobEventListener,
+    parse_job_event,
+    queue_region,
+)
+from voice_assistant.transcribe_polling import wait_for_transcription_job  # noqa: E402
+
+
+def make_event(job_name, status):
+    return {
+        "source": "aws.transcribe",
+        "detail-type": "Transcribe Job State Change",
+        "detail": {"TranscriptionJobName": job_name, "TranscriptionJobStatus": status},
+    }
+
+
+class FakeTranscribe:
+    """在收到事件后才报告完成的假Transcribe客户端"""
+
+    def __init__(self):
+        self.finished = False
+        self.calls = 0
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self.calls += 1
+        status = "COMPLETED" if self.finished else "IN_PROGRESS"
+        return {"TranscriptionJob": {"TranscriptionJobStatus": status}}
+
+
+def test_parse_only_terminal_transcribe_events():
+    """测试只解析终态的Transcribe事件"""
+    assert parse_job_event(make_event("job", "COMPLETED")) == ("job", "COMPLETED")
+    assert parse_job_event(make_event("job", "IN_PROGRESS")) is None
+    assert parse_job_event({"detail-type": "EC2 Instance State-change Notification", "detail": {}}) is None
+    assert queue_region("https://sqs.eu-west-1.amazonaws.com/123/queue") == "eu-west-1"
+
+
+def test_event_before_registration_is_kept():
+    """测试先于注册到达的事件不会丢失"""
+    registry = JobCompletionRegistry()
+    assert registry.notify("job", "FAILED") is False
+    assert registry.register("job").result(timeout=1) == "FAILED"
+
+
+def test_file_queue_wakes_waiting_request(tmp_path):
+    """测试文件队列事件唤醒等待中的请求，无需频繁轮询"""
+    source = FileQueueEventSource(str(tmp_path), wait_seconds=0.05)
+    listener = JobEventListener(source).start()
+    client = FakeTranscribe()
+    completion = listener.registry.register("job")
+
+    client.finished = True
+    source.put(make_event("job", "COMPLETED"))
+
+    start = time.time()
+    status = wait_for_transcription_job(client, "job", expected_seconds=600, completion=completion)
+    listener.stop()
+
+    assert status["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED"
+    assert client.calls == 1
+    assert time.time() - start < 5
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+批量任务轮询测试
+Batched job polling tests
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.job_events import JobCompletionRegistry  # noqa: E402
+from voice_assistant.job_poller import BatchedJobPoller, UNKNOWN_STATUS  # noqa: E402
+
+
+class FakeTranscribe:
+    """按页返回任务摘要的假Transcribe客户端"""
+
+    def __init__(self, statuses, page_size=2):
+        self.statuses = statuses
+        self.page_size = page_size
+        self.list_calls = 0
+        self.error = None
+
+    def list_transcription_jobs(self, JobNameContains, MaxResults, NextToken=None):
+        self.list_calls += 1
+        if self.error:
+            raise Exception(self.error)
+        start = int(NextToken or 0)
+        names = list(self.statuses)[start : start + self.page_size]
+        response = {
+            "TranscriptionJobSummaries": [
+                {
+                    "TranscriptionJobName": name,
+                    "TranscriptionJobStatus": self.statuses[name],
+                    "CreationTime": datetime.now(timezone.utc),
+                }
+                for name in names
+            ]
+        }
+        if start + self.page_size < len(self.statuses):
+            response["NextToken"] = str(start + self.page_size)
+        return response
+
+
+def test_one_cycle_resolves_many_jobs():
+    """测试一个轮询周期用少量API调用解决多个任务"""
+    statuses = {f"transcription-{i}": "IN_PROGRESS" for i in range(6)}
+    client = FakeTranscribe(statuses)
+    registry = JobCompletionRegistry()
+    poller = BatchedJobPoller(lambda region: client, registry=registry)
+    futures = {name: registry.register(name) for name in statuses}
+    with poller._condition:
+        poller._jobs = {name: ("us-east-1", poller.clock()) for name in statuses}
+
+    poller.poll_once()
+    assert client.list_calls == 3
+    assert not any(future.done() for future in futures.values())
+
+    statuses["transcription-1"] = "COMPLETED"
+    statuses["transcription-4"] = "FAILED"
+    poller.poll_once()
+
+    assert futures["transcription-1"].result() == "COMPLETED"
+    assert futures["transcription-4"].result() == "FAILED"
+    assert poller.tracked() == 4
+
+
+def test_access_denied_disables_poller():
+    """测试缺少权限时停用批量轮询并唤醒等待者"""
+    client = FakeTranscribe({"transcription-1": "IN_PROGRESS"})
+    client.error = "An error occurred (AccessDeniedException) when calling the ListTranscriptionJobs operation"
+    registry = JobCompletionRegistry()
+    poller = BatchedJobPoller(lambda region: client, registry=registry)
+    future = registry.register("transcription-1")
+    with poller._condition:
+        poller._jobs = {"transcription-1": ("us-east-1", poller.clock())}
+
+    poller.poll_once()
+    assert future.result() == UNKNOWN_STATUS
+    assert poller.track("transcription-2") is False
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+转录任务调度测试
+Transcription job scheduler tests
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.job_scheduler import JobScheduler, SchedulerFullError, make_job_name  # noqa: E402
+
+
+class FakeTranscribe:
+    """按预设错误序列失败的假Transcribe客户端"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.started = []
+
+    def start_transcription_job(self, **params):
+        if self.errors:
+            raise Exception(self.errors.pop(0))
+        self.started.append(params["TranscriptionJobName"])
+
+
+def test_job_names_do_not_collide():
+    """测试同一秒内生成的任务名不冲突"""
+    names = {make_job_name() for _ in range(1000)}
+    assert len(names) == 1000
+    assert all(name.startswith("transcription-") for name in names)
+
+
+def test_limit_exceeded_retried_and_conflict_renamed():
+    """测试超限时退避重试，任务名冲突时换名"""
+    delays = []
+    scheduler = JobScheduler(max_retries=3, sleep=delays.append)
+    client = FakeTranscribe(
+        [
+            "An error occurred (LimitExceededException) when calling the StartTranscriptionJob operation",
+            "An error occurred (ConflictException) when calling the StartTranscriptionJob operation",
+        ]
+    )
+
+    job_name = scheduler.start_job(client, {"TranscriptionJobName": "transcription-fixed"})["TranscriptionJobName"]
+    assert len(delays) == 1
+    assert job_name != "transcription-fixed"
+    assert client.started == [job_name]
+
+
+def test_conflict_rename_returns_the_moved_output_key():
+    """测试换名后返回的参数带有新的输出位置，调用方的参数不被修改"""
+    scheduler = JobScheduler(sleep=lambda delay: None)
+    client = FakeTranscribe(["An error occurred (ConflictException) when calling the StartTranscriptionJob operation"])
+    params = {"TranscriptionJobName": "transcription-fixed", "OutputKey": "transcripts/transcription-fixed.json"}
+
+    effective = scheduler.start_job(client, params)
+    assert effective["TranscriptionJobName"] == client.started[0] != "transcription-fixed"
+    assert effective["OutputKey"] == f"transcripts/{effective['TranscriptionJobName']}.json"
+    assert params["OutputKey"] == "transcripts/transcription-fixed.json"
+
+
+def test_excess_requests_queue_then_get_rejected():
+    """测试超出配额的请求排队，队列满时拒绝"""
+    scheduler = JobScheduler(max_concurrent=1, max_queued=1, queue_timeout=5)
+    admitted = threading.Event()
+    release = threading.Event()
+
+    def queued_request():
+        with scheduler.admit("us-east-1"):
+            admitted.set()
+
+    with scheduler.admit("us-east-1"):
+        waiter = threading.Thread(target=queued_request)
+        waiter.start()
+        while scheduler.stats()["waiting"].get("us-east-1") != 1:
+            release.wait(0.01)
+        with pytest.raises(SchedulerFullError):
+            with scheduler.admit("us-east-1"):
+                pass
+        assert not admitted.is_set()
+
+    waiter.join(timeout=5)
+    assert admitted.is_set()
+    assert scheduler.stats()["running"]["us-east-1"] == 0
+
+
+def test_renames_do_not_use_up_throttling_retries():
+    """测试任务名冲突不占用限流重试次数，重试耗尽时抛出最后的LimitExceeded错误"""
+    limit = "An error occurred (LimitExceededException) when calling the StartTranscriptionJob operation"
+    conflict = "An error occurred (ConflictException) when calling the StartTranscriptionJob operation"
+    delays = []
+    scheduler = JobScheduler(max_retries=2, sleep=delays.append)
+
+    client = FakeTranscribe([conflict, conflict, limit, limit])
+    job_name = scheduler.start_job(client, {"TranscriptionJobName": "transcription-fixed"})["TranscriptionJobName"]
+    assert client.started == [job_name]
+    assert len(delays) == 2
+
+    with pytest.raises(Exception, match="LimitExceededException"):
+        scheduler.start_job(FakeTranscribe([limit] * 3), {})
+
+
+def test_release_wakes_the_waiter_of_the_same_region():
+    """测试释放某区域的名额时唤醒该区域的等待者，而不是只唤醒一个其他区域的等待者"""
+    scheduler = JobScheduler(max_concurrent=1, max_queued=5, queue_timeout=5)
+    admitted = []
+    pause = threading.Event()
+
+    def queued_request(region):
+        try:
+            with scheduler.admit(region):
+                admitted.append(region)
+        except SchedulerFullError:
+            admitted.append(f"{region}-timeout")
+
+    hold_a, hold_b = scheduler.admit("region-a"), scheduler.admit("region-b")
+    hold_a.__enter__()
+    hold_b.__enter__()
+    # 先排队区域B，notify() 会先唤醒它 | Queue region B first, notify() would wake it first
+    waiters = []
+    for region in ("region-b", "region-a"):
+        waiter = threading.Thread(target=queued_request, args=(region,))
+        waiter.start()
+        waiters.append(waiter)
+        while scheduler.stats()["waiting"].get(region) != 1:
+            pause.wait(0.01)
+
+    hold_a.__exit__(None, None, None)
+    waiters[1].join(timeout=2)
+    assert admitted == ["region-a"]
+
+    hold_b.__exit__(None, None, None)
+    waiters[0].join(timeout=5)
+    assert admitted == ["region-a", "region-b"]
+
+
+def test_release_from_another_thread_wakes_async_waiter():
+    """测试其他线程释放名额时立即唤醒异步等待者，不依赖轮询"""
+    scheduler = JobScheduler(max_concurrent=1, max_queued=1, queue_timeout=5)
+    hold = scheduler.admit("us-east-1")
+    hold.__enter__()
+
+    async def queued_request():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with scheduler.admit_async("us-east-1"):
+            return loop.time() - started
+
+    def release_later():
+        while scheduler.stats()["waiting"].get("us-east-1") != 1:
+            threading.Event().wait(0.01)
+        hold.__exit__(None, None, None)
+
+    releaser = threading.Thread(target=release_later)
+    releaser.start()
+    waited = asyncio.run(queued_request())
+    releaser.join(timeout=5)
+    assert waited < 0.4
+    assert scheduler.stats() == {"running": {"us-east-1": 0}, "waiting": {"us-east-1": 0}}
+    assert scheduler._async_waiters == {"us-east-1": []}
+
+
+def test_async_waiter_times_out():
+    """测试异步等待超时抛出 SchedulerFullError 并注销等待者"""
+    scheduler = JobScheduler(max_concurrent=1, max_queued=1, queue_timeout=0.1)
+
+    async def run():
+        async with scheduler.admit_async("us-east-1"):
+            with pytest.raises(SchedulerFullError):
+                async with scheduler.admit_async("us-east-1"):
+                    pass
+
+    asyncio.run(run())
+    assert scheduler.stats() == {"running": {"us-east-1": 0}, "waiting": {"us-east-1": 0}}
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+长音频切分与合并测试
+Long audio split and merge tests
+"""
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import async_pipeline  # noqa: E402
+from voice_assistant import audio_preprocessing  # noqa: E402
+from voice_assistant.audio_preprocessing import read_wav, write_wav16  # noqa: E402
+from voice_assistant.long_audio import find_cut_points, merge_transcripts, plan_chunks, remove_chunks, split_audio  # noqa: E402
+
+RATE = 8000
+
+
+def word(content, start, end, speaker=None):
+    item = {
+        "type": "pronunciation",
+        "start_time": f"{start:.3f}",
+        "end_time": f"{end:.3f}",
+        "alternatives": [{"content": content}],
+    }
+    if speaker:
+        item["speaker_label"] = speaker
+    return item
+
+
+def transcript(words):
+    """由 [(词, 开始, 结束, 发言者)] 构造Transcribe原始JSON，每个词一个发言者片段"""
+    items = [word(*entry) for entry in words]
+    segments = [
+        {"speaker_label": item["speaker_label"], "start_time": item["start_time"], "end_time": item["end_time"], "items": [dict(item)]}
+        for item in items
+    ]
+    return {
+        "results": {
+            "transcripts": [{"transcript": " ".join(entry[0] for entry in words)}],
+            "items": items,
+            "speaker_labels": {"speakers": len({entry[3] for entry in words}), "segments": segments},
+        }
+    }
+
+
+def test_cut_points_land_in_silence():
+    """测试切点落在理想位置附近的静音处"""
+    tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(RATE * 10) / RATE)
+    samples = np.concatenate([tone, tone, np.zeros(RATE), tone, tone]).astype(np.float32)
+
+    cuts = find_cut_points(samples, RATE, chunk_seconds=25, search_seconds=5)
+    assert len(cuts) == 1
+    assert 20.0 <= cuts[0] <= 21.0
+
+
+def test_split_audio_reads_the_file_in_blocks(monkeypatch, tmp_path):
+    """测试逐块读取时切点和片段内容与整段处理一致"""
+    tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(RATE * 10) / RATE)
+    samples = np.concatenate([tone, tone, np.zeros(RATE), tone, tone]).astype(np.float32)
+    audio_path = str(tmp_path / "long.wav")
+    write_wav16(audio_path, samples, RATE)
+    decoded = read_wav(audio_path)[0][:, 0]
+    monkeypatch.setattr(audio_preprocessing, "WAV_BLOCK_FRAMES", 4096)
+
+    chunks = split_audio(audio_path, output_dir=str(tmp_path), chunk_seconds=25, search_seconds=5)
+    try:
+        assert chunks[0]["own_end"] == find_cut_points(decoded, RATE, chunk_seconds=25, search_seconds=5)[0]
+        for chunk in chunks:
+            written = read_wav(chunk["path"])[0][:, 0]
+            expected = decoded[int(chunk["start"] * RATE) : int(chunk["end"] * RATE)]
+            assert np.max(np.abs(written - expected)) < 2.0 / 32768
+    finally:
+        remove_chunks(chunks)
+    assert sorted(os.listdir(tmp_path)) == ["long.wav"]
+
+
+def test_merge_offsets_dedupes_overlap_and_reconciles_speakers():
+    """测试合并时平移时间戳、去除重叠区域的重复词并对齐发言者标签"""
+    chunks = plan_chunks(20.0, [10.0], overlap_seconds=2.0)
+    first = transcript([("hello", 1.0, 1.5, "spk_0"), ("there", 8.5, 9.0, "spk_1"), ("friend", 10.5, 11.0, "spk_1")])
+    # 第二段从8秒开始，发言者编号与第一段相反 | Chunk two starts at 8s with the speaker labels swapped
+    second = transcript([("there", 0.5, 1.0, "spk_0"), ("friend", 2.5, 3.0, "spk_0"), ("bye", 9.0, 9.5, "spk_1")])
+
+    merged = merge_transcripts([(chunks[0], first), (chunks[1], second)], "en-US")
+    results = merged["results"]
+
+    assert results["transcripts"][0]["transcript"] == "hello there friend bye"
+    assert [item["start_time"] for item in results["items"]] == ["1.000", "8.500", "10.500", "17.000"]
+    assert [item["speaker_label"] for item in results["items"]] == ["spk_0", "spk_1", "spk_1", "spk_2"]
+    assert results["speaker_labels"]["speakers"] == 3
+
+
+def test_transcribe_long_audio_keeps_result_shape(monkeypatch, tmp_path):
+    """测试长音频模式返回与 transcribe_audio_async 相同结构的结果"""
+    audio_path = str(tmp_path / "long.wav")
+    tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(RATE * 4) / RATE)
+    write_wav16(audio_path, np.concatenate([tone, np.zeros(RATE), tone]).astype(np.float32), RATE)
+
+    monkeypatch.setattr(async_pipeline, "split_audio", lambda path: [
+        dict(chunk, path=audio_path) for chunk in plan_chunks(9.0, [4.5], overlap_seconds=1.0)
+    ])
+    monkeypatch.setattr(async_pipeline, "remove_chunks", lambda chunks: None)
+
+    async def fake_run_in_pool(path, transcriber, enable_speaker_diarization=False, progress=None, stage_gate=None):
+        status = {"TranscriptionJob": {"LanguageCode": "en-US", "LanguageIdentification": [{"LanguageCode": "en-US", "Score": 0.9}]}}
+        return status, transcript([("one", 1.0, 1.5, "spk_0"), ("two", 4.0, 4.5, "spk_0")])
+
+    monkeypatch.setattr(async_pipeline, "run_in_pool_async", fake_run_in_pool)
+
+    result = asyncio.run(async_pipeline.transcribe_long_audio_async(audio_path, enable_speaker_diarization=True))
+
+    assert set(result) == {"transcript", "language_code", "language_confidence", "speaker_labels", "segments"}
+    assert result["language_code"] == "en-US"
+    # 第一段拥有 [0, 4.5)，第二段从3.5秒开始 | Chunk one owns [0, 4.5), chunk two starts at 3.5s
+    assert result["transcript"] == "one two one two"
+    assert [segment["start_time"] for segment in result["segments"]] == [1.0, 4.0, 4.5, 7.5]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+模型目录缓存测试
+Model catalog cache tests
+"""
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.model_catalog import ModelCatalog, filter_text_models  # noqa: E402
+
+
+SUMMARIES = [
+    {"modelId": "amazon.nova-lite-v1:0", "modelName": "Nova Lite", "providerName": "Amazon", "outputModalities": ["TEXT"]},
+    {"modelId": "anthropic.claude-3-5-sonnet-20241022-v2:0", "modelName": "Claude 3.5 Sonnet v2", "providerName": "Anthropic", "outputModalities": ["TEXT"]},
+    {"modelId": "amazon.titan-image-generator-v1", "modelName": "Titan Image", "providerName": "Amazon", "outputModalities": ["IMAGE"]},
+    {"modelId": "meta.llama3-8b-instruct-v1:0", "modelName": "Llama 3 8B", "providerName": "Meta", "outputModalities": ["TEXT"]},
+]
+
+
+def test_filter_text_models():
+    """测试模型过滤和排序"""
+    models = filter_text_models(SUMMARIES)
+    assert [m["name"] for m in models] == ["Claude 3.5 Sonnet", "Nova Lite"]
+
+
+def test_disk_tier_and_stale_while_revalidate(tmp_path):
+    """测试磁盘缓存和过期后台刷新"""
+    calls = []
+
+    def fetcher():
+        calls.append(time.time())
+        return filter_text_models(SUMMARIES[: len(calls)])
+
+    cache_path = str(tmp_path / "catalog.json")
+    catalog = ModelCatalog(fetcher, cache_path=cache_path, ttl=3600)
+    assert len(catalog.get_models()) == 1
+    assert len(calls) == 1
+
+    # 新实例从磁盘读取，不调用控制面 | New instance reads from disk without hitting the control plane
+    reloaded = ModelCatalog(fetcher, cache_path=cache_path, ttl=0)
+    assert len(reloaded.get_models()) == 1
+
+    # 数据已过期：立即返回旧数据，后台刷新 | Stale data: returned immediately, refreshed in the background
+    for _ in range(100):
+        if len(calls) == 2 and not reloaded._refreshing:
+            break
+        time.sleep(0.01)
+    assert len(calls) == 2
+    reloaded.ttl = 3600
+    assert len(reloaded.get_models()) == 2
+
+
+def test_failed_refresh_keeps_cached_models(tmp_path):
+    """测试控制面故障时继续使用缓存"""
+    state = {"fail": False}
+
+    def fetcher():
+        if state["fail"]:
+            raise Exception("ServiceUnavailable")
+        return filter_text_models(SUMMARIES)
+
+    catalog = ModelCatalog(fetcher, cache_path=str(tmp_path / "catalog.json"), ttl=0)
+    models = catalog.get_models()
+    state["fail"] = True
+    assert catalog.get_models() == models
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+音频处理流程测试
+Audio processing pipeline tests
+"""
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import async_pipeline, aws_services  # noqa: E402
+from voice_assistant.bedrock_routing import RouteCache  # noqa: E402
+from voice_assistant.regional_pool import RegionalPool  # noqa: E402
+from voice_assistant.response_cache import ResponseCache, LRUCache  # noqa: E402
+
+TRANSCRIBE_RESULT = {
+    "transcript": "hello world this is a test",
+    "language_code": "en-US",
+    "language_confidence": 0.98,
+    "speaker_labels": None,
+    "segments": None,
+}
+
+
+class FakeBedrockRuntime:
+    """返回固定流式事件的假Bedrock客户端"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    def converse(self, modelId, messages, inferenceConfig):
+        self.calls += 1
+        return {
+            "output": {"message": {"content": [{"text": "".join(self.chunks)}]}},
+            "usage": {"outputTokens": len(self.chunks)},
+        }
+
+    def converse_stream(self, modelId, messages, inferenceConfig):
+        self.calls += 1
+        events = [{"messageStart": {"role": "assistant"}}]
+        events += [{"contentBlockDelta": {"delta": {"text": chunk}}} for chunk in self.chunks]
+        events += [{"messageStop": {}}, {"metadata": {"usage": {"outputTokens": len(self.chunks)}}}]
+        return {"stream": iter(events)}
+
+
+async def fake_upload_and_transcribe(*args, **kwargs):
+    return dict(TRANSCRIBE_RESULT)
+
+
+def setup_fakes(monkeypatch, tmp_path, chunks):
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"RIFF")
+    client = FakeBedrockRuntime(chunks)
+    monkeypatch.setattr(aws_services, "route_cache", RouteCache())
+    monkeypatch.setattr(aws_services, "llm_response_cache", ResponseCache("test", LRUCache(1024 * 1024)))
+    monkeypatch.setattr(aws_services, "regional_pool", RegionalPool([("us-east-1", "test-bucket")]))
+    monkeypatch.setattr(async_pipeline, "upload_and_transcribe_async", fake_upload_and_transcribe)
+    monkeypatch.setattr(aws_services, "get_client", lambda *args, **kwargs: client)
+    return str(audio_path), client
+
+
+def test_iter_process_audio_streams_deltas(monkeypatch, tmp_path):
+    """测试流式输出逐步产出优化文本"""
+    audio_path, _ = setup_fakes(monkeypatch, tmp_path, ["Hello", " world", "."])
+    outputs = list(aws_services.iter_process_audio(audio_path, "amazon.nova-lite-v1:0", None, False, stream=True))
+
+    assert outputs[0][0] == TRANSCRIBE_RESULT["transcript"]
+    assert outputs[0][1] == ""
+    assert [o[1] for o in outputs[1:4]] == ["Hello", "Hello world", "Hello world."]
+    assert outputs[-1][1] == "Hello world."
+
+
+def test_process_audio_returns_final_result(monkeypatch, tmp_path):
+    """测试同步接口返回最终结果"""
+    audio_path, client = setup_fakes(monkeypatch, tmp_path, ["Hello", " world"])
+    transcript, optimized, language_info, speaker_info = aws_services.process_audio(
+        audio_path, "amazon.nova-lite-v1:0"
+    )
+
+    assert transcript == TRANSCRIBE_RESULT["transcript"]
+    assert optimized == "Hello world"
+    assert "en-US" in language_info
+    assert client.calls == 1
+
+
+def test_llm_cache_hit_skips_bedrock(monkeypatch, tmp_path):
+    """测试LLM响应缓存命中时跳过Bedrock调用"""
+    audio_path, client = setup_fakes(monkeypatch, tmp_path, ["Cached", " answer"])
+    first = aws_services.process_audio(audio_path, "amazon.nova-lite-v1:0")
+    second = list(aws_services.iter_process_audio(audio_path, "amazon.nova-lite-v1:0", None, False, stream=True))
+
+    assert client.calls == 1
+    assert second[-1][1] == first[1] == "Cached answer"
+    assert aws_services.llm_response_cache.stats()["hits"] == 1
+
+
+class FakeS3Uploads:
+    """记录上传次数的假S3客户端"""
+
+    def __init__(self):
+        self.keys = set()
+        self.uploads = 0
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.keys:
+            raise Exception("An error occurred (404) when calling the HeadObject operation: Not Found")
+        return {}
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        self.uploads += 1
+        self.keys.add((Bucket, Key))
+
+
+def test_upload_uses_content_addressed_key(monkeypatch, tmp_path):
+    """测试按内容哈希命名对象，相同内容不重复上传"""
+    s3 = FakeS3Uploads()
+    monkeypatch.setattr(aws_services, "get_client", lambda *args, **kwargs: s3)
+    first, second = tmp_path / "tmp1.wav", tmp_path / "tmp2.wav"
+    first.write_bytes(b"RIFF same audio")
+    second.write_bytes(b"RIFF same audio")
+
+    uri_a = aws_services.upload_to_s3(str(first), bucket_name="test-bucket")
+    uri_b = aws_services.upload_to_s3(str(second), bucket_name="test-bucket")
+
+    assert uri_a == uri_b
+    assert uri_a.startswith("s3://test-bucket/audio/") and uri_a.endswith(".wav")
+    assert s3.uploads == 1
+
+
+def test_parse_transcript_location():
+    """测试解析Transcribe输出URI中的存储桶和对象键"""
+    assert aws_services.parse_transcript_location(
+        "https://s3.us-east-1.amazonaws.com/my-bucket/transcripts/job%201.json", "default", "key"
+    ) == ("my-bucket", "transcripts/job 1.json")
+    assert aws_services.parse_transcript_location(
+        "https://my-bucket.s3.us-west-2.amazonaws.com/transcripts/job.json", "default", "key"
+    ) == ("my-bucket", "transcripts/job.json")
+    assert aws_services.parse_transcript_location(None, "default", "key") == ("default", "key")
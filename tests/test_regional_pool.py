@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+区域池测试
+Regional pool tests
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.regional_pool import RegionalPool, parse_region_buckets  # noqa: E402
+
+
+def test_parse_region_buckets():
+    """测试区域配置解析"""
+    pairs = parse_region_buckets("us-east-1=bucket-a, us-west-2", default_bucket="fallback")
+    assert pairs == [("us-east-1", "bucket-a"), ("us-west-2", "fallback")]
+
+
+def test_acquire_prefers_headroom():
+    """测试优先选择并发余量最多的区域"""
+    pool = RegionalPool([("us-east-1", "a"), ("us-west-2", "b")], max_jobs=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first.region != second.region
+
+
+def test_acquire_discounts_slow_regions():
+    """测试延迟较高的区域需要更多余量"""
+    pool = RegionalPool([("us-east-1", "a"), ("us-west-2", "b")], max_jobs=10)
+    slow, fast = pool.slots
+    slow.latency, fast.latency = 4.0, 1.0
+    fast.in_flight = 5
+    assert pool.acquire().region == "us-west-2"
+
+
+def test_run_fails_over_on_throttling():
+    """测试限流时切换区域"""
+    pool = RegionalPool([("us-east-1", "a"), ("us-west-2", "b")], max_jobs=5)
+    attempts = []
+
+    def func(slot):
+        attempts.append(slot.region)
+        if len(attempts) == 1:
+            raise Exception("LimitExceededException: too many jobs")
+        return slot.region
+
+    result = pool.run(func)
+    assert result == attempts[1]
+    assert attempts[0] != attempts[1]
+    assert all(slot.in_flight == 0 for slot in pool.slots)
+    assert pool.slots[[s.region for s in pool.slots].index(attempts[0])].is_throttled()
+
+
+def test_cancelled_run_releases_its_slot():
+    """测试被取消的请求归还区域名额"""
+    pool = RegionalPool([("us-east-1", "a")], max_jobs=5)
+
+    async def slow(slot):
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(pool.run_async(slow))
+        await asyncio.sleep(0.05)
+        assert pool.slots[0].in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert pool.slots[0].in_flight == 0
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+响应缓存测试
+Response cache tests
+"""
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.response_cache import (  # noqa: E402
+    LRUCache,
+    ResponseCache,
+    SQLiteCache,
+    make_cache_key,
+)
+
+
+def test_cache_key_is_stable():
+    """测试缓存键与字典顺序无关"""
+    a = make_cache_key("model", {"temperature": 0.0, "maxTokens": 10}, "prompt")
+    b = make_cache_key("model", {"maxTokens": 10, "temperature": 0.0}, "prompt")
+    assert a == b
+    assert a != make_cache_key("model", {"maxTokens": 10, "temperature": 0.0}, "other")
+
+
+def test_lru_evicts_by_bytes():
+    """测试按字节数淘汰最久未使用的条目"""
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", "xxxx")
+    cache.set("b", "yyyy")
+    cache.get("a")
+    cache.set("c", "zzzz")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.current_bytes == 8
+
+
+def test_disk_tier_with_ttl(tmp_path):
+    """测试SQLite磁盘层和有效期"""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache("test", LRUCache(1024), SQLiteCache(path, ttl=3600))
+    cache.set("key", "value")
+
+    reopened = ResponseCache("test", LRUCache(1024), SQLiteCache(path, ttl=3600))
+    assert reopened.get("key") == "value"
+    assert reopened.stats()["disk_hits"] == 1
+
+    expired = SQLiteCache(path, ttl=0.01)
+    time.sleep(0.05)
+    assert expired.get("key") is None
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+S3传输参数和进度测试
+S3 transfer settings and progress tests
+"""
+import io
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.s3_transfer import (  # noqa: E402
+    MB,
+    S3_MAX_PARTS,
+    UploadProgress,
+    build_transfer_config,
+    choose_part_size,
+    fetch_object,
+)
+
+
+def test_part_size_scales_with_file_size():
+    """测试分段大小随文件大小增长且不超过分段数限制"""
+    assert choose_part_size(10 * MB, min_part_size=8 * MB, target_parts=40) == 8 * MB
+    assert choose_part_size(800 * MB, min_part_size=8 * MB, target_parts=40) == 20 * MB
+    huge = 2 * 1024 * MB
+    assert huge / choose_part_size(huge, min_part_size=5 * MB, target_parts=100000) <= S3_MAX_PARTS
+
+
+def test_small_files_use_single_put():
+    """测试小文件不分段"""
+    _, parts = build_transfer_config(1 * MB)
+    assert parts == 1
+
+    config, parts = build_transfer_config(400 * MB)
+    assert parts > 1
+    assert config.max_concurrency <= parts
+
+
+def test_progress_reports_fraction_and_retries():
+    """测试进度回调报告进度比例和重试次数"""
+    updates = []
+    progress = UploadProgress(
+        "a.wav", 100, parts=2, progress=lambda fraction, desc: updates.append(fraction), report_interval=0
+    )
+    progress(50)
+    progress(-50)
+    progress(50)
+    progress(50)
+
+    stats = progress.finish()
+    assert updates[-1] == 1.0
+    assert stats["retries"] == 1
+    assert stats["bytes"] == 100
+
+
+class FakeRangedS3:
+    """支持Range请求的假S3客户端"""
+
+    def __init__(self, data):
+        self.data = data
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range=None):
+        start, end = (int(x) for x in Range[len("bytes="):].split("-"))
+        self.ranges.append((start, end))
+        chunk = self.data[start : end + 1]
+        return {
+            "Body": io.BytesIO(chunk),
+            "ContentRange": f"bytes {start}-{start + len(chunk) - 1}/{len(self.data)}",
+        }
+
+
+def test_fetch_small_object_in_one_request():
+    """测试小对象只需一次请求"""
+    s3 = FakeRangedS3(b'{"results": {}}')
+    assert fetch_object(s3, "bucket", "key", ranged_threshold=1024) == b'{"results": {}}'
+    assert len(s3.ranges) == 1
+
+
+def test_fetch_large_object_with_ranged_gets():
+    """测试大对象按范围并行读取后拼接"""
+    data = bytes(range(256)) * 40
+    s3 = FakeRangedS3(data)
+    assert fetch_object(s3, "bucket", "key", ranged_threshold=1000, part_size=1000, max_workers=4) == data
+    assert len(s3.ranges) == 11
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+单飞合并测试
+Single-flight tests
+"""
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import async_pipeline, aws_services  # noqa: E402
+from voice_assistant.single_flight import SingleFlight  # noqa: E402
+
+from tests.test_pipeline import TRANSCRIBE_RESULT, FakeBedrockRuntime, setup_fakes  # noqa: E402
+
+
+def run_concurrently(count, func):
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(func) for _ in range(count)]
+        return [future.result(timeout=10) for future in futures]
+
+
+def wait_for_followers(group, count):
+    while group.stats()["shared"] < count:
+        threading.Event().wait(0.01)
+
+
+def test_concurrent_duplicates_share_one_call():
+    """测试并发的相同请求只执行一次"""
+    group = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    def request():
+        return group.do("key", compute)
+
+    threading.Thread(target=lambda: (wait_for_followers(group, 4), release.set())).start()
+    assert run_concurrently(5, request) == ["result"] * 5
+    assert len(calls) == 1
+    assert group.stats() == {"led": 1, "shared": 4, "in_flight": 0}
+
+    # 完成后不再共享，新的请求重新计算 | Nothing is shared after completion, a new request computes again
+    release.set()
+    assert group.do("key", compute) == "result"
+    assert len(calls) == 2
+
+
+def test_errors_are_shared_and_abandoned_flights_are_retried():
+    group = SingleFlight("test")
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    threading.Thread(target=lambda: (wait_for_followers(group, 1), release.set())).start()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(group.do, "key", failing) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result(timeout=10)
+
+    # 领头者放弃后，等待中的请求自己成为领头者 | After the leader gives up, the waiting request leads itself
+    leader = group.claim("key")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        follower = executor.submit(group.do, "key", lambda: "recomputed")
+        wait_for_followers(group, 2)
+        leader.abandon()
+        assert follower.result(timeout=10) == "recomputed"
+
+
+def test_async_callers_wait_on_a_thread_leader():
+    group = SingleFlight("test")
+    leader = group.claim("key")
+
+    async def follow():
+        return await group.do_async("key", None)
+
+    async def run():
+        followers = [asyncio.create_task(follow()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        # 取消一个跟随者不影响其他跟随者 | Cancelling one follower does not affect the others
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        await asyncio.to_thread(leader.resolve, "shared")
+        return await asyncio.gather(*followers[1:])
+
+    assert asyncio.run(run()) == ["shared", "shared"]
+
+
+def test_duplicate_uploads_transcribe_once(monkeypatch, tmp_path):
+    """测试同一文件的并发请求只转录一次"""
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"RIFF" + b"\x00" * 64)
+    monkeypatch.setattr(aws_services, "TRANSCRIPTION_CACHE_ENABLED", False)
+    flights = aws_services.transcription_flights
+    shared_before = flights.stats()["shared"]
+    calls = []
+
+    async def fake_transcribe(path, audio_hash=None, enable_speaker_diarization=False, progress=None, stage_gate=None):
+        calls.append(path)
+        while flights.stats()["shared"] < shared_before + 1:
+            await asyncio.sleep(0.01)
+        return dict(TRANSCRIBE_RESULT)
+
+    monkeypatch.setattr(async_pipeline, "transcribe_uncached_async", fake_transcribe)
+
+    async def run():
+        requests = [async_pipeline.upload_and_transcribe_async(str(audio_path)) for _ in range(2)]
+        return await asyncio.wait_for(asyncio.gather(*requests), timeout=10)
+
+    results = asyncio.run(run())
+
+    assert results[0] == results[1] == TRANSCRIBE_RESULT
+    assert len(calls) == 1
+    assert flights.stats()["shared"] == shared_before + 1
+    # 发言者划分设置不同时不合并 | Different diarization settings are not coalesced
+    assert aws_services.transcription_flight_key(str(audio_path)) != aws_services.transcription_flight_key(
+        str(audio_path), enable_speaker_diarization=True
+    )
+
+
+class BlockingBedrockRuntime(FakeBedrockRuntime):
+    def __init__(self, chunks, release):
+        super().__init__(chunks)
+        self.release = release
+
+    def converse_stream(self, modelId, messages, inferenceConfig):
+        self.release.wait(5)
+        return super().converse_stream(modelId, messages, inferenceConfig)
+
+
+def test_duplicate_streaming_optimizations_call_bedrock_once(monkeypatch, tmp_path):
+    """测试相同提示词的并发流式优化只调用一次Bedrock，跟随者得到完整结果"""
+    setup_fakes(monkeypatch, tmp_path, [])
+    release = threading.Event()
+    client = BlockingBedrockRuntime(["Hello", " world"], release)
+    monkeypatch.setattr(aws_services, "get_client", lambda *args, **kwargs: client)
+    monkeypatch.setattr(aws_services, "llm_flights", SingleFlight("llm"))
+    threading.Thread(target=lambda: (wait_for_followers(aws_services.llm_flights, 1), release.set())).start()
+
+    outputs = run_concurrently(
+        2, lambda: list(aws_services.optimize_with_bedrock_stream("hi", "amazon.nova-lite-v1:0"))
+    )
+
+    assert client.calls == 1
+    assert sorted(outputs, key=len) == [["Hello world"], ["Hello", "Hello world"]]
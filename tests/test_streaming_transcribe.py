@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+实时转录测试
+Live transcription tests
+"""
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import streaming_transcribe  # noqa: E402
+from voice_assistant.streaming_transcribe import (  # noqa: E402
+    LiveTranscriptionSession,
+    StreamingSession,
+    StreamingTransport,
+    to_pcm16,
+)
+
+
+class FakeStreamingSession(StreamingSession):
+    """本地假服务：每个音频块产生一个部分结果，结束时产生最终结果"""
+
+    def __init__(self, words):
+        self.words = list(words)
+        self.heard = []
+        self.pending = []
+        self.bytes_received = 0
+        self.closed = False
+
+    def send_audio(self, pcm):
+        if self.closed:
+            raise RuntimeError("stream closed")
+        self.bytes_received += len(pcm)
+        if self.words:
+            self.heard.append(self.words.pop(0))
+            self.pending.append({"text": " ".join(self.heard), "is_partial": True})
+
+    def end(self):
+        self.pending.append({"text": " ".join(self.heard), "is_partial": False})
+
+    def events(self, timeout=0):
+        drained, self.pending = self.pending, []
+        return drained
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamingTransport(StreamingTransport):
+    def __init__(self, words):
+        self.words = words
+        self.sessions = []
+
+    def open(self, sample_rate):
+        session = FakeStreamingSession(self.words)
+        self.sessions.append((sample_rate, session))
+        return session
+
+
+def test_to_pcm16_downmixes_and_scales():
+    """测试浮点立体声转换为16位单声道PCM"""
+    stereo = np.array([[1.0, 0.0], [-1.0, -1.0]], dtype=np.float32)
+    pcm = np.frombuffer(to_pcm16(stereo), dtype="<i2")
+    assert pcm.tolist() == [16383, -32767]
+
+
+def test_incomplete_interfaces_fail_at_construction():
+    """测试缺少抽象方法的会话和传输层在创建时报错，而不是在流中途"""
+
+    class NoEvents(StreamingSession):
+        def send_audio(self, pcm):
+            pass
+
+        def end(self):
+            pass
+
+    class NoOpen(StreamingTransport):
+        pass
+
+    with pytest.raises(TypeError, match="events"):
+        NoEvents()
+    with pytest.raises(TypeError, match="open"):
+        NoOpen()
+
+
+def test_partial_results_then_final():
+    """测试逐块显示部分结果，结束时得到最终结果"""
+    transport = FakeStreamingTransport(["hello", "live", "world"])
+    session = LiveTranscriptionSession(transport)
+    chunk = np.zeros(4800, dtype=np.int16)
+
+    partials = [session.feed(48000, chunk) for _ in range(3)]
+    assert partials == ["hello", "hello live", "hello live world"]
+    assert session.finish() == "hello live world"
+
+    sample_rate, fake_session = transport.sessions[0]
+    assert sample_rate == 48000
+    assert fake_session.bytes_received == 3 * 4800 * 2
+    assert fake_session.closed
+
+
+def test_abandoned_session_is_closed_and_reopened():
+    """测试出错或放弃时关闭流，下一个音频块重新打开"""
+    transport = FakeStreamingTransport(["hello", "again"])
+    session = LiveTranscriptionSession(transport)
+    session.feed(16000, np.zeros(160, dtype=np.int16))
+
+    session.close()
+    session.close()
+    assert transport.sessions[0][1].closed
+
+    session.feed(16000, np.zeros(160, dtype=np.int16))
+    assert len(transport.sessions) == 2
+
+
+class FakeInputStream:
+    def __init__(self):
+        self.ended = False
+
+    async def send_audio_event(self, audio_chunk):
+        pass
+
+    async def end_stream(self):
+        self.ended = True
+
+
+class FakeStream:
+    def __init__(self):
+        self.input_stream = FakeInputStream()
+        self.output_stream = None
+
+
+class FakeStreamingClient:
+    def __init__(self):
+        self.stream = FakeStream()
+
+    async def start_stream_transcription(self, **options):
+        return self.stream
+
+
+class SilentHandler:
+    """永远等不到结果的结果处理器 | Result handler that never receives anything"""
+
+    def __init__(self, output_stream):
+        pass
+
+    async def handle_events(self):
+        await asyncio.Event().wait()
+
+
+def test_sdk_session_close_stops_its_loop_thread(monkeypatch):
+    """测试未调用 finish 就关闭会话时结束流并停止后台事件循环线程"""
+    monkeypatch.setattr(streaming_transcribe, "TranscriptResultStreamHandler", SilentHandler, raising=False)
+    client = FakeStreamingClient()
+    session = streaming_transcribe._AmazonTranscribeSession(client, 16000)
+    session.send_audio(b"\x00\x00")
+
+    session.close()
+
+    assert client.stream.input_stream.ended
+    assert not session._thread.is_alive()
+    assert session._loop.is_closed()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+转录任务轮询测试
+Transcription job polling tests
+"""
+import os
+import random
+import sys
+import wave
+from concurrent.futures import Future
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.transcribe_polling import (  # noqa: E402
+    estimate_audio_duration,
+    iter_poll_delays,
+    wait_for_transcription_job,
+)
+
+
+class FakeClock:
+    """由sleep推进的假时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeTranscribe:
+    """在指定时间之后才完成的假Transcribe客户端"""
+
+    def __init__(self, clock, finish_at):
+        self.clock = clock
+        self.finish_at = finish_at
+        self.calls = 0
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self.calls += 1
+        status = "COMPLETED" if self.clock.now >= self.finish_at else "IN_PROGRESS"
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName, "TranscriptionJobStatus": status}}
+
+
+def test_estimate_wav_duration(tmp_path):
+    """测试从WAV文件头读取时长"""
+    path = tmp_path / "a.wav"
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * 32000)
+    assert estimate_audio_duration(str(path)) == 2.0
+
+
+def test_delays_back_off_under_cap():
+    """测试首次等待接近预计时长，之后指数退避且不超过上限"""
+    delays = iter_poll_delays(100, min_interval=2, max_interval=30, rng=random.Random(0))
+    assert next(delays) == 80
+    backoff = [next(delays) for _ in range(10)]
+    assert all(1 <= delay <= 30 for delay in backoff)
+    assert backoff[-1] >= 15
+
+
+def test_long_job_uses_few_polls():
+    """测试20分钟音频的任务只需少量API调用，并报告进度"""
+    clock = FakeClock()
+    client = FakeTranscribe(clock, finish_at=440)
+    progress = []
+
+    status = wait_for_transcription_job(
+        client,
+        "job",
+        expected_seconds=420,
+        on_progress=lambda fraction, desc: progress.append(fraction),
+        sleep=clock.sleep,
+        clock=clock.time,
+    )
+
+    assert status["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED"
+    assert client.calls < 15
+    assert len(progress) > client.calls
+    assert progress == sorted(progress)
+
+
+def test_stale_notification_falls_back_to_polling():
+    """测试通知与实际状态不符时回退到自适应轮询"""
+    clock = FakeClock()
+    client = FakeTranscribe(clock, finish_at=60)
+    completion = Future()
+    completion.set_result("UNKNOWN")
+
+    status = wait_for_transcription_job(
+        client, "job", expected_seconds=60, completion=completion, sleep=clock.sleep, clock=clock.time
+    )
+
+    assert status["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED"
+    assert client.calls < 10
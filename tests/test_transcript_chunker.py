@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+转录文本分块测试
+Transcript chunking tests
+"""
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.transcript_chunker import (  # noqa: E402
+    chunk_transcript,
+    estimate_tokens,
+    split_sentences,
+    stitch_chunks,
+)
+
+
+def test_estimate_tokens():
+    """测试token估算"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("你好世界") == 4
+
+
+def test_chunks_respect_budget_and_overlap():
+    """测试分块预算和重叠"""
+    text = " ".join(f"Sentence number {i} is here." for i in range(40))
+    chunks = chunk_transcript(text, max_tokens=40, overlap_tokens=8)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 40 for chunk in chunks)
+    # 每块以上一块的最后一句开头 | Each chunk starts with the last sentence of the previous one
+    for previous, current in zip(chunks, chunks[1:]):
+        assert split_sentences(current)[0] == split_sentences(previous)[-1]
+
+
+def test_chunks_use_speaker_segments():
+    """测试按发言者片段分块"""
+    segments = [
+        {"speaker": "spk_0", "text": "First speaker talks about the plan"},
+        {"speaker": "spk_1", "text": "Second speaker agrees with it"},
+    ]
+    chunks = chunk_transcript("ignored", max_tokens=10, segments=segments)
+    assert chunks == [segments[0]["text"], segments[1]["text"]]
+
+
+def test_stitch_removes_overlap_duplicates():
+    """测试拼接时去除重叠部分的重复句子"""
+    outputs = [
+        "The meeting started. We reviewed the budget.",
+        "We reviewed the budget! Then we discussed hiring.",
+        "Then we discussed hiring. The meeting ended.",
+    ]
+    stitched = stitch_chunks(outputs)
+    assert stitched.count("budget") == 1
+    assert stitched.count("hiring") == 1
+    assert stitched.endswith("The meeting ended.")
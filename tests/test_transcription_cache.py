@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+转录结果缓存测试
+Transcription result cache tests
+"""
+import hashlib
+import io
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant import transcription_cache  # noqa: E402
+from voice_assistant.transcription_cache import TranscriptionCache, hash_file  # noqa: E402
+
+DIARIZED_RESULT = {
+    "transcript": "hello there",
+    "language_code": "en-US",
+    "language_confidence": 0.9,
+    "speaker_labels": {"speakers": 2},
+    "segments": [{"speaker": "spk_0", "start_time": 0.0, "end_time": 1.0, "text": "hello there"}],
+}
+
+
+class FakeS3:
+    """内存中的假S3客户端"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise Exception("An error occurred (NoSuchKey) when calling the GetObject operation")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def test_hash_file(tmp_path):
+    """测试文件哈希只取决于内容"""
+    a, b = tmp_path / "a.wav", tmp_path / "b.wav"
+    a.write_bytes(b"same bytes")
+    b.write_bytes(b"same bytes")
+    assert hash_file(str(a)) == hash_file(str(b))
+
+
+def test_diarized_result_satisfies_plain_request(tmp_path):
+    """测试发言者划分结果可满足未划分的请求"""
+    cache = TranscriptionCache(str(tmp_path))
+    cache.set("abc", True, DIARIZED_RESULT)
+
+    plain = cache.get("abc", False)
+    assert plain["transcript"] == "hello there"
+    assert plain["segments"] is None
+    assert cache.get("abc", True)["segments"] == DIARIZED_RESULT["segments"]
+    assert cache.get("other", False) is None
+
+
+def test_shared_s3_tier(tmp_path):
+    """测试多个节点通过S3层共享结果"""
+    s3 = FakeS3()
+    node_a = TranscriptionCache(str(tmp_path / "a"), s3_bucket="shared", s3_client_factory=lambda: s3)
+    node_b = TranscriptionCache(str(tmp_path / "b"), s3_bucket="shared", s3_client_factory=lambda: s3)
+
+    node_a.set("abc", False, dict(DIARIZED_RESULT, speaker_labels=None, segments=None))
+    assert node_b.get("abc", False)["transcript"] == "hello there"
+    assert node_b.stats()["s3_hits"] == 1
+    # 回填后从本地磁盘命中 | Served from local disk after backfill
+    node_b.get("abc", False)
+    assert node_b.stats()["disk_hits"] == 1
+
+
+def test_hash_file_memoized_and_mmap(tmp_path, monkeypatch):
+    """测试大文件通过mmap计算哈希，且结果按文件状态记忆化"""
+    monkeypatch.setattr(transcription_cache, "HASH_MMAP_THRESHOLD", 16)
+    path = tmp_path / "big.wav"
+    path.write_bytes(b"x" * 100)
+    expected = hashlib.sha256(b"x" * 100).hexdigest()
+    assert hash_file(str(path)) == expected
+
+    calls = []
+    monkeypatch.setattr(transcription_cache, "_hash_contents", lambda *args: calls.append(args))
+    assert hash_file(str(path)) == expected
+    assert calls == []
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+语音活动检测测试
+Voice activity detection tests
+"""
+import os
+import sys
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Import after path modification
+from voice_assistant.voice_activity import OffsetMap, compact_audio  # noqa: E402
+
+RATE = 16000
+
+
+def build_recording(layout):
+    """按 [(是否语音, 秒数)] 拼接语音（正弦）和静音（弱噪声）"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for speech, seconds in layout:
+        n = int(seconds * RATE)
+        if speech:
+            parts.append(0.3 * np.sin(2 * np.pi * 220 * np.arange(n) / RATE))
+        else:
+            parts.append(0.0005 * rng.standard_normal(n))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def test_trims_leading_and_trailing_silence():
+    """测试裁剪首尾静音并保留中间停顿"""
+    samples = build_recording([(False, 3), (True, 2), (False, 1), (True, 2), (False, 4)])
+    compacted, offset_map = compact_audio(samples, RATE)
+
+    duration = len(compacted) / RATE
+    assert 5.0 < duration < 5.8
+    # 压缩后的0秒对应原始音频约3秒处 | Compacted 0s maps to roughly 3s in the original
+    assert abs(offset_map.to_original(0.0) - 2.9) < 0.15
+
+
+def test_collapse_long_pauses_and_translate_segments():
+    """测试压缩长停顿，并把片段时间戳换算回原始时间轴"""
+    samples = build_recording([(True, 2), (False, 10), (True, 2)])
+    compacted, offset_map = compact_audio(samples, RATE, collapse_pauses=True, max_pause=2.0, keep_pause=0.5)
+
+    assert len(compacted) / RATE < 5.5
+    second_speech_start = len(compacted) / RATE - 2.0
+    segments = offset_map.translate_segments(
+        [{"speaker": "spk_1", "start_time": second_speech_start, "end_time": second_speech_start + 2.0}]
+    )
+    assert abs(segments[0]["start_time"] - 12.0) < 0.1
+    assert abs(segments[0]["end_time"] - 14.0) < 0.1
+
+
+def test_offset_map_keeps_string_times():
+    """测试Transcribe原始JSON中的字符串时间保持字符串类型"""
+    offset_map = OffsetMap([(0.0, 1.5, 10.0)])
+    translated = offset_map.translate_segments([{"start_time": "0.5", "end_time": "1.0", "items": [{"start_time": "0.5"}]}])
+    assert translated[0]["start_time"] == "2.000"
+    assert translated[0]["items"][0]["start_time"] == "2.000"